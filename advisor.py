@@ -0,0 +1,201 @@
+"""
+Советник ходов для подсказок: ранжирует результативные обмены по ожидаемым очкам.
+
+Ход оценивается розыгрышем на копиях доски с просмотром вперёд на depth ходов.
+Новые элементы после падения заранее неизвестны игроку, поэтому каждая копия получает
+свой генератор случайных чисел, и очки усредняются по samples вариантам заполнения.
+Глубина растёт постепенно (1, 2, ...); когда бюджет времени исчерпан, возвращается
+лучший ответ последней завершённой глубины. Бюджет покрывает и подготовку: перебор
+обменов и их мгновенные очки прерываются по времени, поэтому на большом поле подсказка
+выбирается среди обменов, найденных и оценённых до конца бюджета.
+
+Списки ходов, мгновенные очки и оценки ходов позиции запоминаются в таблице
+транспозиций (transposition.TranspositionCache) по ключу Zobrist доски: повторные
+подсказки на той же доске и позиции, встреченные поиском повторно, не пересчитываются.
+На полях больше CACHE_MAX_CELLS клеток кэш не используется: таблица ключей Zobrist
+и первый подсчёт ключа там дороже самой подсказки.
+"""
+import pickle
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from policies import immediate_score
+from transposition import TranspositionCache
+
+# Подсказка: обмен (r1, c1, r2, c2), ожидаемые очки, глубина, на которой он выбран,
+# и complete=False, если бюджет времени кончился раньше, чем была просмотрена вся глубина
+Hint = namedtuple('Hint', ['move', 'expected_score', 'depth', 'complete'])
+
+_background_executor = None # Общий фоновый поток для advise_async
+
+CACHE_MAX_CELLS = 100 * 100 # На полях больше - без таблицы транспозиций
+DEADLINE_CHECK_EVERY = 256 # Через сколько найденных обменов проверять бюджет при переборе
+
+
+class _OutOfTime(Exception):
+    """Бюджет времени запроса исчерпан."""
+
+
+def _clone(board):
+    """Независимая копия доски любого бэкенда (через pickle, как в процессах симулятора)."""
+    return pickle.loads(pickle.dumps(board))
+
+
+def _candidate_moves(board, deadline):
+    """
+    Результативные обмены доски в порядке legal_moves и флаг полноты перебора.
+    Перебор прерывается по deadline (но не раньше первого найденного обмена),
+    тогда возвращаются обмены, найденные к этому моменту, и False.
+    """
+    found = set()
+    for count, move in enumerate(board.iter_legal_moves(), 1):
+        found.add(move)
+        if count % DEADLINE_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            return sorted(found), False
+    return sorted(found), True
+
+
+# --- Класс MoveAdvisor: Подсказка лучшего хода с просмотром вперёд ---
+class MoveAdvisor:
+    def __init__(self, depth=2, samples=3, beam_width=4, time_budget=0.25, seed=None, cache_size=1024):
+        self.depth = depth # 1 - только сам ход, 2 - ход и лучший следующий ход, ...
+        self.samples = samples # Сколько вариантов случайных заполнений усредняется для хода
+        self.beam_width = beam_width # Сколько лучших по immediate_score ходов смотреть глубже
+        self.time_budget = time_budget # Секунд на один запрос
+        self.seed = seed # Seed генератора заполнений (None - каждый раз разные)
+        # Таблица транспозиций на cache_size позиций (0 - без кэша)
+        self.cache = TranspositionCache(cache_size) if cache_size else None
+
+    def advise(self, board, time_budget=None):
+        """
+        Возвращает Hint с лучшим ходом или None, если ходов нет.
+        Доска не меняется: все розыгрыши идут на копиях. Ответ гарантированно
+        готов к концу бюджета (с точностью до одного resolve_move): если время кончилось
+        уже при переборе обменов или их мгновенной оценке, возвращается лучший
+        из оценённых обменов (complete=False).
+        """
+        deadline = time.perf_counter() + (self.time_budget if time_budget is None else time_budget)
+        # Все розыгрыши идут на копиях; ключ Zobrist включается только на них,
+        # чтобы живая доска не тратила время на его обновление
+        probe = _clone(board)
+        cache = self._cache_for(probe)
+        root = cache.key(probe) if cache is not None else None
+        moves, complete = self._moves(probe, cache, root, deadline)
+        if not moves:
+            return None
+
+        # Глубина 0 - мгновенный ответ по клеткам, удаляемым сразу; он же задаёт порядок,
+        # чтобы при нехватке времени первыми оценивались самые многообещающие ходы
+        immediate = {}
+        for move in moves:
+            immediate[move] = self._immediate(probe, move, cache, root)
+            if time.perf_counter() > deadline:
+                break
+        if not complete or len(immediate) < len(moves):
+            move = max(immediate, key=immediate.get)
+            return Hint(move, float(immediate[move]), 0, False)
+        moves.sort(key=immediate.get, reverse=True)
+        best = Hint(moves[0], float(immediate[moves[0]]), 0, False)
+
+        rng = random.Random(self.seed)
+        snapshot = pickle.dumps(probe)
+        for depth in range(1, self.depth + 1):
+            expected = {}
+            try:
+                for move in moves:
+                    value = cache.score(root, move, depth) if cache is not None else None
+                    if value is None:
+                        value = self._expected_score(snapshot, move, depth, rng, deadline)
+                        if cache is not None:
+                            cache.store_score(root, move, depth, value)
+                    expected[move] = value
+            except _OutOfTime:
+                if best.depth == 0 and expected:
+                    # Ни одна глубина не завершена: лучший из уже оценённых ходов
+                    move = max(expected, key=expected.get)
+                    best = Hint(move, expected[move], depth, False)
+                return best
+            move = max(moves, key=expected.get)
+            best = Hint(move, expected[move], depth, depth == self.depth)
+        return best
+
+    def advise_async(self, board, executor=None, time_budget=None):
+        """
+        Запускает advise в фоне и возвращает concurrent.futures.Future.
+        Снимок доски делается сразу, поэтому фоновая задача не трогает живую доску.
+        По умолчанию используется общий фоновый поток. Советник с таблицей транспозиций
+        принимает только потоки: в ProcessPoolExecutor советник копируется в процесс вместе
+        с кэшем, и всё, что туда записано, терялось бы (ValueError). ProcessPoolExecutor
+        подходит советнику без кэша (cache_size=0). Кэш не потокобезопасен, поэтому
+        запросы одного советника должны выполняться по одному (как в общем потоке).
+        """
+        global _background_executor
+        if self.cache is not None and isinstance(executor, ProcessPoolExecutor):
+            raise ValueError("советнику с кэшем нужен ThreadPoolExecutor (или cache_size=0)")
+        if executor is None:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='advisor')
+            executor = _background_executor
+        return executor.submit(self.advise, _clone(board), time_budget)
+
+    def _expected_score(self, snapshot, move, depth, rng, deadline):
+        """Средние очки хода move с просмотром на depth ходов по samples вариантам заполнения."""
+        total = 0
+        for _ in range(self.samples):
+            board = pickle.loads(snapshot)
+            board.rng = random.Random(rng.getrandbits(64)) # Свой вариант будущих заполнений
+            board._spawn_queue = []
+            board.verify_incremental = False
+            total += self._play(board, move, depth, deadline)
+        return total / self.samples
+
+    def _play(self, board, move, depth, deadline):
+        """Очки хода move плюс лучший результат следующих depth - 1 ходов (доска меняется)."""
+        if time.perf_counter() > deadline:
+            raise _OutOfTime()
+        score = board.resolve_move(*move).score
+        if depth <= 1:
+            return score
+
+        cache = self._cache_for(board)
+        key = cache.key(board) if cache is not None else None
+        moves, complete = self._moves(board, cache, key, deadline)
+        if not complete:
+            raise _OutOfTime()
+        if not moves:
+            return score
+        if len(moves) > self.beam_width:
+            rank = {}
+            for candidate in moves:
+                if time.perf_counter() > deadline:
+                    raise _OutOfTime()
+                rank[candidate] = self._immediate(board, candidate, cache, key)
+            moves = sorted(moves, key=rank.get, reverse=True)[:self.beam_width]
+        return score + max(self._play(_clone(board), candidate, depth - 1, deadline)
+                           for candidate in moves)
+
+    def _cache_for(self, board):
+        """Таблица транспозиций для доски board или None (кэш выключен или поле слишком большое)."""
+        if self.cache is None or board.rows * board.cols > CACHE_MAX_CELLS:
+            return None
+        return self.cache
+
+    @staticmethod
+    def _moves(board, cache, key, deadline):
+        """Обмены доски через кэш (если он есть) и флаг полноты, см. _candidate_moves."""
+        moves = cache.moves(key) if cache is not None else None
+        if moves is not None:
+            return list(moves), True
+        moves, complete = _candidate_moves(board, deadline)
+        if complete and cache is not None:
+            cache.store_moves(key, moves)
+        return list(moves), complete
+
+    @staticmethod
+    def _immediate(board, move, cache, key):
+        """Мгновенные очки обмена через кэш (если он есть)."""
+        if cache is not None:
+            return cache.immediate_score(board, move, key)
+        return immediate_score(board, move)
@@ -0,0 +1,139 @@
+from collections import deque
+
+from kivy.animation import AnimationTransition
+from kivy.clock import Clock
+
+from profiler import NULL_PROFILER
+
+
+def _lerp(start, end, t):
+    """Линейная интерполяция чисел или последовательностей чисел (pos, size, цвет)."""
+    if isinstance(start, (int, float)):
+        return start + (end - start) * t
+    return [a + (b - a) * t for a, b in zip(start, end)]
+
+
+# --- Класс _AnimationGroup: Набор свойств, анимируемых вместе ---
+class _AnimationGroup:
+    __slots__ = ('tweens', 'duration', 'elapsed', 'transition', 'on_complete')
+
+    def __init__(self, tweens, duration, transition, on_complete):
+        self.tweens = tweens # [(объект, свойство, начальное значение, конечное значение)]
+        self.duration = duration
+        self.elapsed = 0.0
+        self.transition = transition
+        self.on_complete = on_complete
+
+
+# --- Класс AnimationScheduler: Единый планировщик анимаций доски ---
+class AnimationScheduler:
+    """
+    Ведёт все анимации доски (обмен, исчезновение, падение, паузы между шагами)
+    из одного колбэка Clock на кадр вместо отдельного объекта Animation на каждый виджет.
+    speed ускоряет или замедляет всё сразу, instant применяет конечные значения мгновенно.
+    """
+
+    def __init__(self, speed=1.0, instant=False):
+        self.speed = speed
+        self.instant = instant
+        self.profiler = NULL_PROFILER # Считает запущенные группы и анимируемые свойства
+        self._groups = []
+        self._event = None
+        self._instant_groups = deque() # Мгновенно завершённые группы, ждущие колбэков (см. _drain)
+        self._draining = False
+
+    @property
+    def busy(self):
+        """True, пока есть незавершённые анимации или паузы."""
+        return bool(self._groups or self._instant_groups)
+
+    def animate(self, targets, duration, on_complete=None, transition='linear'):
+        """
+        Запускает анимацию группы свойств.
+        targets - список пар (объект, {свойство: конечное значение});
+        on_complete вызывается один раз, когда вся группа завершена.
+        """
+        tweens = []
+        for target, properties in targets:
+            for name, end in properties.items():
+                start = getattr(target, name)
+                if not isinstance(start, (int, float)):
+                    start = list(start) # Копия, чтобы не держать ссылку на ObservableList
+                tweens.append((target, name, start, end))
+
+        self.profiler.count('animation_groups')
+        self.profiler.count('animated_properties', len(tweens))
+        group = _AnimationGroup(tweens, duration, getattr(AnimationTransition, transition), on_complete)
+        if self.instant or duration <= 0:
+            self._instant_groups.append(group)
+            self._drain()
+            return
+        self._groups.append(group)
+        if self._event is None:
+            self._event = Clock.schedule_interval(self._tick, 0)
+
+    def delay(self, duration, callback):
+        """Пауза, которая тоже ускоряется вместе с анимациями (и пропускается в режиме instant)."""
+        self.animate([], duration, callback)
+
+    def finish_all(self):
+        """Мгновенно доводит все текущие анимации до конца (перемотка)."""
+        groups, self._groups = self._groups, []
+        for group in groups:
+            self._finish(group)
+
+    def cancel_all(self):
+        """Останавливает все анимации без вызова их колбэков (например, при уходе с экрана)."""
+        self._groups = []
+        self._instant_groups.clear()
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def _drain(self):
+        """
+        Завершает мгновенные группы по очереди. Колбэк завершения обычно сразу запускает
+        следующий шаг хода (исчезновение -> пауза -> падение -> следующий шаг каскада);
+        его мгновенная группа только встаёт в очередь и завершается этим же циклом после
+        возврата колбэка. Рекурсия через колбэки стоила бы десяток кадров стека на шаг,
+        а каскад на большом поле длится сотни шагов - это RecursionError.
+        """
+        if self._draining:
+            return # Группу завершит внешний вызов _drain
+        self._draining = True
+        try:
+            while self._instant_groups:
+                self._finish(self._instant_groups.popleft())
+        finally:
+            self._draining = False
+
+    def _finish(self, group):
+        for target, name, _, end in group.tweens:
+            setattr(target, name, end)
+        if group.on_complete is not None:
+            group.on_complete()
+
+    def _tick(self, dt):
+        """Единственный колбэк кадра: продвигает все активные группы."""
+        active, finished = [], []
+        for group in self._groups:
+            group.elapsed += dt * self.speed
+            if group.elapsed >= group.duration:
+                finished.append(group)
+                continue
+            t = group.transition(group.elapsed / group.duration)
+            for target, name, start, end in group.tweens:
+                setattr(target, name, _lerp(start, end, t))
+            active.append(group)
+        self._groups = active
+
+        # Колбэки завершения могут запускать новые группы - они попадут в self._groups
+        for group in finished:
+            self._finish(group)
+
+        if self._event is None: # Колбэк завершения вызвал cancel_all
+            return False
+        if not self._groups:
+            self._event = None
+            return False # Снимаем колбэк с Clock, пока нет анимаций
+        return True
@@ -0,0 +1,201 @@
+from game_board import FallMap, GameBoard
+
+
+# --- Класс ArrayGameBoard: Доска на непрерывном буфере с векторным поиском совпадений ---
+class ArrayGameBoard(GameBoard):
+    """
+    Альтернативный бэкенд GameBoard для безголовых симуляций.
+
+    Поле хранится в одном непрерывном bytearray построчно. Каждая строка
+    дополнена одной пустой (0) клеткой справа, поэтому окно из трёх клеток,
+    пересекающее границу строки, никогда не совпадает и не требует отдельной проверки.
+    Совпадения ищутся сравнением сдвинутых копий всего буфера (см. _run_starts),
+    а не вложенными циклами по self.board[r][c].
+    """
+
+    def __init__(self, rows, cols, num_types, **kwargs):
+        self._stride = cols + 1 # Ширина строки в буфере с учётом клетки-разделителя
+        self._cells = bytearray(rows * self._stride)
+        # Маски для побайтовых сравнений: старший бит и младшие 7 бит каждого байта
+        self._high_bits = int.from_bytes(b'\x80' * len(self._cells), 'little')
+        self._low_bits = int.from_bytes(b'\x7f' * len(self._cells), 'little')
+        self._rows_view = []
+        super().__init__(rows, cols, num_types, **kwargs)
+
+    @property
+    def board(self):
+        """
+        Список строк-представлений (memoryview) над буфером.
+        Поддерживает прежний доступ self.board[r][c] на чтение и запись.
+        """
+        return self._rows_view
+
+    @board.setter
+    def board(self, grid):
+        """Загружает поле из списка списков (например, из _create_initial_board)."""
+        stride = self._stride
+        for r, row in enumerate(grid):
+            self._cells[r * stride:r * stride + self.cols] = bytes(row)
+        view = memoryview(self._cells)
+        self._rows_view = [view[r * stride:r * stride + self.cols] for r in range(self.rows)]
+        self.mark_all_dirty()
+
+    def __getstate__(self):
+        # memoryview не сериализуется, поэтому при pickle передаём только буфер
+        state = self.__dict__.copy()
+        del state['_rows_view']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.board = []
+
+    def swap_elements(self, r1, c1, r2, c2):
+        """
+        Меняет местами два соседних элемента прямо в буфере.
+        Возвращает True, если обмен произошёл успешно, False в противном случае.
+        """
+        if not ((abs(r1 - r2) == 1 and c1 == c2) or \
+                (abs(c1 - c2) == 1 and r1 == r2)):
+            return False # Несоседние элементы
+
+        if not (0 <= r1 < self.rows and 0 <= c1 < self.cols and \
+                0 <= r2 < self.rows and 0 <= c2 < self.cols):
+            return False # Выход за границы доски
+
+        cells = self._cells
+        i1 = r1 * self._stride + c1
+        i2 = r2 * self._stride + c2
+        cells[i1], cells[i2] = cells[i2], cells[i1]
+        self._after_swap(r1, c1, r2, c2)
+        self._mark_dirty((r1, r2), (c1, c2))
+        return True
+
+    def _run_starts(self, step, start=0, end=None):
+        """
+        Возвращает индексы начала всех окон из трёх одинаковых непустых клеток
+        с шагом step (1 - по горизонтали, stride - по вертикали).
+        start и end ограничивают проверяемый участок буфера (окна, выходящие за end,
+        не совпадают); индексы возвращаются в координатах всего буфера.
+
+        Буфер целиком превращается в одно большое целое число (байт i - клетка i),
+        и сравнение выполняется побайтово (SWAR): a ^ b даёт нулевой байт там,
+        где клетки равны. Так все окна проверяются несколькими операциями над числом.
+        """
+        cells = self._cells
+        if start == 0 and (end is None or end >= len(cells)):
+            high, low = self._high_bits, self._low_bits
+        else:
+            cells = cells[start:end]
+            high = int.from_bytes(b'\x80' * len(cells), 'little')
+            low = int.from_bytes(b'\x7f' * len(cells), 'little')
+        first = int.from_bytes(cells, 'little')
+        second = first >> (8 * step)
+        third = first >> (16 * step)
+        diff = (first ^ second) | (second ^ third)
+        # Старший бит байта равен 1, если байт ненулевой (без переносов между байтами)
+        diff_nonzero = ((diff & low) + low) | diff
+        first_nonzero = ((first & low) + low) | first
+        hits = ~diff_nonzero & first_nonzero & high # Равные и непустые окна
+        if not hits:
+            return []
+
+        marks = hits.to_bytes(len(cells), 'little')
+        starts = []
+        i = marks.find(0x80)
+        while i != -1:
+            starts.append(start + i)
+            i = marks.find(0x80, i + 1)
+        return starts
+
+    def find_matches(self):
+        """
+        Находит все совпадения (3 или более одинаковых элемента) на доске.
+        Возвращает список уникальных координат [(строка, столбец)] всех найденных совпадений.
+        В инкрементальном режиме проверяются только изменённые линии (см. GameBoard).
+        """
+        if self.incremental:
+            return super().find_matches()
+
+        stride = self._stride
+        indices = set()
+        for step in (1, stride):
+            for i in self._run_starts(step):
+                indices.update((i, i + step, i + 2 * step))
+        return [divmod(i, stride) for i in indices]
+
+    def _scan_matches(self, rows, cols, box=None):
+        """
+        То же, что GameBoard._scan_matches, но через _run_starts: проверяется полоса
+        буфера из строк прямоугольника изменений box (с запасом в две строки для
+        вертикальных серий), а из найденных окон отбираются горизонтальные
+        в строках rows и вертикальные в столбцах cols, задевающие box.
+        """
+        stride = self._stride
+        r_lo, r_hi, c_lo, c_hi = box if box is not None else (0, self.rows - 1, 0, self.cols - 1)
+        start = max(0, r_lo - 2) * stride
+        end = min(self.rows, r_hi + 3) * stride
+        rows, cols = set(rows), set(cols)
+
+        matches = set()
+        rows_with_runs = set()
+        cols_with_runs = set()
+        for i in self._run_starts(1, start, end):
+            r, c = divmod(i, stride)
+            if r in rows and c_lo - 2 <= c <= c_hi:
+                matches.update(((r, c), (r, c + 1), (r, c + 2)))
+                rows_with_runs.add(r)
+        for i in self._run_starts(stride, start, end):
+            r, c = divmod(i, stride)
+            if c in cols and r_lo - 2 <= r <= r_hi:
+                matches.update(((r, c), (r + 1, c), (r + 2, c)))
+                cols_with_runs.add(c)
+        return matches, rows_with_runs, cols_with_runs
+
+    def remove_matches(self, matches):
+        """
+        Удаляет найденные совпадения, заменяя их на 0 (пустое место).
+        Возвращает количество удалённых элементов (очков).
+        """
+        if not matches:
+            return 0
+        if self._zobrist is not None:
+            self._zobrist_cells(matches)
+
+        cells = self._cells
+        stride = self._stride
+        for r, c in matches:
+            cells[r * stride + c] = 0
+        return len(matches)
+
+    def drop_elements(self):
+        """
+        Опускает элементы, чтобы заполнить пустые места (0),
+        и генерирует новые случайные элементы в верхней части столбцов.
+        Каждый столбец уплотняется целиком через срез буфера с шагом stride,
+        новые элементы берутся из очереди появления, как в GameBoard.drop_elements.
+        Возвращает FallMap - карту падения элементов.
+        """
+        cells = self._cells
+        stride = self._stride
+        rows = self.rows
+        changed = []
+        for c in range(self.cols):
+            column = cells[c::stride][:rows] # Срез столбца (без хвоста за последней строкой)
+            kept = column.replace(b'\x00', b'') # Непустые элементы в исходном порядке
+            if len(kept) < rows:
+                changed.append((c, column, kept))
+        spawns = bytes(self._take_spawns(sum(rows - len(kept) for _, _, kept in changed)))
+
+        falls = FallMap()
+        lowest_changed_row = -1
+        start = 0
+        for c, column, kept in changed:
+            missing = rows - len(kept)
+            falls.add_column(c, column, missing)
+            lowest_changed_row = max(lowest_changed_row, column.rfind(b'\x00'))
+            cells[c:c + rows * stride:stride] = spawns[start:start + missing] + kept
+            start += missing
+        self._mark_dirty(range(lowest_changed_row + 1), [c for c, _, _ in changed])
+        self._after_drop(falls)
+        return falls
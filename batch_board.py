@@ -0,0 +1,439 @@
+"""
+Пакетный движок: B независимых досок одного размера, которые ходят в ногу.
+
+Все доски лежат в одном bytearray (логически - массив B x rows x cols): строка каждой
+доски дополнена пустой клеткой справа, а между досками стоит пустая строка, поэтому
+ни одно окно из трёх клеток и ни одно падение не переходит через край доски.
+Поиск совпадений, удаление и падение выполняются над всем буфером как над одним
+большим целым числом (SWAR, как в ArrayGameBoard._run_starts): цена шага каскада
+- несколько операций над числом для всех досок сразу, а не вызов методов на каждую.
+Доски на разной глубине каскада обрабатываются одними и теми же операциями: доска
+без совпадений просто не меняется, а когда продолжающих каскад досок становится мало,
+шаг выполняется только над их копией.
+
+Правила - как у GameBoard(special_tiles=False): у каждой доски свой seed, свой
+генератор и своя очередь появления, поэтому доска пакета с тем же seed играет
+точно ту же партию, что и отдельная доска (см. to_board).
+"""
+import random
+from collections import namedtuple
+
+from game_board import GameBoard, generate_board
+
+# Результат resolve_moves: списки очков и глубины каскада по доскам пакета
+BatchResult = namedtuple('BatchResult', ['scores', 'depths'])
+
+# Доля досок, ниже которой шаг каскада выполняется над копией только продолжающих досок
+GATHER_FRACTION = 0.5
+
+
+def _nonzero_bytes(x, low):
+    """Старший бит каждого байта x равен 1, если байт ненулевой (без переносов между байтами)."""
+    return ((x & low) + low) | x
+
+
+def _run_cells(x, shift, low, high):
+    """Клетки всех окон из трёх одинаковых непустых клеток с шагом shift (в битах)."""
+    second = x >> shift
+    third = x >> (2 * shift)
+    diff = (x ^ second) | (second ^ third)
+    hits = ~_nonzero_bytes(diff, low) & _nonzero_bytes(x, low) & high
+    return hits | (hits << shift) | (hits << (2 * shift))
+
+
+# --- Класс BatchGameBoard: Пакет досок в одном буфере ---
+class BatchGameBoard:
+    """
+    count досок rows x cols. Доска b - это b-я партия пакета; её клетки читаются
+    через board(b), а полноценная копия для обычного кода - через to_board(b).
+    seeds задаёт seed каждой доски (по умолчанию случайные).
+    """
+
+    def __init__(self, count, rows, cols, num_types, auto_reshuffle=False, seeds=None):
+        if num_types >= 128:
+            raise ValueError("Значения клеток должны помещаться в 7 бит")
+        self.count = count
+        self.rows = rows
+        self.cols = cols
+        self.num_types = num_types
+        self.auto_reshuffle = auto_reshuffle
+        self._stride = cols + 1 # Строка с пустой клеткой-разделителем
+        self._pitch = (rows + 1) * self._stride # Доска с пустой строкой-разделителем
+        self.seeds = list(seeds) if seeds is not None else [random.getrandbits(64) for _ in range(count)]
+        if len(self.seeds) != count:
+            raise ValueError("Нужно по одному seed на доску")
+        self._rngs = [random.Random(seed) for seed in self.seeds]
+        self._spawn_queues = [[] for _ in range(count)]
+        self._spawn_values = range(1, num_types + 1)
+        # Шаблоны масок одной доски: старший бит у настоящих клеток и у всех байтов
+        self._cell_pattern = (b'\x80' * cols + b'\x00') * rows + b'\x00' * self._stride
+        self._masks = {} # Число досок в буфере -> (клетки, 0x7f, 0x80)
+        # Смещение байта внутри доски -> (строка, столбец); для разделителей - None
+        self._cell_at = [divmod(i, self._stride) if i % self._stride < cols and i // self._stride < rows
+                         else None for i in range(self._pitch)]
+        self._move_tables = {} # Смещение источника -> [обмен со слотом в клетке смещения]
+
+        self._cells = bytearray(count * self._pitch)
+        for b, rng in enumerate(self._rngs):
+            self._write_board(b, generate_board(rows, cols, num_types, rng))
+        if auto_reshuffle:
+            for b, has_moves in zip(range(count), self.has_legal_moves()):
+                if not has_moves:
+                    self._reshuffle(b)
+
+    def __len__(self):
+        return self.count
+
+    # --- Доступ к отдельным доскам ---
+
+    def board(self, b):
+        """Поле доски b списком списков (копия)."""
+        base = b * self._pitch
+        stride = self._stride
+        return [list(self._cells[base + r * stride:base + r * stride + self.cols]) for r in range(self.rows)]
+
+    def _write_board(self, b, grid):
+        base = b * self._pitch
+        stride = self._stride
+        for r, row in enumerate(grid):
+            self._cells[base + r * stride:base + r * stride + self.cols] = bytes(row)
+
+    def to_board(self, b, board_class=GameBoard, share_state=False):
+        """
+        Доска b как обычная доска board_class (special_tiles=False) в том же состоянии:
+        поле, генератор и очередь появления. По умолчанию генератор и очередь копируются,
+        и партия продолжается на возвращённой доске независимо; share_state=True
+        отдаёт их без копирования (ходы на доске расходуют случайные числа пакета).
+        """
+        board = board_class(self.rows, self.cols, self.num_types, special_tiles=False,
+                            auto_reshuffle=self.auto_reshuffle, seed=self.seeds[b])
+        if share_state:
+            board.rng = self._rngs[b]
+            board._spawn_queue = self._spawn_queues[b]
+        else:
+            board.rng.setstate(self._rngs[b].getstate())
+            board._spawn_queue = list(self._spawn_queues[b])
+        board.board = self.board(b)
+        board.mark_all_dirty()
+        return board
+
+    def _reshuffle(self, b):
+        """Перемешивает доску b по правилам GameBoard.reshuffle (редкий случай тупика)."""
+        board = self.to_board(b, share_state=True)
+        board.reshuffle()
+        self._write_board(b, board.to_list())
+
+    def _take_spawns(self, b, count):
+        """Значения новых элементов доски b - как GameBoard._take_spawns."""
+        queue = self._spawn_queues[b]
+        if len(queue) < count:
+            queue.extend(self._rngs[b].choices(self._spawn_values, k=max(count, 256)))
+        spawns = queue[:count]
+        del queue[:count]
+        return spawns
+
+    # --- Буфер части досок ---
+
+    def _masks_for(self, n):
+        """Маски для буфера из n досок: (настоящие клетки, 0x7f в каждом байте, 0x80 в каждом байте)."""
+        masks = self._masks.get(n)
+        if masks is None:
+            size = n * self._pitch
+            masks = (int.from_bytes(self._cell_pattern * n, 'little'),
+                     int.from_bytes(b'\x7f' * size, 'little'),
+                     int.from_bytes(b'\x80' * size, 'little'))
+            if n == self.count or len(self._masks) < 8:
+                self._masks[n] = masks
+        return masks
+
+    def _gather(self, boards):
+        """Буфер с досками boards подряд (весь буфер пакета, если boards - все доски)."""
+        if len(boards) == self.count:
+            return self._cells
+        pitch = self._pitch
+        cells = self._cells
+        return bytearray(b''.join(cells[b * pitch:(b + 1) * pitch] for b in boards))
+
+    def _store(self, boards, part):
+        """Возвращает доски из буфера part (см. _gather) на их места в пакете."""
+        if len(boards) == self.count:
+            self._cells = part
+            return
+        pitch = self._pitch
+        cells = self._cells
+        for j, b in enumerate(boards):
+            cells[b * pitch:(b + 1) * pitch] = part[j * pitch:(j + 1) * pitch]
+
+    def _decode(self, boards, marks):
+        """{доска: [(строка, столбец)]} по байтам 0x80 в marks (буфер досок boards)."""
+        pitch, cell_at = self._pitch, self._cell_at
+        cells = {}
+        i = marks.find(0x80)
+        while i != -1:
+            j, offset = divmod(i, pitch)
+            cells.setdefault(boards[j], []).append(cell_at[offset])
+            i = marks.find(0x80, i + 1)
+        return cells
+
+    # --- Шаги каскада над буфером части досок ---
+
+    def _match_mask(self, x, n):
+        """Маска клеток всех серий в буфере x из n досок."""
+        _, low, high = self._masks_for(n)
+        return _run_cells(x, 8, low, high) | _run_cells(x, 8 * self._stride, low, high)
+
+    def _fall(self, x, n):
+        """
+        Опускает непустые клетки на пустые под ними во всех досках буфера x сразу:
+        за проход каждая клетка с пустой клеткой снизу опускается на одну строку,
+        проходы повторяются, пока что-то движется (не больше rows раз).
+        """
+        cell_bits, low, _ = self._masks_for(n)
+        shift = 8 * self._stride
+        while True:
+            filled = _nonzero_bytes(x, low) & cell_bits
+            empty = cell_bits & ~filled
+            movers = filled & (empty >> shift)
+            if not movers:
+                return x
+            moving = x & ((movers >> 7) * 0xff)
+            x = (x ^ moving) | (moving << shift)
+
+    def _refill(self, boards, part, removed):
+        """
+        Заполняет пустые клетки сверху столбцов значениями из очередей появления:
+        как в GameBoard.drop_elements, столбцы идут слева направо, каждый сверху вниз.
+        removed - {индекс доски в part: число удалённых клеток}.
+        """
+        pitch, stride, rows = self._pitch, self._stride, self.rows
+        for j, count in removed.items():
+            spawns = bytes(self._take_spawns(boards[j], count))
+            base = j * pitch
+            top = part[base:base + self.cols]
+            start = 0
+            c = top.find(0)
+            while c != -1:
+                column = base + c
+                missing = part[column:column + rows * stride:stride].count(0)
+                part[column:column + missing * stride:stride] = spawns[start:start + missing]
+                start += missing
+                c = top.find(0, c + 1)
+
+    def _step(self, boards, part, mask):
+        """
+        Один шаг каскада для досок boards (буфер part, маска совпадений mask):
+        удаление, падение и заполнение. Возвращает (новый буфер, {индекс доски в part: очки}).
+        """
+        n = len(boards)
+        marks = mask.to_bytes(len(part), 'little')
+        pitch = self._pitch
+        removed = {}
+        i = marks.find(0x80)
+        while i != -1:
+            j = i // pitch
+            removed[j] = marks.count(0x80, i, (j + 1) * pitch)
+            i = marks.find(0x80, (j + 1) * pitch)
+        x = int.from_bytes(part, 'little') & ~((mask >> 7) * 0xff)
+        part = bytearray(self._fall(x, n).to_bytes(len(part), 'little'))
+        self._refill(boards, part, removed)
+        return part, removed
+
+    def _legal_move_masks(self, x, n):
+        """
+        Маски клеток-"слотов" результативных обменов для четырёх направлений источника:
+        {смещение источника: маска}. Слот - клетка, куда приходит элемент value,
+        образуя серию с парой (XX_/_XX) или парой с разрывом (X_X), как в
+        GameBoard._iter_legal_moves; источник - соседняя клетка со значением value.
+        """
+        cell_bits, low, _ = self._masks_for(n)
+        stride = self._stride
+        ones = cell_bits >> 7 # 0x01 в каждой настоящей клетке
+        row = 8
+        col = 8 * stride
+
+        def at(mask, offset):
+            # Бит клетки i - бит клетки i + offset (offset в битах)
+            return mask >> offset if offset > 0 else mask << -offset
+
+        result = dict.fromkeys((-1, 1, -stride, stride), 0)
+        for value in range(1, self.num_types + 1):
+            same = ~_nonzero_bytes(x ^ (ones * value), low) & cell_bits
+            if not same:
+                continue
+            slots = cell_bits & ~same
+            pair_right = at(same, row) & at(same, 2 * row) # Пара справа от слота
+            pair_left = at(same, -row) & at(same, -2 * row)
+            gap_row = at(same, -row) & at(same, row)
+            pair_below = at(same, col) & at(same, 2 * col)
+            pair_above = at(same, -col) & at(same, -2 * col)
+            gap_col = at(same, -col) & at(same, col)
+            horizontal = pair_right | pair_left | gap_row
+            vertical = pair_below | pair_above | gap_col
+            # Источник не может быть клеткой самой пары
+            patterns = {-stride: horizontal | pair_below, stride: horizontal | pair_above,
+                        -1: vertical | pair_right, 1: vertical | pair_left}
+            for offset, pattern in patterns.items():
+                result[offset] |= slots & pattern & at(same, 8 * offset)
+        return result
+
+    # --- Операции над всем пакетом ---
+
+    def find_matches(self, boards=None):
+        """{доска: [(строка, столбец)]} для досок (по умолчанию всех), где есть совпадения."""
+        boards = list(range(self.count)) if boards is None else list(boards)
+        part = self._gather(boards)
+        mask = self._match_mask(int.from_bytes(part, 'little'), len(boards))
+        return {b: sorted(cells) for b, cells in
+                self._decode(boards, mask.to_bytes(len(part), 'little')).items()}
+
+    def remove_matches(self, matches):
+        """Удаляет клетки {доска: [(строка, столбец)]}. Возвращает {доска: очки}."""
+        cells, pitch, stride = self._cells, self._pitch, self._stride
+        scores = {}
+        for b, positions in matches.items():
+            base = b * pitch
+            for r, c in positions:
+                cells[base + r * stride + c] = 0
+            scores[b] = len(positions)
+        return scores
+
+    def drop_elements(self, boards=None):
+        """
+        Падение и заполнение сразу во всех досках (по умолчанию) или в boards.
+        При auto_reshuffle доски в тупике перемешиваются, как в GameBoard._after_drop.
+        Возвращает список досок, где что-то упало.
+        """
+        boards = list(range(self.count)) if boards is None else list(boards)
+        part = self._gather(boards)
+        n = len(boards)
+        cell_bits, low, _ = self._masks_for(n)
+        x = int.from_bytes(part, 'little')
+        empty = (cell_bits & ~_nonzero_bytes(x, low)).to_bytes(len(part), 'little')
+        removed = {}
+        for j in range(n):
+            missing = empty.count(0x80, j * self._pitch, (j + 1) * self._pitch)
+            if missing:
+                removed[j] = missing
+        part = bytearray(self._fall(x, n).to_bytes(len(part), 'little'))
+        self._refill(boards, part, removed)
+        self._store(boards, part)
+        changed = [boards[j] for j in removed]
+        if self.auto_reshuffle and changed:
+            matches = self.find_matches(changed)
+            stable = [b for b in changed if b not in matches]
+            for b, has_moves in zip(stable, self.has_legal_moves(stable)):
+                if not has_moves:
+                    self._reshuffle(b)
+        return changed
+
+    def swap_elements(self, swaps):
+        """
+        Обмены (r1, c1, r2, c2) по одному на доску (None - доска не ходит) одним вызовом.
+        Возвращает список: выполнен ли обмен (клетки соседние и на доске).
+        """
+        if len(swaps) != self.count:
+            raise ValueError("Нужно по одному обмену (или None) на доску")
+        cells, pitch, stride = self._cells, self._pitch, self._stride
+        rows, cols = self.rows, self.cols
+        done = []
+        for b, swap in enumerate(swaps):
+            if swap is None:
+                done.append(False)
+                continue
+            r1, c1, r2, c2 = swap
+            if abs(r1 - r2) + abs(c1 - c2) != 1 or not (0 <= r1 < rows and 0 <= c1 < cols and
+                                                       0 <= r2 < rows and 0 <= c2 < cols):
+                done.append(False)
+                continue
+            i1 = b * pitch + r1 * stride + c1
+            i2 = b * pitch + r2 * stride + c2
+            cells[i1], cells[i2] = cells[i2], cells[i1]
+            done.append(True)
+        return done
+
+    def has_legal_moves(self, boards=None):
+        """Список: есть ли результативный обмен на каждой доске (по умолчанию всех)."""
+        boards = list(range(self.count)) if boards is None else list(boards)
+        part = self._gather(boards)
+        masks = self._legal_move_masks(int.from_bytes(part, 'little'), len(boards))
+        slots = 0
+        for mask in masks.values():
+            slots |= mask
+        marks = slots.to_bytes(len(part), 'little')
+        pitch = self._pitch
+        return [marks.find(0x80, j * pitch, (j + 1) * pitch) != -1 for j in range(len(boards))]
+
+    def legal_moves(self, boards=None):
+        """
+        Списки результативных обменов (r1, c1, r2, c2) для каждой доски (по умолчанию
+        всех) - то же, что GameBoard.legal_moves, но за один проход по пакету.
+        """
+        boards = list(range(self.count)) if boards is None else list(boards)
+        part = self._gather(boards)
+        pitch = self._pitch
+        moves = [set() for _ in boards]
+        for offset, mask in self._legal_move_masks(int.from_bytes(part, 'little'), len(boards)).items():
+            table = self._move_table(offset)
+            marks = mask.to_bytes(len(part), 'little')
+            i = marks.find(0x80)
+            while i != -1:
+                j, slot = divmod(i, pitch)
+                moves[j].add(table[slot])
+                i = marks.find(0x80, i + 1)
+        return [sorted(board_moves) for board_moves in moves]
+
+    def _move_table(self, offset):
+        """Обмен (r1, c1, r2, c2) для слота с каждым смещением в доске и источника slot + offset."""
+        table = self._move_tables.get(offset)
+        if table is None:
+            table = []
+            for slot, cell in enumerate(self._cell_at):
+                source = self._cell_at[slot + offset] if 0 <= slot + offset < self._pitch else None
+                if cell is None or source is None:
+                    table.append(None)
+                else:
+                    table.append(cell + source if cell < source else source + cell)
+            self._move_tables[offset] = table
+        return table
+
+    def resolve_moves(self, swaps):
+        """
+        Разрешает по одному обмену на доску (None или невозможный обмен - доска не ходит)
+        со всеми каскадами, как GameBoard.resolve_move на каждой доске; обмен без
+        совпадений откатывается. Каждый шаг каскада - одни и те же операции для всех
+        досок, которые его ещё продолжают; остальные доски пакета должны быть стабильны
+        (без готовых совпадений), как после любого resolve_moves. Возвращает BatchResult.
+        """
+        scores = [0] * self.count
+        depths = [0] * self.count
+        all_boards = range(self.count)
+        active = [b for b, done in enumerate(self.swap_elements(swaps)) if done]
+        first = True
+        while active:
+            # Пока продолжающих досок много, дешевле считать весь пакет, чем копировать их
+            boards = all_boards if len(active) >= self.count * GATHER_FRACTION else active
+            part = self._gather(boards)
+            mask = self._match_mask(int.from_bytes(part, 'little'), len(boards))
+            removed = {}
+            if mask:
+                part, removed = self._step(boards, part, mask)
+                self._store(boards, part)
+            matched = set()
+            for j, score in removed.items():
+                b = boards[j]
+                matched.add(b)
+                scores[b] += score
+                depths[b] += 1
+            stable = [b for b in active if b not in matched]
+            if stable and first: # Бесполезные обмены откатываются
+                rollback = [None] * self.count
+                for b in stable:
+                    rollback[b] = swaps[b]
+                self.swap_elements(rollback)
+            elif stable and self.auto_reshuffle: # Каскад закончился - проверяем тупик
+                for b, has_moves in zip(stable, self.has_legal_moves(stable)):
+                    if not has_moves:
+                        self._reshuffle(b)
+            active = [b for b in active if b in matched]
+            first = False
+        return BatchResult(scores, depths)
@@ -0,0 +1,61 @@
+"""
+Сравнение бэкендов доски: GameBoard (список списков) и ArrayGameBoard (буфер).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_backends
+"""
+import random
+import timeit
+
+from array_board import ArrayGameBoard
+from game_board import GameBoard
+
+SIZES = [(6, 6), (10, 10), (256, 256)]
+NUM_TYPES = 5
+
+
+def _make_pair(rows, cols, seed):
+    """Создаёт две доски с одинаковым содержимым для честного сравнения."""
+    random.seed(seed)
+    reference = GameBoard(rows, cols, NUM_TYPES)
+    array_board = ArrayGameBoard(rows, cols, NUM_TYPES)
+    array_board.board = reference.board
+    return reference, array_board
+
+
+def _cascade_step(board):
+    """Один шаг каскада: поиск, удаление и падение элементов."""
+    matches = board.find_matches()
+    board.remove_matches(matches)
+    board.drop_elements()
+
+
+def bench(rows, cols, number):
+    reference, array_board = _make_pair(rows, cols, seed=rows * cols)
+    # Вносим совпадения, чтобы remove/drop выполняли реальную работу
+    for board in (reference, array_board):
+        for r in range(0, rows, 3):
+            board.board[r][0] = board.board[r][1] = board.board[r][2] = 1
+
+    results = {}
+    for name, board in (("list", reference), ("array", array_board)):
+        find_time = timeit.timeit(board.find_matches, number=number) / number
+        random.seed(0)
+        step_time = timeit.timeit(lambda: _cascade_step(board), number=number) / number
+        results[name] = (find_time, step_time)
+    return results
+
+
+def main():
+    print(f"{'size':>9} {'backend':>8} {'find_matches, us':>18} {'cascade step, us':>18}")
+    for rows, cols in SIZES:
+        number = max(3, 200000 // (rows * cols))
+        results = bench(rows, cols, number)
+        for name, (find_time, step_time) in results.items():
+            print(f"{rows:>4}x{cols:<4} {name:>8} {find_time * 1e6:>18.1f} {step_time * 1e6:>18.1f}")
+        speedup = results["list"][0] / results["array"][0]
+        print(f"{'':>9} {'speedup':>8} {speedup:>17.1f}x")
+
+
+if __name__ == "__main__":
+    main()
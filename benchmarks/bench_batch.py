@@ -0,0 +1,84 @@
+"""
+Пропускная способность пакетного движка: BatchGameBoard против досок по одной.
+
+Каждая из BOARDS досок доигрывает партию из difficulty_for(size) ходов случайными
+результативными обменами (без специальных элементов - их пакетный движок не моделирует).
+Пакет выбирает ходы всех досок одним legal_moves() и разрешает их одним resolve_moves();
+для сравнения те же партии (те же seed и ходы) играются на ArrayGameBoard и GameBoard
+по одной доске. Печатаются доски-ходы в секунду отдельно для resolve и с выбором хода,
+и число партий в секунду.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_batch
+"""
+import random
+import time
+
+from array_board import ArrayGameBoard
+from batch_board import BatchGameBoard
+from game_board import GameBoard, difficulty_for
+
+SIZES = [6, 8, 10]
+BATCHES = [100, 1000, 5000]
+SINGLE_BOARDS = 500 # Сколько досок играть по одной (время пересчитывается на доску)
+NUM_TYPES = 5
+
+
+def play_batch(count, size, seed):
+    """Играет count партий пакетом. Возвращает (время resolve, общее время, доски-ходы)."""
+    moves, _ = difficulty_for(size)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    batch = BatchGameBoard(count, size, size, NUM_TYPES, auto_reshuffle=True,
+                           seeds=[rng.getrandbits(64) for _ in range(count)])
+    resolve = 0.0
+    board_moves = 0
+    for _ in range(moves):
+        swaps = [rng.choice(legal) if legal else None for legal in batch.legal_moves()]
+        started = time.perf_counter()
+        batch.resolve_moves(swaps)
+        resolve += time.perf_counter() - started
+        board_moves += sum(swap is not None for swap in swaps)
+    return resolve, time.perf_counter() - start, board_moves
+
+
+def play_single(board_class, count, size, seed):
+    """Те же партии по одной доске. Возвращает (время resolve, общее время, доски-ходы)."""
+    moves, _ = difficulty_for(size)
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(count)]
+    resolve = 0.0
+    board_moves = 0
+    start = time.perf_counter()
+    for board_seed in seeds:
+        board = board_class(size, size, NUM_TYPES, auto_reshuffle=True, special_tiles=False,
+                            seed=board_seed)
+        for _ in range(moves):
+            legal = board.legal_moves()
+            if not legal:
+                break
+            move = rng.choice(legal)
+            started = time.perf_counter()
+            board.resolve_move(*move)
+            resolve += time.perf_counter() - started
+            board_moves += 1
+    return resolve, time.perf_counter() - start, board_moves
+
+
+def report(size, name, count, resolve, total, board_moves):
+    print(f"{size:>5} {name:>12} {count:>7} {board_moves / resolve:>16.0f} "
+          f"{board_moves / total:>18.0f} {count / total:>10.0f}")
+
+
+def main():
+    print(f"{'size':>5} {'engine':>12} {'boards':>7} {'resolve, moves/s':>16} "
+          f"{'with choice, moves/s':>18} {'games/s':>10}")
+    for size in SIZES:
+        for name, board_class in (('GameBoard', GameBoard), ('array', ArrayGameBoard)):
+            report(size, name, SINGLE_BOARDS, *play_single(board_class, SINGLE_BOARDS, size, size))
+        for count in BATCHES:
+            report(size, 'batch', count, *play_batch(count, size, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Битовые маски по типам (BitboardGameBoard) против списка списков (GameBoard)
+и буфера (ArrayGameBoard): find_matches и перечисление ходов legal_moves.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_bitboard
+"""
+import random
+import timeit
+
+from array_board import ArrayGameBoard
+from bitboard_board import BitboardGameBoard
+from game_board import GameBoard
+
+SIZES = [(8, 8), (10, 10)]
+BACKENDS = [GameBoard, ArrayGameBoard, BitboardGameBoard]
+NUM_TYPES = 5
+NUMBER = 5000
+
+
+def main():
+    print(f"{'size':>9} {'backend':>17} {'find_matches, us':>17} {'legal_moves, us':>16}")
+    for rows, cols in SIZES:
+        random.seed(rows * cols)
+        grid = GameBoard(rows, cols, NUM_TYPES).to_list()
+        # Несколько готовых серий, чтобы find_matches находил совпадения
+        for r in range(0, rows, 3):
+            grid[r][0] = grid[r][1] = grid[r][2] = 1
+
+        timings = {}
+        for cls in BACKENDS:
+            board = cls(rows, cols, NUM_TYPES)
+            board.board = grid
+            timings[cls] = (timeit.timeit(board.find_matches, number=NUMBER) / NUMBER,
+                            timeit.timeit(board.legal_moves, number=NUMBER) / NUMBER)
+            print(f"{rows:>4}x{cols:<4} {cls.__name__:>17} {timings[cls][0] * 1e6:>17.1f} "
+                  f"{timings[cls][1] * 1e6:>16.1f}")
+        find_speedup = timings[GameBoard][0] / timings[BitboardGameBoard][0]
+        moves_speedup = timings[GameBoard][1] / timings[BitboardGameBoard][1]
+        print(f"{'':>9} {'speedup vs list':>17} {find_speedup:>16.1f}x {moves_speedup:>15.1f}x")
+
+
+if __name__ == "__main__":
+    main()
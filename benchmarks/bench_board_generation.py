@@ -0,0 +1,67 @@
+"""
+Скорость создания начального поля: generate_board (выбор только из допустимых значений)
+против прежней генерации с повторными попытками. Для прежнего способа также
+показана доля полей без единого хода.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_board_generation
+"""
+import random
+import time
+
+from game_board import GameBoard, generate_board
+
+SIZES = [(4, 4), (6, 6), (8, 8), (10, 10), (50, 50)]
+TYPE_COUNTS = [3, 5]
+SECONDS_PER_RUN = 0.5
+
+
+def rejection_sampling_board(rows, cols, num_types, rng):
+    """Прежний GameBoard._create_initial_board: случайное значение, повтор при серии."""
+    board = []
+    for r in range(rows):
+        row = []
+        for c in range(cols):
+            while True:
+                element = rng.randint(1, num_types)
+                if (c >= 2 and row[c-1] == element and row[c-2] == element) or \
+                   (r >= 2 and len(board) > r-2 and board[r-1][c] == element and board[r-2][c] == element):
+                    continue
+                else:
+                    row.append(element)
+                    break
+        board.append(row)
+    return board
+
+
+def boards_per_second(generator, rows, cols, num_types):
+    """Сколько полей в секунду создаёт generator и сколько из них без ходов."""
+    rng = random.Random(rows * cols + num_types)
+    probe = GameBoard(rows, cols, num_types, seed=0)
+    count = without_moves = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < SECONDS_PER_RUN:
+        probe.board = generator(rows, cols, num_types, rng)
+        if not probe.has_legal_moves():
+            without_moves += 1
+        count += 1
+    # Проверка ходов не входит в измерение: отдельно замеряем только генерацию
+    started = time.perf_counter()
+    for _ in range(count):
+        generator(rows, cols, num_types, rng)
+    return count / (time.perf_counter() - started), without_moves / count
+
+
+def main():
+    print(f"{'size':>9} {'types':>5} {'rejection, boards/s':>20} {'no move':>8} "
+          f"{'generate_board, boards/s':>25} {'no move':>8} {'speedup':>8}")
+    for rows, cols in SIZES:
+        for num_types in TYPE_COUNTS:
+            old_rate, old_stuck = boards_per_second(rejection_sampling_board, rows, cols, num_types)
+            new_rate, new_stuck = boards_per_second(generate_board, rows, cols, num_types)
+            print(f"{rows:>4}x{cols:<4} {num_types:>5} {old_rate:>20.0f} {old_stuck:>8.2%} "
+                  f"{new_rate:>25.0f} {new_stuck:>8.2%} {new_rate / old_rate:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
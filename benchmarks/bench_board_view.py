@@ -0,0 +1,101 @@
+"""
+Время кадра при перерисовке доски: полное пересоздание кнопок, пул виджетов
+и отрисовка инструкциями canvas (CanvasBoardWidget).
+На больших полях (больше WIDGET_MODES_MAX_SIZE) меряется только canvas: окно просмотра
+создаёт лишь видимые клетки, и каждые SCROLL_EVERY кадров оно прокручивается.
+
+Каждый кадр выполняет один шаг каскада на GameBoard и вызывает GameScreen._draw_board(),
+как это делает игра после каждого шага. Требует Kivy и окна.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_board_view
+"""
+import random
+import statistics
+import time
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.uix.screenmanager import ScreenManager
+
+from game_board import GameBoard
+from game_screen import GameScreen
+
+SIZES = [6, 10, 50, 200, 1000]
+MODES = ['rebuild', 'pool', 'canvas']
+WIDGET_MODES_MAX_SIZE = 50 # Кнопка на клетку для полей больше этого не создаётся
+SCROLL_EVERY = 10
+WARMUP_FRAMES = 10
+MEASURED_FRAMES = 200
+
+
+class BoardViewBenchmarkApp(App):
+    def build(self):
+        Builder.load_file('game_screen.kv')
+        self.manager = ScreenManager()
+        self.screen = GameScreen(name='game')
+        self.manager.add_widget(self.screen)
+        self.runs = [(size, mode) for size in SIZES for mode in MODES
+                     if size <= WIDGET_MODES_MAX_SIZE or mode == 'canvas']
+        self.results = []
+        Clock.schedule_once(self._start_next_run, 0.5)
+        return self.manager
+
+    def _start_next_run(self, dt):
+        if not self.runs:
+            self._report()
+            self.stop()
+            return
+        self.size, self.mode = self.runs.pop(0)
+        random.seed(self.size)
+        self.screen.rows = self.screen.cols = self.size
+        self.screen.use_widget_pool = self.mode == 'pool'
+        self.screen.board_renderer = 'canvas' if self.mode == 'canvas' else 'widgets'
+        self.screen.game_board = GameBoard(self.size, self.size, 5, seed=self.size)
+        self.screen._cell_widgets = None
+        self.screen._canvas_view = None
+        self.screen._draw_board()
+        self.frame = 0
+        self.frame_times = []
+        self.draw_times = []
+        self.last_frame = time.perf_counter()
+        Clock.schedule_interval(self._on_frame, 0)
+
+    def _on_frame(self, dt):
+        now = time.perf_counter()
+        if self.frame >= WARMUP_FRAMES:
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+
+        # Один шаг каскада: убираем несколько клеток и роняем элементы
+        board = self.screen.game_board
+        removed = {(random.randrange(self.size), random.randrange(self.size)) for _ in range(self.size)}
+        board.remove_matches(list(removed))
+        board.drop_elements()
+        view = self.screen._canvas_view
+        if view is not None and self.frame % SCROLL_EVERY == 0:
+            view.scroll_by(view.width / 3, view.height / 5) # Прокрутка тоже перерисовывает окно
+
+        started = time.perf_counter()
+        self.screen._draw_board()
+        if self.frame >= WARMUP_FRAMES:
+            self.draw_times.append(time.perf_counter() - started)
+
+        self.frame += 1
+        if self.frame >= WARMUP_FRAMES + MEASURED_FRAMES:
+            self.results.append((self.size, self.mode, self.frame_times, self.draw_times))
+            Clock.schedule_once(self._start_next_run, 0.2)
+            return False
+        return True
+
+    def _report(self):
+        print(f"{'size':>7} {'mode':>8} {'frame mean, ms':>15} {'frame p95, ms':>14} {'_draw_board, ms':>16}")
+        for size, mode, frame_times, draw_times in self.results:
+            p95 = sorted(frame_times)[int(len(frame_times) * 0.95) - 1]
+            print(f"{size:>3}x{size:<3} {mode:>8} {statistics.mean(frame_times) * 1e3:>15.2f} "
+                  f"{p95 * 1e3:>14.2f} {statistics.mean(draw_times) * 1e3:>16.2f}")
+
+
+if __name__ == "__main__":
+    BoardViewBenchmarkApp().run()
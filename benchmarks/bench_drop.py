@@ -0,0 +1,62 @@
+"""
+Скорость падения элементов: уплотнение столбцов целиком с очередью появления
+(drop_elements) против прежнего поэлементного сдвига с random.randint на каждую клетку.
+
+Перед каждым падением удаляется ~10% случайных клеток, как в длинных каскадах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_drop
+"""
+import random
+import time
+
+from array_board import ArrayGameBoard
+from bitboard_board import BitboardGameBoard
+from game_board import GameBoard
+
+SIZES = [(10, 10), (50, 50), (256, 256)]
+NUM_TYPES = 5
+STEPS = 200_000 # Общее число клеток доски, обрабатываемое в замере одного бэкенда
+
+
+def per_cell_drop(board):
+    """Прежний GameBoard.drop_elements: сдвиг по одной клетке и randint на каждую новую."""
+    for c in range(board.cols):
+        write_row = board.rows - 1
+        for read_row in range(board.rows - 1, -1, -1):
+            if board.board[read_row][c] != 0:
+                board.board[write_row][c] = board.board[read_row][c]
+                if write_row != read_row:
+                    board.board[read_row][c] = 0
+                write_row -= 1
+        for r in range(write_row + 1):
+            board.board[r][c] = board.rng.randint(1, board.num_types)
+
+
+def time_drops(board, drop, holes):
+    """Среднее время падения по заранее выбранным наборам удаляемых клеток."""
+    elapsed = 0.0
+    for removed in holes:
+        board.remove_matches(removed)
+        started = time.perf_counter()
+        drop(board)
+        elapsed += time.perf_counter() - started
+    return elapsed / len(holes)
+
+
+def main():
+    print(f"{'size':>9} {'variant':>24} {'drop, us':>12} {'speedup':>8}")
+    for rows, cols in SIZES:
+        rng = random.Random(rows)
+        repeats = max(5, STEPS // (rows * cols))
+        holes = [[(rng.randrange(rows), rng.randrange(cols)) for _ in range(rows * cols // 10)]
+                 for _ in range(repeats)]
+        baseline = time_drops(GameBoard(rows, cols, NUM_TYPES, seed=0), per_cell_drop, holes)
+        print(f"{rows:>4}x{cols:<4} {'list, per-cell':>24} {baseline * 1e6:>12.1f} {1:>7.1f}x")
+        for cls in (GameBoard, ArrayGameBoard, BitboardGameBoard):
+            result = time_drops(cls(rows, cols, NUM_TYPES, seed=0), cls.drop_elements, holes)
+            print(f"{'':>9} {cls.__name__ + ', columns':>24} {result * 1e6:>12.1f} {baseline / result:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Сравнение полного и инкрементального find_matches на длинных каскадах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_incremental
+"""
+import random
+import time
+
+from game_board import GameBoard
+
+SIZES = [(10, 10), (64, 64), (200, 200)]
+NUM_TYPES = 5
+MOVES = 30
+
+
+def play(board, seed):
+    """
+    Делает MOVES обменов, разрешая каскады до конца, как GameScreen.
+    Возвращает суммарное время find_matches и число его вызовов.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    spent = 0.0
+    calls = 0
+
+    def timed_find():
+        nonlocal spent, calls
+        start = time.perf_counter()
+        result = board.find_matches()
+        spent += time.perf_counter() - start
+        calls += 1
+        return result
+
+    timed_find() # Первый поиск всегда полный: вся доска "грязная"
+    for _ in range(MOVES):
+        r = rng.randrange(board.rows - 1)
+        c = rng.randrange(board.cols - 1)
+        r2, c2 = (r + 1, c) if rng.random() < 0.5 else (r, c + 1)
+        board.swap_elements(r, c, r2, c2)
+        matches = timed_find()
+        if not matches:
+            board.swap_elements(r, c, r2, c2) # Откат, как в on_element_press
+            continue
+        while matches:
+            board.remove_matches(matches)
+            board.drop_elements()
+            matches = timed_find()
+    return spent, calls
+
+
+def main():
+    print(f"{'size':>9} {'mode':>12} {'calls':>6} {'find_matches total, ms':>24}")
+    for rows, cols in SIZES:
+        for incremental in (False, True):
+            random.seed(rows)
+            board = GameBoard(rows, cols, NUM_TYPES, incremental=incremental)
+            spent, calls = play(board, seed=rows * cols)
+            mode = "incremental" if incremental else "full"
+            print(f"{rows:>4}x{cols:<4} {mode:>12} {calls:>6} {spent * 1e3:>24.2f}")
+
+
+if __name__ == "__main__":
+    main()
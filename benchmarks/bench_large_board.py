@@ -0,0 +1,81 @@
+"""
+Большие поля (100x100 и больше): генерация доски и разрешение ходов на всех бэкендах.
+
+Для каждого размера и бэкенда замеряется создание доски и среднее время resolve_move
+на результативный ход в четырёх режимах: полный поиск совпадений после каждого шага
+(incremental=False), инкрементальный поиск, инкрементальный с копиями досок
+по шагам (with_boards=True - так ходы разрешает GameScreen для анимации маленьких полей)
+и с копиями только окна просмотра (with_boards=окно - так для больших полей).
+Ходы выбираются случайными обменами соседей, как в bench_incremental.
+
+На высоких полях каскад почти не затухает: падение сдвигает сотни клеток над
+совпадением, и новые серии возникают быстрее, чем исчезают. Один ход на поле 1000x1000
+может убрать больше клеток, чем есть на поле, поэтому рядом со временем печатается
+число удалённых клеток на ход, а число ходов для больших полей меньше.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_large_board
+"""
+import random
+import time
+
+from simulator import BACKENDS
+
+# (строки, столбцы, результативных ходов на замер)
+SIZES = [(100, 100, 20), (300, 300, 10), (250, 1000, 5), (1000, 1000, 2)]
+NUM_TYPES = 5
+FULL_SCAN_MAX_CELLS = 100000 # Полный поиск на больших полях слишком долог для бенчмарка
+WINDOW = (0, 29, 0, 29) # Окно просмотра 30x30 клеток
+MODES = [
+    ('full', dict(incremental=False), False),
+    ('incremental', dict(incremental=True), False),
+    ('incr+boards', dict(incremental=True), True),
+    ('incr+window', dict(incremental=True), WINDOW),
+]
+
+
+def play(board, seed, moves, with_boards):
+    """
+    Делает случайные обмены, пока moves из них не дадут совпадение.
+    Возвращает (суммарное время resolve_move, число вызовов, удалено клеток).
+    """
+    rng = random.Random(seed)
+    board.find_matches() # Первый поиск всегда полный: вся доска "грязная"
+    spent = 0.0
+    calls = 0
+    effective = 0
+    removed = 0
+    while effective < moves:
+        r = rng.randrange(board.rows - 1)
+        c = rng.randrange(board.cols - 1)
+        r2, c2 = (r + 1, c) if rng.random() < 0.5 else (r, c + 1)
+        start = time.perf_counter()
+        result = board.resolve_move(r, c, r2, c2, with_boards=with_boards)
+        spent += time.perf_counter() - start
+        calls += 1
+        effective += bool(result.depth)
+        removed += result.score
+    return spent, calls, removed
+
+
+def main():
+    print(f"{'size':>11} {'backend':>9} {'create, ms':>11} {'mode':>12} "
+          f"{'calls':>6} {'removed/move':>13} {'per move, ms':>13} {'us/removed':>11}")
+    for rows, cols, moves in SIZES:
+        for name, board_class in BACKENDS.items():
+            start = time.perf_counter()
+            board_class(rows, cols, NUM_TYPES, seed=rows * cols)
+            created = time.perf_counter() - start
+            for mode, kwargs, with_boards in MODES:
+                if not kwargs['incremental'] and rows * cols > FULL_SCAN_MAX_CELLS:
+                    continue
+                board = board_class(rows, cols, NUM_TYPES, auto_reshuffle=True,
+                                    seed=rows * cols, **kwargs)
+                spent, calls, removed = play(board, rows + cols, moves, with_boards)
+                print(f"{rows:>5}x{cols:<5} {name:>9} {created * 1e3:>11.1f} {mode:>12} "
+                      f"{calls:>6} {removed / moves:>13.0f} {spent / moves * 1e3:>13.2f} "
+                      f"{spent / removed * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Скорость перечисления ходов: GameBoard.legal_moves() против
+перебора "обмен - find_matches - откат".
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_legal_moves
+"""
+import random
+import timeit
+
+from array_board import ArrayGameBoard
+from game_board import GameBoard
+
+SIZES = [(6, 6), (8, 8), (10, 10)]
+NUM_TYPES = 5
+
+
+def swap_scan_unswap(board):
+    """Прежний способ проверки: сделать обмен, поискать совпадения и откатить."""
+    moves = []
+    for r in range(board.rows):
+        for c in range(board.cols):
+            for r2, c2 in ((r, c + 1), (r + 1, c)):
+                if board.swap_elements(r, c, r2, c2):
+                    if board.find_matches():
+                        moves.append((r, c, r2, c2))
+                    board.swap_elements(r, c, r2, c2)
+    return moves
+
+
+def main():
+    print(f"{'size':>9} {'backend':>15} {'legal_moves, us':>16} {'has_legal_moves, us':>20} {'swap-scan, us':>14}")
+    for rows, cols in SIZES:
+        for cls in (GameBoard, ArrayGameBoard):
+            random.seed(rows)
+            board = cls(rows, cols, NUM_TYPES)
+            assert board.legal_moves() == swap_scan_unswap(board)
+            number = 2000
+            fast = timeit.timeit(board.legal_moves, number=number) / number
+            any_move = timeit.timeit(board.has_legal_moves, number=number) / number
+            slow = timeit.timeit(lambda: swap_scan_unswap(board), number=number // 20) / (number // 20)
+            print(f"{rows:>4}x{cols:<4} {cls.__name__:>15} {fast * 1e6:>16.1f} {any_move * 1e6:>20.1f} {slow * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Время, которое сохранение отнимает у потока UI: синхронная запись против PersistenceWorker.
+
+Имитируется партия: после каждого хода автосохранение журнала (write_atomic с fsync),
+в конце - рекорд в HighscoreStore и чтение топа. Синхронный режим делает всё
+в вызывающем потоке, как раньше экран рекордов; фоновый только ставит задачи
+в очередь (автосохранения схлопываются). Печатается время вызывающего потока
+на ход (среднее и худшее) и сколько записей автосохранения реально дошло до диска.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_persistence
+"""
+import os
+import random
+import tempfile
+import time
+from functools import partial
+
+from game_board import GameBoard
+from highscores import HighscoreStore
+from persistence import PersistenceWorker, write_atomic
+from replay import MoveLog
+
+GAMES = 20
+MOVES = 30
+SIZE = 8
+NUM_TYPES = 5
+
+
+def play(directory, worker):
+    """
+    Играет GAMES партий со случайными ходами. Возвращает (время вызывающего потока
+    по ходам, число записей автосохранения).
+    """
+    rng = random.Random(0)
+    path = os.path.join(directory, 'autosave.m3l')
+    store = HighscoreStore(os.path.join(directory, 'highscores.jsonl'))
+    writes = 0
+    timings = []
+
+    def autosave(data):
+        nonlocal writes
+        writes += 1
+        write_atomic(path, data)
+
+    for game in range(GAMES):
+        board = GameBoard(SIZE, SIZE, NUM_TYPES, incremental=True, auto_reshuffle=True, seed=game)
+        log = MoveLog.for_board(board)
+        for _ in range(MOVES):
+            move = rng.choice(board.legal_moves())
+            log.score += board.resolve_move(*move).score
+            log.record(*move)
+            start = time.perf_counter()
+            if worker is None:
+                autosave(log.to_bytes())
+            else:
+                worker.submit(partial(autosave, log.to_bytes()), key='autosave')
+            timings.append(time.perf_counter() - start)
+
+        entry = {'name': f'player{game}', 'score': log.score, 'difficulty': f'{SIZE}x{SIZE}'}
+        start = time.perf_counter()
+        if worker is None:
+            store.add(entry)
+            store.refresh()
+            store.top(10)
+        else:
+            worker.submit(partial(store.add, entry))
+            worker.submit(lambda: (store.refresh(), store.top(10)), key='highscores_load')
+        timings[-1] += time.perf_counter() - start
+    if worker is not None:
+        worker.close()
+    return timings, writes
+
+
+def main():
+    print(f"{'mode':>11} {'mean/move, us':>14} {'max/move, ms':>13} {'autosaves written':>18}")
+    for mode in ('sync', 'background'):
+        with tempfile.TemporaryDirectory() as directory:
+            worker = PersistenceWorker() if mode == 'background' else None
+            timings, writes = play(directory, worker)
+        print(f"{mode:>11} {sum(timings) / len(timings) * 1e6:>14.1f} "
+              f"{max(timings) * 1e3:>13.2f} {writes:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Набор микро-бенчмарков горячих путей доски с сохранёнными базовыми значениями:
+замедление больше допуска завершает прогон с кодом 1.
+
+Каждый случай - одна операция (поиск совпадений, поиск ходов, шаг каскада, ход целиком,
+создание доски, пакетный ход), которая повторяется, пока замер не займёт MIN_TIME секунд;
+берётся лучший из REPEATS замеров. Чтобы базовые значения переносились между машинами,
+операции в секунду делятся на скорость калибровочного цикла на чистом Python
+(score = ops/s / calibration ops/s). Базовые значения лежат в benchmarks/baselines.json
+и обновляются флагом --save (медиана SAVE_PASSES замеров) после намеренных
+изменений производительности. Прогон завершается с кодом 1 и тогда, когда набор
+базовых значений не совпадает с набором случаев.
+
+Те же проверки запускаются из pytest (tests/test_performance.py): по умолчанию -
+соответствие базовых значений случаям и пара быстрых случаев с широким допуском,
+все случаи - при MATCH3_PERF_TESTS=1.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_regression
+    python -m benchmarks.bench_regression --only array --tolerance 0.2
+    python -m benchmarks.bench_regression --save
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from batch_board import BatchGameBoard
+from simulator import BACKENDS
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+TOLERANCE = 0.3 # Допустимое замедление относительно базового значения
+MIN_TIME = 0.1 # Секунд на один замер
+REPEATS = 5
+RETRIES = 2 # Сколько раз перепроверять случай, показавший замедление
+SAVE_PASSES = 3 # Базовое значение - медиана стольких замеров
+NUM_TYPES = 5
+
+
+def _calibration():
+    """Калибровочная операция: смесь арифметики, индексации списков и словаря."""
+    values = list(range(200))
+    counts = {}
+    total = 0
+    for value in values:
+        total += values[value * 7 % 200] * value
+        counts[value % 16] = counts.get(value % 16, 0) + 1
+    return total
+
+
+def _find_matches(board_class):
+    board = board_class(30, 30, NUM_TYPES, seed=1)
+    for r in range(0, 30, 3): # Серии в каждой третьей строке, чтобы поиску было что найти
+        board.board[r][0] = board.board[r][1] = board.board[r][2] = 1
+    return board.find_matches
+
+
+def _legal_moves(board_class):
+    return board_class(30, 30, NUM_TYPES, seed=2).legal_moves
+
+
+def _cascade_step(board_class):
+    board = board_class(30, 30, NUM_TYPES, incremental=True, seed=3)
+
+    def step():
+        for c in range(0, 30, 3): # Вертикальные тройки сверху: падение затрагивает 10 столбцов
+            board.board[0][c] = board.board[1][c] = board.board[2][c] = 1
+        board.remove_matches(board.find_matches())
+        board.drop_elements()
+    return step
+
+
+def _resolve_move(board_class):
+    rng = random.Random(4)
+    board = board_class(8, 8, NUM_TYPES, incremental=True, auto_reshuffle=True, seed=4)
+    return lambda: board.resolve_move(*rng.choice(board.legal_moves()))
+
+
+def _create_board(board_class):
+    def create():
+        # Работа генератора зависит от seed, поэтому операция - всегда одни и те же 16 досок
+        for seed in range(16):
+            board_class(8, 8, NUM_TYPES, seed=seed)
+    return create
+
+
+def _batch_resolve():
+    rng = random.Random(5)
+    batch = BatchGameBoard(256, 8, 8, NUM_TYPES, auto_reshuffle=True, seeds=range(256))
+
+    def move():
+        batch.resolve_moves([rng.choice(moves) if moves else None for moves in batch.legal_moves()])
+    return move
+
+
+def cases():
+    """Словарь {имя случая: функция, создающая операцию для замера}."""
+    result = {}
+    for name, board_class in BACKENDS.items():
+        result[f'find_matches/{name}/30x30'] = lambda board_class=board_class: _find_matches(board_class)
+        result[f'legal_moves/{name}/30x30'] = lambda board_class=board_class: _legal_moves(board_class)
+        result[f'cascade_step/{name}/30x30'] = lambda board_class=board_class: _cascade_step(board_class)
+        result[f'resolve_move/{name}/8x8'] = lambda board_class=board_class: _resolve_move(board_class)
+        result[f'create_board/{name}/16x8x8'] = lambda board_class=board_class: _create_board(board_class)
+    result['resolve_moves/batch/256x8x8'] = _batch_resolve
+    return result
+
+
+def ops_per_second(operation):
+    """Операций в секунду: лучший из REPEATS замеров не короче MIN_TIME."""
+    number = 1
+    while True: # Подбираем число повторов, чтобы замер длился не меньше MIN_TIME
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(MIN_TIME / elapsed) + 1))
+    best = elapsed
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def measure(name):
+    """
+    Нормированная скорость случая name (см. описание модуля). Калибровочный цикл
+    замеряется прямо перед случаем, чтобы оба замера попали в одно состояние машины.
+    """
+    operation = cases()[name]()
+    calibration = ops_per_second(_calibration)
+    return ops_per_second(operation) / calibration
+
+
+def is_regression(score, baseline, tolerance=TOLERANCE):
+    """True, если score медленнее baseline больше чем на tolerance."""
+    return score < baseline * (1 - tolerance)
+
+
+def check(name, baseline, tolerance=TOLERANCE, attempts=RETRIES + 1):
+    """
+    (score, регрессия ли) для случая name. Замедление перепроверяется до attempts раз
+    и засчитывается, только если повторилось во всех замерах (берётся лучший score):
+    единичные выбросы из-за фоновой нагрузки не валят прогон.
+    """
+    score = measure(name)
+    for _ in range(attempts - 1):
+        if baseline is None or not is_regression(score, baseline, tolerance):
+            break
+        score = max(score, measure(name))
+    return score, baseline is not None and is_regression(score, baseline, tolerance)
+
+
+def load_baselines(path=BASELINES_FILE):
+    """Сохранённые базовые значения {имя случая: score} (пустой словарь, если файла нет)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['cases']
+    except FileNotFoundError:
+        return {}
+
+
+def mismatched_baselines(baselines, names=None):
+    """
+    (лишние, недостающие) имена: базовые значения случаев, которых больше нет,
+    и случаи из names (по умолчанию все) без базового значения.
+    """
+    known = cases()
+    names = list(known) if names is None else names
+    return (sorted(name for name in baselines if name not in known),
+            [name for name in names if name not in baselines])
+
+
+def save_baselines(scores, path=BASELINES_FILE):
+    """Записывает базовые значения {имя случая: score}."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'tolerance': TOLERANCE, 'cases': dict(sorted(scores.items()))}, f, indent=2)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей доски с базовыми значениями")
+    parser.add_argument('--only', default='', help="запускать только случаи, в имени которых есть строка")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="допустимое замедление (доля, по умолчанию %(default)s)")
+    parser.add_argument('--save', action='store_true', help="сохранить результаты как базовые значения")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    names = [name for name in cases() if args.only in name]
+    unknown, missing = mismatched_baselines(baselines, names)
+    print(f"{'case':<32} {'score':>9} {'baseline':>9} {'change':>8}")
+    scores = {}
+    regressions = []
+    for name in names:
+        baseline = baselines.get(name)
+        if args.save:
+            score, regressed = statistics.median(measure(name) for _ in range(SAVE_PASSES)), False
+        else:
+            score, regressed = check(name, baseline, args.tolerance)
+        scores[name] = score
+        if baseline is None:
+            print(f"{name:<32} {score:>9.4f} {'-':>9} {'-':>8}")
+            continue
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<32} {score:>9.4f} {baseline:>9.4f} {score / baseline - 1:>8.1%}"
+              f"{'  РЕГРЕССИЯ' if regressed else ''}")
+
+    if args.save:
+        # Значения случаев, которых больше нет, не переносятся в новый файл
+        save_baselines({**{name: baselines[name] for name in baselines if name not in unknown}, **scores})
+        print(f"Базовые значения сохранены в {BASELINES_FILE}")
+        return 0
+    if unknown:
+        print(f"Базовые значения без случая: {', '.join(unknown)}")
+    if missing:
+        print(f"Случаи без базового значения: {', '.join(missing)}")
+    if unknown or missing:
+        print("Обновите базовые значения: python -m benchmarks.bench_regression --save")
+    if regressions:
+        print(f"Замедление больше {args.tolerance:.0%}: {', '.join(regressions)}")
+    return 1 if unknown or missing or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
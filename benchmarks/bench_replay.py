@@ -0,0 +1,51 @@
+"""
+Скорость проверки партий: replay() журналов ходов, записанных жадной стратегией.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_replay
+"""
+import random
+import time
+
+from array_board import ArrayGameBoard
+from bitboard_board import BitboardGameBoard
+from game_board import GameBoard, difficulty_for
+from policies import greedy_policy
+from replay import MoveLog, replay
+
+SIZES = [6, 8, 10]
+GAMES = 300
+NUM_TYPES = 5
+
+
+def record_game(size, rng):
+    """Играет партию жадной стратегией и возвращает её журнал ходов."""
+    moves, target_score = difficulty_for(size)
+    board = BitboardGameBoard(size, size, NUM_TYPES, auto_reshuffle=True, seed=rng.getrandbits(64))
+    log = MoveLog.for_board(board)
+    while len(log) < moves and log.score < target_score:
+        move = greedy_policy(board, rng)
+        if move is None:
+            break
+        log.score += board.resolve_move(*move).score
+        log.record(*move)
+    return MoveLog.from_bytes(log.to_bytes())
+
+
+def main():
+    print(f"{'size':>7} {'backend':>17} {'bytes/log':>10} {'games/s':>9} {'games/min':>10}")
+    for size in SIZES:
+        rng = random.Random(size)
+        logs = [record_game(size, rng) for _ in range(GAMES)]
+        log_size = sum(len(log.to_bytes()) for log in logs) / len(logs)
+        for cls in (GameBoard, ArrayGameBoard, BitboardGameBoard):
+            started = time.perf_counter()
+            results = [replay(log, board_class=cls) for log in logs]
+            elapsed = time.perf_counter() - started
+            assert all(result.valid for result in results)
+            print(f"{size:>3}x{size:<3} {cls.__name__:>17} {log_size:>10.0f} "
+                  f"{GAMES / elapsed:>9.0f} {GAMES / elapsed * 60:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Нагрузочный стенд game_service: тысячи одновременных партий на одном сервере.
+
+Сервер запускается в отдельном процессе на localhost (чтобы клиенты не делили
+с ним GIL). Стенд открывает SESSIONS партий, заранее доигрывает каждую у себя
+на доске с тем же seed (случайными результативными ходами), а затем CLIENTS потоков
+по постоянным HTTP-соединениям присылают ходы всех партий вперемешку пачками
+по MOVES_PER_REQUEST. Прогон повторяется для двух размеров кэша досок сервера:
+все партии помещаются в кэш и кэш вчетверо меньше - тогда при обходе партий по кругу
+почти каждая пачка восстанавливает доску по журналу (board_rebuilds).
+В конце те же партии целиком проверяются через /validate пачками по VALIDATE_BATCH.
+
+Печатаются пропускная способность, задержки запросов (p50/p95) и память сервера
+(VmRSS, только Linux) до и после открытия партий.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_service
+"""
+import base64
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+from array_board import ArrayGameBoard
+from game_service import GameService, make_server
+from replay import MoveLog
+
+SESSIONS = 2000
+SIZE = 8
+CLIENTS = 8
+MOVES_PER_REQUEST = 5
+BOARD_CACHES = [SESSIONS, SESSIONS // 4]
+VALIDATE_BATCH = 250
+
+
+def serve(port_queue, scores_path, board_cache_size):
+    """Процесс сервера: сообщает свой порт и обслуживает запросы до завершения процесса."""
+    service = GameService(scores_path, board_cache_size=board_cache_size)
+    server = make_server(service)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def request(conn, method, path, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {'Content-Type': 'application/json'} if data is not None else {}
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path}: {response.status} {payload}")
+    return payload
+
+
+def rss_kb(pid):
+    """Резидентная память процесса в КБ (Linux) или None."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def play_locally(session, rng):
+    """Доигрывает партию на своей доске с seed сервера. Возвращает (ходы, счёт)."""
+    board = ArrayGameBoard(session['rows'], session['cols'], session['num_types'],
+                           incremental=True, auto_reshuffle=True, seed=session['seed'])
+    moves = []
+    score = 0
+    while len(moves) < session['moves_limit'] and score < session['target_score']:
+        legal = board.legal_moves()
+        if not legal:
+            break
+        move = rng.choice(legal)
+        score += board.resolve_move(*move).score
+        moves.append(move)
+    return moves, score
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    for board_cache_size in BOARD_CACHES:
+        print(f"--- Кэш досок сервера: {board_cache_size}")
+        port_queue = multiprocessing.Queue()
+        with tempfile.TemporaryDirectory() as directory:
+            server = multiprocessing.Process(
+                target=serve, args=(port_queue, os.path.join(directory, 'scores.jsonl'),
+                                    board_cache_size),
+                daemon=True)
+            server.start()
+            port = port_queue.get(timeout=30)
+            try:
+                run(port, server.pid)
+            finally:
+                server.terminate()
+                server.join()
+
+
+def run(port, server_pid):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    rss_before = rss_kb(server_pid)
+
+    start = time.perf_counter()
+    sessions = [request(conn, 'POST', '/sessions', {'rows': SIZE, 'cols': SIZE, 'name': f'bot{i}'})
+                for i in range(SESSIONS)]
+    created = time.perf_counter() - start
+    rss_open = rss_kb(server_pid)
+    print(f"Открыто партий: {SESSIONS} за {created:.2f} с ({SESSIONS / created:.0f}/с)")
+
+    rng = random.Random(0)
+    games = [play_locally(session, rng) for session in sessions]
+    total_moves = sum(len(moves) for moves, _ in games)
+
+    latencies = []
+    errors = []
+    accepted = [0] * CLIENTS
+
+    def client(index):
+        client_conn = http.client.HTTPConnection('127.0.0.1', port)
+        own = list(range(index, SESSIONS, CLIENTS))
+        offsets = dict.fromkeys(own, 0)
+        while offsets: # По кругу по своим партиям: все партии остаются открытыми одновременно
+            for i in list(offsets):
+                moves = games[i][0]
+                batch = moves[offsets[i]:offsets[i] + MOVES_PER_REQUEST]
+                started = time.perf_counter()
+                reply = request(client_conn, 'POST', f"/sessions/{sessions[i]['id']}/moves",
+                                {'moves': batch})
+                latencies.append(time.perf_counter() - started)
+                accepted[index] += reply['accepted']
+                if reply['error']:
+                    errors.append(reply['error'])
+                offsets[i] += MOVES_PER_REQUEST
+                if offsets[i] >= len(moves):
+                    del offsets[i]
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = request(conn, 'GET', '/stats')
+    print(f"Ходов: {total_moves}, принято: {sum(accepted)}, ошибок: {len(errors)}")
+    print(f"Пачки ходов: {len(latencies)} запросов за {elapsed:.2f} с, "
+          f"{total_moves / elapsed:.0f} ходов/с, {len(latencies) / elapsed:.0f} запросов/с, "
+          f"p50 {percentile(latencies, 0.5) * 1e3:.2f} мс, p95 {percentile(latencies, 0.95) * 1e3:.2f} мс")
+    print(f"Кэш досок: {stats['cached_boards']} из {stats['sessions']} партий, "
+          f"восстановлений по журналу: {stats['board_rebuilds']}")
+    if rss_before is not None and rss_open is not None:
+        print(f"Память сервера: {rss_before} КБ до партий, {rss_open} КБ после открытия "
+              f"({(rss_open - rss_before) * 1024 / SESSIONS:.0f} байт на партию)")
+
+    logs = []
+    for session, (moves, score) in zip(sessions, games):
+        log = MoveLog(session['rows'], session['cols'], session['num_types'], session['seed'], score=score)
+        for move in moves:
+            log.record(*move)
+        logs.append(base64.b64encode(log.to_bytes()).decode('ascii'))
+    start = time.perf_counter()
+    valid = 0
+    for first in range(0, len(logs), VALIDATE_BATCH):
+        results = request(conn, 'POST', '/validate', {'games': logs[first:first + VALIDATE_BATCH]})
+        valid += sum(result['valid'] for result in results['results'])
+    elapsed = time.perf_counter() - start
+    print(f"Пакетная проверка: {len(logs)} партий за {elapsed:.2f} с "
+          f"({len(logs) / elapsed:.0f} партий/с), корректных: {valid}")
+
+
+if __name__ == "__main__":
+    main()
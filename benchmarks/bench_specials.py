@@ -0,0 +1,63 @@
+"""
+Цена специальных элементов: resolve_move с разбором фигур (special_tiles=True)
+против прежних правил (special_tiles=False) на всех бэкендах.
+
+Каждый результативный ход выбирается случайно из legal_moves, партия идёт с одного
+seed в обоих режимах. Профайлер показывает, какую долю времени хода занимает фаза
+specials (find_runs, group_runs и пакетное применение эффектов), а рядом печатается
+число шагов каскада и созданных специальных элементов на ход.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_specials
+"""
+import random
+import time
+
+from profiler import Profiler
+from simulator import BACKENDS
+
+SIZES = [8, 10, 30, 100]
+NUM_TYPES = 5
+MOVES = 40
+
+
+def play(board, seed):
+    """
+    Делает MOVES случайных результативных ходов.
+    Возвращает (время resolve_move, шагов каскада, созданных элементов, профайлер).
+    """
+    rng = random.Random(seed)
+    profiler = Profiler(enabled=True)
+    spent = 0.0
+    steps = 0
+    created = 0
+    for _ in range(MOVES):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        before = len(board.specials)
+        start = time.perf_counter()
+        result = board.resolve_move(*rng.choice(moves), profiler=profiler)
+        spent += time.perf_counter() - start
+        steps += result.depth
+        created += max(0, len(board.specials) - before)
+    return spent, steps, created, profiler
+
+
+def main():
+    print(f"{'size':>5} {'backend':>9} {'specials':>9} {'per move, ms':>13} "
+          f"{'steps/move':>11} {'created/move':>13} {'specials phase, %':>18}")
+    for size in SIZES:
+        for name, board_class in BACKENDS.items():
+            for special_tiles in (False, True):
+                board = board_class(size, size, NUM_TYPES, incremental=True, auto_reshuffle=True,
+                                    special_tiles=special_tiles, seed=size)
+                spent, steps, created, profiler = play(board, size)
+                phases = profiler.summary()['phases']
+                share = phases.get('specials', {}).get('total_ms', 0.0) / (spent * 1e3) * 100
+                print(f"{size:>5} {name:>9} {str(special_tiles):>9} {spent / MOVES * 1e3:>13.2f} "
+                      f"{steps / MOVES:>11.1f} {created / MOVES:>13.2f} {share:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
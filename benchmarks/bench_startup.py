@@ -0,0 +1,78 @@
+"""
+Холодный старт приложения: от запуска процесса до первого кадра.
+
+Каждый прогон - новый процесс python main.py с MATCH3_STARTUP_PROBE=1: приложение
+печатает отметки "startup <этап> <time.time()>" после импорта модулей (imported),
+после App.build (built) и после вывода первого кадра (first_frame), затем закрывается.
+Время отсчитывается от момента перед запуском процесса. Сравниваются ленивые экраны
+(по умолчанию) и прежний запуск, когда build создаёт все экраны сразу
+(MATCH3_EAGER_SCREENS=1). Печатаются медианы по RUNS прогонам.
+
+Отдельно в новом процессе без окна измеряется импорт: только main
+и main вместе с модулями, которые теперь подгружаются при первом переходе на экраны.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 5
+TIMEOUT = 60.0 # Сколько ждать первого кадра, с
+STAGES = ['imported', 'built', 'first_frame']
+MODES = {'lazy': {}, 'eager': {'MATCH3_EAGER_SCREENS': '1'}}
+DEFERRED_MODULES = ['game_screen', 'advisor', 'canvas_board', 'highscores', 'replay',
+                    'kivy.uix.scrollview']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_once(extra_env):
+    """Один холодный старт. Возвращает {этап: секунды от запуска процесса}."""
+    env = dict(os.environ, MATCH3_STARTUP_PROBE='1', **extra_env)
+    started = time.time()
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        output, _ = process.communicate(timeout=TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise RuntimeError("приложение не вывело первый кадр за отведённое время")
+    marks = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == 'startup':
+            marks[parts[1]] = float(parts[2]) - started
+    missing = [stage for stage in STAGES if stage not in marks]
+    if missing:
+        raise RuntimeError(f"нет отметок запуска: {', '.join(missing)}")
+    return marks
+
+
+def import_time(modules):
+    """Время импорта модулей в новом процессе (без создания окна), с."""
+    code = ("import time; start = time.perf_counter(); "
+            f"import {', '.join(modules)}; print(time.perf_counter() - start)")
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT,
+                                     stderr=subprocess.DEVNULL, text=True)
+    return float(output.split()[-1])
+
+
+def main():
+    print(f"{'mode':>6} " + " ".join(f"{stage + ', ms':>16}" for stage in STAGES))
+    for mode, extra_env in MODES.items():
+        runs = [start_once(extra_env) for _ in range(RUNS)]
+        medians = [statistics.median(run[stage] for run in runs) for stage in STAGES]
+        print(f"{mode:>6} " + " ".join(f"{value * 1e3:>16.1f}" for value in medians))
+
+    startup = statistics.median(import_time(['main']) for _ in range(RUNS))
+    everything = statistics.median(import_time(['main'] + DEFERRED_MODULES) for _ in range(RUNS))
+    print(f"Импорт main: {startup * 1e3:.1f} мс, вместе с отложенными модулями: "
+          f"{everything * 1e3:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
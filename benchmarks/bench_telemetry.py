@@ -0,0 +1,95 @@
+"""
+Телеметрия на больших журналах: запись с ротацией и потоковая агрегация.
+
+Генерируются синтетические партии на нескольких сложностях (события start/move/end
+в формате telemetry.py), пишутся через TelemetryLog с ротацией и затем читаются
+read_events + aggregate. Для нескольких объёмов печатаются скорость записи и агрегации
+и пиковая память агрегатора (tracemalloc, отдельным проходом): она не должна расти
+вместе с числом событий.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_telemetry
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from game_board import difficulty_for
+from telemetry import TelemetryLog, aggregate, format_report, read_events
+
+EVENT_COUNTS = [100000, 1000000]
+SIZES = [6, 8, 10, 30]
+MAX_BYTES = 8 << 20
+BACKUPS = 100 # Хватает, чтобы не терять части на самом большом прогоне
+WRITE_BATCH = 1000
+
+
+def synthetic_events(count, seed=0):
+    """Генератор примерно count событий: партии случайной сложности со случайными ходами."""
+    rng = random.Random(seed)
+    produced = 0
+    while produced < count:
+        size = rng.choice(SIZES)
+        key = f"{size}x{size}"
+        moves_limit, target = difficulty_for(size, size)
+        yield {'e': 'start', 'k': key, 'm': moves_limit, 't': target}
+        score = 0
+        moves = 0
+        while moves < moves_limit and score < target:
+            depth = min(1 + int(rng.expovariate(1.5)), 12)
+            cleared = 3 * depth + rng.randrange(3)
+            points = cleared + rng.randrange(5)
+            yield {'e': 'move', 'k': key, 's': [0, 0, 0, 1], 'd': depth, 'x': cleared, 'p': points,
+                   'ms': int(rng.lognormvariate(7.3, 0.6))}
+            score += points
+            moves += 1
+        yield {'e': 'end', 'k': key, 'win': score >= target, 'p': score, 't': target,
+               'l': moves_limit - moves}
+        produced += moves + 2
+
+
+def write_log(log, events):
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) == WRITE_BATCH:
+            log.write(*batch)
+            batch = []
+    if batch:
+        log.write(*batch)
+
+
+def main():
+    report = None
+    for count in EVENT_COUNTS:
+        with tempfile.TemporaryDirectory() as directory:
+            log = TelemetryLog(os.path.join(directory, 'telemetry.jsonl'),
+                               max_bytes=MAX_BYTES, backups=BACKUPS)
+            start = time.perf_counter()
+            write_log(log, synthetic_events(count))
+            write_time = time.perf_counter() - start
+            paths = log.files()
+            size = sum(os.path.getsize(path) for path in paths)
+
+            start = time.perf_counter()
+            stats = aggregate(read_events(paths))
+            aggregate_time = time.perf_counter() - start
+            # Память - отдельным проходом: tracemalloc сильно замедляет агрегацию
+            tracemalloc.start()
+            aggregate(read_events(paths))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            events = sum(d.games + d.moves + d.finished for d in stats.values())
+            report = format_report(stats)
+
+        print(f"{events} событий, {size / 2**20:.1f} МБ в {len(paths)} файлах: "
+              f"запись {events / write_time:.0f} событий/с, "
+              f"агрегация {events / aggregate_time:.0f} событий/с, "
+              f"пик памяти агрегатора {peak / 1024:.0f} КБ")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
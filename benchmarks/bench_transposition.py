@@ -0,0 +1,114 @@
+"""
+Ключ Zobrist и таблица транспозиций MoveAdvisor.
+
+1. Цена ведения ключа: resolve_move со случайными ходами без ключа и с ключом
+   (обновляется на ходу) на всех бэкендах.
+2. Подсказки: игрок запрашивает подсказку QUERIES_PER_POSITION раз на каждой позиции
+   (например, снова после неудачного обмена), затем делает подсказанный ход. Сравнивается
+   среднее время запроса советника без кэша и с кэшем, печатается доля попаданий.
+3. Память: кэш заполняется позициями случайных партий до разных max_entries,
+   его размер измеряется tracemalloc - он ограничен max_entries, а не длиной игры.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_transposition
+"""
+import random
+import time
+import tracemalloc
+
+from advisor import MoveAdvisor
+from simulator import BACKENDS
+from transposition import TranspositionCache
+
+RESOLVE_SIZES = [8, 30]
+RESOLVE_MOVES = 200
+REPEATS = 3 # Время resolve - лучшее из повторов (замеры на одном ядре шумные)
+HINT_SIZE = 8
+POSITIONS = 15
+QUERIES_PER_POSITION = 3
+CACHE_SIZES = [256, 1024, 4096]
+NUM_TYPES = 5
+
+
+def resolve_time(board_class, size, zobrist):
+    """Среднее время resolve_move, мкс (лучший из REPEATS прогонов одной и той же партии)."""
+    return min(resolve_run(board_class, size, zobrist) for _ in range(REPEATS))
+
+
+def resolve_run(board_class, size, zobrist):
+    rng = random.Random(size)
+    board = board_class(size, size, NUM_TYPES, incremental=True, auto_reshuffle=True, seed=size)
+    if zobrist:
+        board.zobrist_key # Первое обращение включает ведение ключа
+    spent = 0.0
+    for _ in range(RESOLVE_MOVES):
+        move = rng.choice(board.legal_moves())
+        start = time.perf_counter()
+        board.resolve_move(*move)
+        spent += time.perf_counter() - start
+    return spent / RESOLVE_MOVES * 1e6
+
+
+def hint_session(board_class, cache_size):
+    """Среднее время запроса подсказки, мс, и советник (для статистики кэша)."""
+    advisor = MoveAdvisor(depth=2, time_budget=10.0, seed=0, cache_size=cache_size)
+    board = board_class(HINT_SIZE, HINT_SIZE, NUM_TYPES, incremental=True, auto_reshuffle=True, seed=1)
+    spent = 0.0
+    queries = 0
+    for _ in range(POSITIONS):
+        hint = None
+        for _ in range(QUERIES_PER_POSITION):
+            start = time.perf_counter()
+            hint = advisor.advise(board)
+            spent += time.perf_counter() - start
+            queries += 1
+        if hint is None:
+            break
+        board.resolve_move(*hint.move)
+    return spent / queries * 1e3, advisor
+
+
+def cache_memory(board_class, max_entries):
+    """Байты, занятые кэшем после заполнения позициями случайных партий, и число записей."""
+    rng = random.Random(max_entries)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cache = TranspositionCache(max_entries)
+    seed = 0
+    while cache.evictions < max_entries: # Кэш заполнен и полностью обновился хотя бы раз
+        board = board_class(HINT_SIZE, HINT_SIZE, NUM_TYPES, incremental=True, auto_reshuffle=True,
+                            seed=seed)
+        seed += 1
+        for _ in range(30):
+            moves = cache.legal_moves(board)
+            for move in moves:
+                cache.immediate_score(board, move)
+            board.resolve_move(*rng.choice(moves))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, len(cache)
+
+
+def main():
+    print(f"{'size':>5} {'backend':>9} {'resolve, us':>12} {'with key, us':>13} {'overhead':>9}")
+    for size in RESOLVE_SIZES:
+        for name, board_class in BACKENDS.items():
+            plain = resolve_time(board_class, size, False)
+            keyed = resolve_time(board_class, size, True)
+            print(f"{size:>5} {name:>9} {plain:>12.1f} {keyed:>13.1f} {keyed / plain - 1:>9.1%}")
+
+    print(f"\nПодсказки {HINT_SIZE}x{HINT_SIZE}, {QUERIES_PER_POSITION} запроса на позицию")
+    print(f"{'backend':>9} {'no cache, ms':>13} {'cache, ms':>10} {'hit rate':>9}")
+    for name, board_class in BACKENDS.items():
+        plain, _ = hint_session(board_class, 0)
+        cached, advisor = hint_session(board_class, 1024)
+        print(f"{name:>9} {plain:>13.1f} {cached:>10.1f} {advisor.cache.stats()['hit_rate']:>9.1%}")
+
+    print(f"\n{'max_entries':>11} {'entries':>8} {'memory, KB':>11} {'bytes/entry':>12}")
+    for max_entries in CACHE_SIZES:
+        size, entries = cache_memory(BACKENDS['array'], max_entries)
+        print(f"{max_entries:>11} {entries:>8} {size / 1024:>11.0f} {size / entries:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+from game_board import FallMap, GameBoard
+
+
+_SMALL_MASK_BITS = 4096 # До какой длины маски биты снимаются по одному (см. _bit_indices)
+
+
+def _bit_indices(mask):
+    """
+    Номера установленных битов маски по возрастанию.
+    У длинных масок (большие поля) снятие младшего бита копирует всё число,
+    поэтому они один раз переводятся в строку из '0'/'1' и биты ищутся str.find.
+    """
+    if mask.bit_length() <= _SMALL_MASK_BITS:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+        return
+    digits = format(mask, 'b')[::-1] # Символ i - бит i
+    i = digits.find('1')
+    while i != -1:
+        yield i
+        i = digits.find('1', i + 1)
+
+
+# --- Класс _BitboardRow: Строка доски для доступа self.board[r][c] ---
+class _BitboardRow:
+    """
+    Представление строки BitboardGameBoard. Чтение берёт значение из плоского списка,
+    запись обновляет и список, и битовые маски типов.
+    """
+    __slots__ = ('_board', '_start', '_cols')
+
+    def __init__(self, board, r):
+        self._board = board
+        self._start = r * board._stride
+        self._cols = board.cols
+
+    def __len__(self):
+        return self._cols
+
+    def __iter__(self):
+        return iter(self._board._cells[self._start:self._start + self._cols])
+
+    def __getitem__(self, c):
+        if isinstance(c, slice):
+            return self._board._cells[self._start:self._start + self._cols][c]
+        if not 0 <= c < self._cols:
+            if not -self._cols <= c < 0:
+                raise IndexError("индекс столбца вне доски")
+            c += self._cols
+        return self._board._cells[self._start + c]
+
+    def __setitem__(self, c, value):
+        if not -self._cols <= c < self._cols:
+            raise IndexError("индекс столбца вне доски")
+        self._board._set_cell(self._start + c % self._cols, value)
+
+
+# --- Класс BitboardGameBoard: Доска из битовых масок по типам элементов ---
+class BitboardGameBoard(GameBoard):
+    """
+    Бэкенд GameBoard, где для каждого типа элемента хранится одно целое число-маска:
+    бит r * stride + c установлен, если в клетке (r, c) лежит элемент этого типа.
+    Каждая строка дополнена одним всегда нулевым битом справа (stride = cols + 1),
+    поэтому сдвиги на 1-2 бита не "перетекают" через край строки.
+
+    Серии ищутся целиком по маске: b & (b >> 1) & (b >> 2) - начала горизонтальных
+    троек, b & (b >> stride) & (b >> 2 * stride) - вертикальных. Ходы находятся так же:
+    маска "слотов", куда достаточно поставить элемент типа, сдвигается к соседям-источникам.
+    Значения клеток дополнительно лежат в плоском списке для чтения self.board[r][c].
+    """
+
+    def __init__(self, rows, cols, num_types, **kwargs):
+        self._stride = cols + 1 # Ширина строки в битах с учётом нулевого бита-разделителя
+        self._cells = [0] * (rows * self._stride)
+        # masks[t] - клетки типа t; masks[0] - пустые клетки (в поиске не участвует)
+        self._masks = [0] * (num_types + 1)
+        row_mask = (1 << cols) - 1
+        self._row_masks = [row_mask << (r * self._stride) for r in range(rows)]
+        column_mask = sum(1 << (r * self._stride) for r in range(rows))
+        self._col_masks = [column_mask << c for c in range(cols)]
+        self._all_cells = sum(self._row_masks) # Все клетки доски без битов-разделителей
+        # Таблицы bytes.translate: значение t -> символ '1', остальные -> '0' (см. _rebuild_masks)
+        self._mask_tables = [bytes(49 if value == t else 48 for value in range(256))
+                             for t in range(num_types + 1)]
+        self._rows_view = []
+        super().__init__(rows, cols, num_types, **kwargs)
+
+    @property
+    def board(self):
+        """Список строк-представлений с прежним доступом self.board[r][c] на чтение и запись."""
+        return self._rows_view
+
+    @board.setter
+    def board(self, grid):
+        """Загружает поле из списка списков и пересобирает маски."""
+        stride = self._stride
+        for r, row in enumerate(grid):
+            self._cells[r * stride:r * stride + self.cols] = row
+        self._rebuild_masks()
+        self._rows_view = [_BitboardRow(self, r) for r in range(self.rows)]
+        self.mark_all_dirty()
+
+    def __getstate__(self):
+        # Строки-представления ссылаются на саму доску, их проще пересоздать
+        state = self.__dict__.copy()
+        del state['_rows_view']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._rows_view = [_BitboardRow(self, r) for r in range(self.rows)]
+
+    def _rebuild_masks(self, end=None):
+        """
+        Пересобирает все маски из списка клеток без цикла по клеткам на Python:
+        клетки переводятся в строку из '0'/'1' для каждого типа и разбираются int(..., 2).
+        Если задан end, пересобираются только биты клеток [0, end), остальные не меняются.
+        """
+        if end is None or end >= len(self._cells):
+            digits = bytes(self._cells)[::-1] # Первая клетка - младший бит, то есть последний символ
+            self._masks = [int(digits.translate(table), 2) for table in self._mask_tables]
+        else:
+            digits = bytes(self._cells[:end])[::-1]
+            self._masks = [(mask >> end << end) | int(digits.translate(table), 2)
+                           for mask, table in zip(self._masks, self._mask_tables)]
+        self._masks[0] &= self._all_cells # Биты-разделители не считаются пустыми клетками
+
+    def _set_cell(self, index, value):
+        """Записывает значение в клетку с номером бита index, перенося бит между масками."""
+        old = self._cells[index]
+        if old != value:
+            bit = 1 << index
+            self._masks[old] ^= bit
+            self._masks[value] ^= bit
+            self._cells[index] = value
+
+    def swap_elements(self, r1, c1, r2, c2):
+        """
+        Меняет местами два соседних элемента в списке и масках.
+        Возвращает True, если обмен произошёл успешно, False в противном случае.
+        """
+        if not ((abs(r1 - r2) == 1 and c1 == c2) or \
+                (abs(c1 - c2) == 1 and r1 == r2)):
+            return False # Несоседние элементы
+
+        if not (0 <= r1 < self.rows and 0 <= c1 < self.cols and \
+                0 <= r2 < self.rows and 0 <= c2 < self.cols):
+            return False # Выход за границы доски
+
+        i1 = r1 * self._stride + c1
+        i2 = r2 * self._stride + c2
+        v1, v2 = self._cells[i1], self._cells[i2]
+        if v1 != v2:
+            both = (1 << i1) | (1 << i2)
+            self._masks[v1] ^= both
+            self._masks[v2] ^= both
+            self._cells[i1], self._cells[i2] = v2, v1
+        self._after_swap(r1, c1, r2, c2)
+        self._mark_dirty((r1, r2), (c1, c2))
+        return True
+
+    def _run_starts(self):
+        """Маски начал горизонтальных и вертикальных троек по всем типам."""
+        s = self._stride
+        horizontal = vertical = 0
+        for b in self._masks[1:]:
+            horizontal |= b & (b >> 1) & (b >> 2)
+            vertical |= b & (b >> s) & (b >> 2 * s)
+        return horizontal, vertical
+
+    def _scan_matches(self, rows, cols, box=None):
+        """
+        То же, что GameBoard._scan_matches, но по маскам: серии ищутся по всей доске
+        сразу, а затем отбираются горизонтальные в строках rows и вертикальные в столбцах cols.
+        Прямоугольник изменений box не нужен: проверка всей доски и так занимает
+        несколько операций над масками.
+        """
+        s = self._stride
+        horizontal, vertical = self._run_starts()
+        if len(rows) < self.rows:
+            horizontal &= sum(self._row_masks[r] for r in rows)
+        if len(cols) < self.cols:
+            vertical &= sum(self._col_masks[c] for c in cols)
+
+        matched = (horizontal | horizontal << 1 | horizontal << 2 |
+                   vertical | vertical << s | vertical << 2 * s)
+        matches = {divmod(i, s) for i in _bit_indices(matched)}
+        rows_with_runs = {i // s for i in _bit_indices(horizontal)}
+        cols_with_runs = {i % s for i in _bit_indices(vertical)}
+        return matches, rows_with_runs, cols_with_runs
+
+    def remove_matches(self, matches):
+        """
+        Удаляет найденные совпадения, заменяя их на 0 (пустое место).
+        Возвращает количество удалённых элементов (очков).
+        """
+        if not matches:
+            return 0
+        if self._zobrist is not None:
+            self._zobrist_cells(matches)
+
+        stride = self._stride
+        for r, c in matches:
+            self._set_cell(r * stride + c, 0)
+        return len(matches)
+
+    def drop_elements(self):
+        """
+        Опускает элементы, чтобы заполнить пустые места (0),
+        и генерирует новые случайные элементы в верхней части столбцов.
+        Столбцы уплотняются срезами списка с шагом stride, новые элементы берутся
+        из очереди появления (как в GameBoard.drop_elements), а маски затем
+        пересобираются до самой нижней изменившейся строки (_rebuild_masks),
+        а не по одному биту на клетку.
+        Возвращает FallMap - карту падения элементов.
+        """
+        cells = self._cells
+        stride = self._stride
+        rows = self.rows
+        changed = []
+        for c in range(self.cols):
+            column = cells[c:rows * stride:stride]
+            if 0 in column:
+                changed.append((c, column, list(filter(None, column))))
+        if not changed:
+            falls = FallMap()
+            self._after_drop(falls)
+            return falls
+        spawns = self._take_spawns(sum(rows - len(kept) for _, _, kept in changed))
+
+        falls = FallMap()
+        lowest_changed_row = -1
+        start = 0
+        for c, column, kept in changed:
+            missing = rows - len(kept)
+            falls.add_column(c, column, missing)
+            lowest_changed_row = max(lowest_changed_row, rows - 1 - column[::-1].index(0))
+            cells[c:rows * stride:stride] = spawns[start:start + missing] + kept
+            start += missing
+        self._rebuild_masks((lowest_changed_row + 1) * stride)
+        self._mark_dirty(range(lowest_changed_row + 1), [c for c, _, _ in changed])
+        self._after_drop(falls)
+        return falls
+
+    def _iter_legal_moves(self):
+        """
+        Генератор результативных обменов (r1, c1, r2, c2) по маскам типов.
+
+        Для маски b слот p подходит, если рядом лежат два элемента типа b:
+        пара справа/слева/снизу/сверху или пара с разрывом через p. Элемент приходит в слот
+        из соседней клетки, не входящей в шаблон, поэтому маска слотов для каждого
+        направления источника своя; сдвиг маски b на это направление даёт сами ходы.
+        """
+        s = self._stride
+        for b in self._masks[1:]:
+            if not b:
+                continue
+            right_pair = (b >> 1) & (b >> 2)
+            left_pair = (b << 1) & (b << 2)
+            down_pair = (b >> s) & (b >> 2 * s)
+            up_pair = (b << s) & (b << 2 * s)
+            horizontal = right_pair | left_pair | ((b << 1) & (b >> 1))
+            vertical = down_pair | up_pair | ((b << s) & (b >> s))
+            free = self._all_cells & ~b # Слот должен быть клеткой доски другого типа
+
+            # Источник сверху (p - s) и снизу (p + s)
+            for p in _bit_indices((horizontal | down_pair) & free & (b << s)):
+                yield (p - s) // s, p % s, p // s, p % s
+            for p in _bit_indices((horizontal | up_pair) & free & (b >> s)):
+                yield p // s, p % s, p // s + 1, p % s
+            # Источник слева (p - 1) и справа (p + 1)
+            for p in _bit_indices((right_pair | vertical) & free & (b << 1)):
+                yield p // s, p % s - 1, p // s, p % s
+            for p in _bit_indices((left_pair | vertical) & free & (b >> 1)):
+                yield p // s, p % s, p // s, p % s + 1
@@ -0,0 +1,332 @@
+from kivy.core.text import Label as CoreLabel
+from kivy.event import EventDispatcher
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.properties import ListProperty, NumericProperty, ObjectProperty, StringProperty
+from kivy.uix.stencilview import StencilView
+
+
+# --- Класс CanvasCell: Лёгкая клетка доски из инструкций canvas ---
+class CanvasCell(EventDispatcher):
+    """
+    Клетка CanvasBoardWidget. Это не виджет: у неё нет своей текстуры, обработки касаний
+    и дерева детей, только четыре инструкции canvas (фон и надпись).
+    Свойства повторяют те, что GameScreen меняет у кнопок (pos, size, opacity,
+    background_color), поэтому Animation и код выделения работают с ней без изменений.
+    """
+    pos = ListProperty([0, 0])
+    size = ListProperty([1, 1])
+    opacity = NumericProperty(1)
+    background_color = ListProperty([1, 1, 1, 1])
+    element_value = ObjectProperty(None, allownone=True)
+    special = ObjectProperty(None, allownone=True) # Вид специального элемента (specials.py) или None
+    text = StringProperty('')
+
+    def __init__(self, board_view, coords, **kwargs):
+        super().__init__(**kwargs)
+        self.coords = coords
+        self._board_view = board_view
+        with board_view.canvas:
+            self._color = Color(1, 1, 1, 1)
+            self._rect = Rectangle()
+            self._label_color = Color(1, 1, 1, 1)
+            self._label = Rectangle()
+        self.bind(pos=self._update_geometry, size=self._update_geometry,
+                  opacity=self._update_color, background_color=self._update_color,
+                  text=self._update_label)
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def _update_geometry(self, *args):
+        self._rect.pos = self.pos
+        self._rect.size = self.size
+        self._place_label()
+
+    def _update_color(self, *args):
+        r, g, b, a = self.background_color
+        self._color.rgba = (r, g, b, a * self.opacity)
+        self._label_color.a = self.opacity
+
+    def _update_label(self, *args):
+        self._label.texture = self._board_view.label_texture(self.text)
+        self._place_label()
+
+    def _place_label(self):
+        """Вписывает общую текстуру надписи в центр клетки с сохранением пропорций."""
+        texture = self._label.texture
+        if texture is None:
+            return
+        width, height = self.size
+        scale = min(width * 0.6 / texture.width, height * 0.6 / texture.height)
+        label_width, label_height = texture.width * scale, texture.height * scale
+        self._label.size = (label_width, label_height)
+        self._label.pos = (self.pos[0] + (width - label_width) / 2,
+                           self.pos[1] + (height - label_height) / 2)
+
+
+# --- Класс CanvasBoardWidget: Окно просмотра доски одним виджетом ---
+class CanvasBoardWidget(StencilView):
+    """
+    Рисует клетки доски инструкциями Color/Rectangle внутри одного виджета
+    и переводит касание в (строка, столбец) арифметически, без обхода детей.
+    Надписи берутся из общего кэша текстур: по одной текстуре на текст надписи.
+
+    Виджет - окно просмотра (viewport): создаются только клетки, попадающие в окно,
+    поэтому доска 1000x1000 стоит столько же, сколько видимые несколько сотен клеток.
+    При прокрутке и масштабировании клетки, ушедшие из окна, переиспользуются
+    для появившихся. Доска, целиком помещающаяся в виджет, показывается без прокрутки,
+    как раньше. Перетаскивание прокручивает окно, колесо мыши и щипок двумя пальцами
+    меняют масштаб; StencilView обрезает клетки на краях окна.
+    """
+    _label_textures = {} # Кэш текстур надписей, общий для всех досок
+    INITIAL_CELL_SIZE = dp(32) # Размер клетки при первом показе доски, не помещающейся в окно
+    MAX_CELL_SIZE = dp(160) # Наибольший размер клетки при увеличении
+    ZOOM_STEP = 1.2 # Во сколько раз меняется масштаб за один щелчок колеса мыши
+    PAN_THRESHOLD = dp(10) # Сдвиг касания, после которого оно считается прокруткой, а не нажатием
+
+    def __init__(self, rows, cols, on_cell_press, on_viewport_change=None, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.cols = cols
+        self.on_cell_press = on_cell_press # Вызывается с CanvasCell нажатой клетки
+        # Вызывается после прокрутки, масштабирования и изменения размера виджета:
+        # владелец перерисовывает доску через update()
+        self.on_viewport_change = on_viewport_change
+        self.locked = False # Пока True (идёт анимация хода), прокрутка и масштаб не меняются
+        self.zoom = 1 # Масштаб относительно "вся доска в окне" (1)
+        # Пока игрок не менял масштаб, он подбирается по размеру виджета (INITIAL_CELL_SIZE)
+        self._auto_zoom = True
+        self.scroll = [0, 0] # Сдвиг окна от левого верхнего угла доски, в пикселях
+        self.spacing = (0, 0)
+        self._cell_size = (1, 1)
+        self._step = (1, 1) # Шаг сетки: размер клетки плюс отступ
+        self.cells = {} # (строка, столбец) -> CanvasCell для клеток в окне
+        self._spare_cells = [] # Скрытые клетки, ожидающие переиспользования
+        self._touches = [] # Касания, захваченные виджетом (одно - прокрутка, два - щипок)
+        self.bind(pos=self._on_geometry_change, size=self._on_geometry_change)
+
+    def label_texture(self, text):
+        """Возвращает (и при первом обращении создаёт) текстуру надписи text."""
+        texture = self._label_textures.get(text)
+        if texture is None:
+            label = CoreLabel(text=text, font_size=64)
+            label.refresh()
+            texture = self._label_textures[text] = label.texture
+        return texture
+
+    @property
+    def cell_size(self):
+        """Размер клетки (ширина, высота) при текущем масштабе."""
+        return self._cell_size
+
+    def _fit_cell_size(self):
+        """Размер клетки, при котором вся доска помещается в виджет."""
+        spacing_x, spacing_y = self.spacing
+        return (max(1, (self.width - (self.cols - 1) * spacing_x) / self.cols),
+                max(1, (self.height - (self.rows - 1) * spacing_y) / self.rows))
+
+    def _max_zoom(self):
+        return max(1, self.MAX_CELL_SIZE / min(self._fit_cell_size()))
+
+    def _layout(self):
+        """Пересчитывает размер клетки по масштабу и ограничивает прокрутку краями доски."""
+        fit_width, fit_height = self._fit_cell_size()
+        if self._auto_zoom:
+            self.zoom = max(1, self.INITIAL_CELL_SIZE / min(fit_width, fit_height))
+        self.zoom = min(max(self.zoom, 1), self._max_zoom())
+        cell_width, cell_height = fit_width * self.zoom, fit_height * self.zoom
+        self._cell_size = (cell_width, cell_height)
+        self._step = (cell_width + self.spacing[0], cell_height + self.spacing[1])
+        board_width = self.cols * self._step[0] - self.spacing[0]
+        board_height = self.rows * self._step[1] - self.spacing[1]
+        self.scroll = [min(max(self.scroll[0], 0), max(0, board_width - self.width)),
+                       min(max(self.scroll[1], 0), max(0, board_height - self.height))]
+
+    def visible_window(self):
+        """Возвращает (первая строка, последняя строка, первый столбец, последний столбец) окна."""
+        step_x, step_y = self._step
+        scroll_x, scroll_y = self.scroll
+        return (int(scroll_y // step_y), min(self.rows - 1, int((scroll_y + self.height) // step_y)),
+                int(scroll_x // step_x), min(self.cols - 1, int((scroll_x + self.width) // step_x)))
+
+    def cell_pos(self, r, c):
+        """Позиция клетки (r, c) на экране с учётом прокрутки (строка 0 - сверху)."""
+        step_x, step_y = self._step
+        return (self.x + c * step_x - self.scroll[0],
+                self.top + self.scroll[1] - r * step_y - self._cell_size[1])
+
+    def cell(self, r, c):
+        """Клетка (r, c), если она сейчас в окне, иначе None."""
+        return self.cells.get((r, c))
+
+    def swap_cells(self, r1, c1, r2, c2):
+        """Меняет местами клетки двух позиций в индексе окна (после анимации обмена)."""
+        first, second = self.cells.pop((r1, c1), None), self.cells.pop((r2, c2), None)
+        if first is not None:
+            self.cells[(r2, c2)] = first
+        if second is not None:
+            self.cells[(r1, c1)] = second
+
+    def ensure_visible(self, r, c):
+        """Прокручивает окно так, чтобы клетка (r, c) оказалась в его центре, если её не видно."""
+        first_row, last_row, first_col, last_col = self.visible_window()
+        if first_row <= r <= last_row and first_col <= c <= last_col:
+            return False
+        step_x, step_y = self._step
+        self.scroll = [c * step_x - (self.width - self._cell_size[0]) / 2,
+                       r * step_y - (self.height - self._cell_size[1]) / 2]
+        self._viewport_changed()
+        return True
+
+    def update(self, board, spacing, color_for, text_for, specials=None):
+        """
+        Приводит клетки окна к состоянию board. Клетки, ушедшие из окна, переиспользуются
+        для новых позиций; цвет и надпись (text_for(значение, вид специального элемента
+        из specials)) меняются только у клеток с новым значением или видом,
+        а позиция, размер и прозрачность возвращаются к сетке.
+        Возвращает число созданных клеток (новые создаются, только когда окно выросло).
+        """
+        self.spacing = tuple(spacing)
+        self._layout()
+        first_row, last_row, first_col, last_col = self.visible_window()
+        step_x, step_y = self._step
+        x0 = self.x - self.scroll[0]
+        y0 = self.top + self.scroll[1] - self._cell_size[1]
+        size = list(self._cell_size)
+
+        cells = {}
+        spare = self._spare_cells
+        for coords, cell in self.cells.items():
+            r, c = coords
+            if first_row <= r <= last_row and first_col <= c <= last_col:
+                cells[coords] = cell
+            else:
+                spare.append(cell)
+        created = 0
+        for r in range(first_row, last_row + 1):
+            board_row = board[r]
+            y = y0 - r * step_y
+            for c in range(first_col, last_col + 1):
+                cell = cells.get((r, c))
+                moved = cell is None # Клетка пришла с другой позиции: цвет (и подсветка) задаются заново
+                if moved:
+                    if spare:
+                        cell = spare.pop()
+                    else:
+                        cell = CanvasCell(self, (r, c))
+                        created += 1
+                    cell.coords = (r, c)
+                    cells[(r, c)] = cell
+                element_value = board_row[c]
+                special = specials.get((r, c)) if specials else None
+                if moved or cell.element_value != element_value or cell.special != special:
+                    cell.element_value = element_value
+                    cell.special = special
+                    cell.text = text_for(element_value, special)
+                    cell.background_color = color_for(element_value)
+                cell.opacity = 1
+                cell.size = size
+                cell.pos = [x0 + c * step_x, y]
+        for cell in spare:
+            cell.opacity = 0 # Лишние клетки остаются в canvas скрытыми до следующего роста окна
+        self.cells = cells
+        return created
+
+    def cell_at(self, x, y):
+        """Находит клетку под точкой (x, y) или None, если точка попала в отступ или вне поля."""
+        step_x, step_y = self._step
+        board_x = x - self.x + self.scroll[0]
+        board_y = self.top - y + self.scroll[1]
+        c = int(board_x // step_x)
+        r = int(board_y // step_y)
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return None
+        # Попадание в промежуток между клетками не считается нажатием
+        if board_x - c * step_x > self._cell_size[0] or board_y - r * step_y > self._cell_size[1]:
+            return None
+        return self.cells.get((r, c))
+
+    def scroll_by(self, dx, dy):
+        """Сдвигает окно на (dx, dy) пикселей (dy > 0 - вниз по доске)."""
+        self.scroll = [self.scroll[0] + dx, self.scroll[1] + dy]
+        self._viewport_changed()
+
+    def zoom_by(self, factor, anchor=None):
+        """Меняет масштаб в factor раз, оставляя точку anchor (по умолчанию центр) на месте."""
+        anchor_x, anchor_y = anchor if anchor is not None else self.center
+        step_x, step_y = self._step
+        # Координаты точки под anchor в клетках доски
+        board_x = (anchor_x - self.x + self.scroll[0]) / step_x
+        board_y = (self.top - anchor_y + self.scroll[1]) / step_y
+        self.zoom *= factor
+        self._auto_zoom = False
+        self._layout()
+        step_x, step_y = self._step
+        self.scroll = [board_x * step_x - (anchor_x - self.x),
+                       board_y * step_y - (self.top - anchor_y)]
+        self._viewport_changed()
+
+    def _viewport_changed(self):
+        self._layout()
+        if self.on_viewport_change is not None:
+            self.on_viewport_change()
+
+    def _on_geometry_change(self, *args):
+        self._viewport_changed()
+
+    def on_touch_down(self, touch):
+        if not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        if touch.is_mouse_scrolling:
+            if not self.locked and touch.button in ('scrollup', 'scrolldown'):
+                self.zoom_by(self.ZOOM_STEP if touch.button == 'scrollup' else 1 / self.ZOOM_STEP,
+                             touch.pos)
+            return True
+        touch.grab(self)
+        touch.ud[self] = False # Касание ещё не стало прокруткой или щипком
+        self._touches.append(touch)
+        if len(self._touches) > 1:
+            for other in self._touches:
+                other.ud[self] = True # Второй палец: это щипок, нажатия не будет
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_move(touch)
+        if self.locked or touch not in self._touches:
+            return True
+        if len(self._touches) >= 2:
+            first, second = self._touches[:2]
+            other = second if touch is first else first
+            before = ((touch.px - other.x) ** 2 + (touch.py - other.y) ** 2) ** 0.5
+            after = ((touch.x - other.x) ** 2 + (touch.y - other.y) ** 2) ** 0.5
+            if before > 0 and after > 0:
+                self.zoom_by(after / before, ((touch.x + other.x) / 2, (touch.y + other.y) / 2))
+            return True
+        if not touch.ud[self]:
+            distance = ((touch.x - touch.ox) ** 2 + (touch.y - touch.oy) ** 2) ** 0.5
+            if distance < self.PAN_THRESHOLD:
+                return True
+            touch.ud[self] = True
+        self.scroll_by(-touch.dx, touch.dy)
+        return True
+
+    def on_touch_up(self, touch):
+        # Как у кнопки: нажатие срабатывает при отпускании (on_release), если касание не прокручивало
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        if touch in self._touches:
+            self._touches.remove(touch)
+        if touch.ud.get(self):
+            return True
+        cell = self.cell_at(*touch.pos) if self.collide_point(*touch.pos) else None
+        if cell is not None:
+            self.on_cell_press(cell)
+        return True
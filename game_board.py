@@ -0,0 +1,837 @@
+import random
+from collections import namedtuple
+from collections.abc import Mapping
+from itertools import chain
+
+from profiler import NULL_PROFILER
+from specials import COLOR_BOMB, KINDS, creation_cell, expand_effects, find_runs, group_bonus, \
+    group_runs, special_for
+
+# Один шаг каскада: удалённые клетки, очки за шаг, (опционально) доска после падения,
+# карта падения FallMap и (опционально) специальные элементы {(строка, столбец): вид} после падения
+CascadeStep = namedtuple('CascadeStep', ['removed', 'score', 'board', 'falls', 'specials'])
+# Итог хода: шаги каскада, суммарные очки, (опционально) финальная доска и глубина каскада
+MoveResult = namedtuple('MoveResult', ['steps', 'score', 'board', 'depth'])
+
+# Сколько новых элементов заранее вытягивается из генератора за раз (очередь появления)
+SPAWN_BATCH = 256
+
+# Параметры уровней по размеру поля: (количество ходов, целевой счёт)
+DIFFICULTY_SETTINGS = {
+    6: (20, 100),  # Легкий (6x6)
+    8: (25, 200),  # Средний (8x8)
+    10: (30, 350), # Сложный (10x10)
+}
+
+
+def difficulty_for(rows, cols=None):
+    """
+    Возвращает (ходы, целевой счёт) для поля rows x cols (по умолчанию квадратного).
+    Поля 6x6, 8x8 и 10x10 берутся из DIFFICULTY_SETTINGS. Поле другого размера
+    получает уровень ближайшего по числу клеток стандартного поля, а поле больше 10x10 -
+    ходы сложного уровня и цель, растущую пропорционально стороне поля.
+    """
+    cols = rows if cols is None else cols
+    if rows == cols and rows in DIFFICULTY_SETTINGS:
+        return DIFFICULTY_SETTINGS[rows]
+    cells = rows * cols
+    largest = max(DIFFICULTY_SETTINGS)
+    if cells <= largest * largest:
+        side = min(DIFFICULTY_SETTINGS, key=lambda size: abs(size * size - cells))
+        return DIFFICULTY_SETTINGS[side]
+    moves, target = DIFFICULTY_SETTINGS[largest]
+    scaled = target * (cells / (largest * largest)) ** 0.5
+    return moves, int(round(scaled / 50) * 50)
+
+
+_ZOBRIST_TABLES = {} # (строки, столбцы, типы) -> (ключи значений, ключи специальных элементов)
+
+
+def zobrist_table(rows, cols, num_types):
+    """
+    Случайные 64-битные ключи Zobrist для доски rows x cols: values[клетка * (num_types + 1) + значение]
+    (у пустой клетки ключ 0) и specials[вид][клетка]. Seed фиксирован, поэтому ключи
+    одной и той же позиции совпадают в разных копиях доски и в разных процессах.
+    """
+    table = _ZOBRIST_TABLES.get((rows, cols, num_types))
+    if table is None:
+        rng = random.Random(f"zobrist-{rows}x{cols}-{num_types}")
+        width = num_types + 1
+        values = [rng.getrandbits(64) if i % width else 0 for i in range(rows * cols * width)]
+        specials = {kind: [rng.getrandbits(64) for _ in range(rows * cols)] for kind in KINDS}
+        table = _ZOBRIST_TABLES[(rows, cols, num_types)] = (values, specials)
+    return table
+
+
+def generate_board(rows, cols, num_types, rng):
+    """
+    Генерирует поле rows x cols без серий из трёх, выбирая каждую клетку только
+    из допустимых значений (без повторных попыток).
+
+    Гарантирует хотя бы один ход: до заполнения в двух верхних строках ставится
+    шаблон "X X _ / _ _ X" - обмен клеток в его правом столбце даёт серию.
+    Затем поле случайно транспонируется и отражается, чтобы ход оказался где угодно.
+    На полях, где шаблон не помещается (одна строка или столбец, 2x2), хода может не быть.
+    """
+    if num_types < 3:
+        raise ValueError("Для поля без готовых совпадений нужно минимум 3 типа элементов")
+
+    fits_horizontal = rows >= 2 and cols >= 3
+    fits_vertical = rows >= 3 and cols >= 2
+    transpose = fits_vertical and (not fits_horizontal or rng.random() < 0.5)
+    gen_rows, gen_cols = (cols, rows) if transpose else (rows, cols)
+    grid = [[0] * gen_cols for _ in range(gen_rows)]
+    if fits_horizontal or fits_vertical:
+        c0 = rng.randrange(gen_cols - 2)
+        grid[0][c0] = grid[0][c0 + 1] = grid[1][c0 + 2] = rng.randint(1, num_types)
+
+    random = rng.random # Одно обращение к генератору на клетку; randint заметно медленнее
+    allowed_by_forbidden = {} # (запрет 1, запрет 2) -> список допустимых значений
+    for r in range(gen_rows):
+        row = grid[r]
+        above = grid[r - 1] if r >= 2 else None
+        above2 = grid[r - 2] if r >= 2 else None
+        for c in range(gen_cols):
+            if row[c]:
+                continue # Клетка шаблона хода
+            # Значения, которые замкнули бы серию: пара слева, пара сверху и пара
+            # с уже поставленными клетками шаблона справа (бывает только в строках 0-1,
+            # где нет пары сверху, поэтому запретов не больше двух)
+            left = row[c - 1] if c >= 2 and row[c - 1] == row[c - 2] else 0
+            if above is not None:
+                other = above[c] if above[c] == above2[c] else 0
+            else:
+                other = 0
+                if c + 1 < gen_cols and row[c + 1]:
+                    if (c >= 1 and row[c - 1] == row[c + 1]) or \
+                       (c + 2 < gen_cols and row[c + 2] == row[c + 1]):
+                        other = row[c + 1]
+            if left or other:
+                allowed = allowed_by_forbidden.get((left, other))
+                if allowed is None:
+                    allowed = allowed_by_forbidden[(left, other)] = [
+                        value for value in range(1, num_types + 1) if value != left and value != other]
+                row[c] = allowed[int(random() * len(allowed))]
+            else:
+                row[c] = int(random() * num_types) + 1
+
+    if transpose:
+        grid = [list(column) for column in zip(*grid)]
+    if rng.random() < 0.5:
+        grid.reverse()
+    if rng.random() < 0.5:
+        for row in grid:
+            row.reverse()
+    return grid
+
+
+# --- Класс FallMap: Карта падения элементов за один drop_elements ---
+class FallMap(Mapping):
+    """
+    Словарь {(строка, столбец): на сколько клеток упал элемент} в координатах после падения,
+    включая новые элементы, падающие из-за верхнего края.
+    drop_elements сохраняет только изменившиеся столбцы (значения до падения),
+    а расстояния по клеткам считаются при первом обращении: в симуляциях,
+    где карта не нужна, она почти ничего не стоит.
+    """
+    __slots__ = ('_columns', '_distances')
+
+    def __init__(self):
+        self._columns = [] # (столбец, значения до падения сверху вниз, число пустых клеток)
+        self._distances = None
+
+    def add_column(self, c, column, missing):
+        self._columns.append((c, column, missing))
+        self._distances = None
+
+    @staticmethod
+    def _column_falls(c, column, missing):
+        """Пары ((строка, столбец), расстояние) одного столбца."""
+        for r in range(missing):
+            yield (r, c), missing # Новые элементы падают из-за верхнего края
+        empties_below = 0 # Сколько пустых клеток ниже текущей
+        for r in range(len(column) - 1, -1, -1):
+            if not column[r]:
+                empties_below += 1
+            elif empties_below:
+                yield (r + empties_below, c), empties_below
+
+    def _build(self):
+        if self._distances is None:
+            distances = {}
+            for c, column, missing in self._columns:
+                distances.update(self._column_falls(c, column, missing))
+            self._distances = distances
+        return self._distances
+
+    def items_in(self, first_row, last_row, first_col, last_col):
+        """
+        Пары ((строка, столбец), расстояние) только для клеток окна - без построения
+        всей карты (экрану большого поля нужны лишь видимые падения).
+        """
+        for c, column, missing in self._columns:
+            if first_col <= c <= last_col:
+                for (r, c), distance in self._column_falls(c, column, missing):
+                    if first_row <= r <= last_row:
+                        yield (r, c), distance
+
+    def columns(self):
+        """Пары (столбец, значения до падения сверху вниз) изменившихся столбцов."""
+        return [(c, column) for c, column, _ in self._columns]
+
+    def destinations(self, cells):
+        """
+        Генератор координат после падения для уцелевших клеток cells
+        (координаты до падения): так за элементами следуют их специальные свойства.
+        """
+        columns = {c: column for c, column, _ in self._columns}
+        for r, c in cells:
+            column = columns.get(c)
+            yield (r if column is None else r + column[r + 1:].count(0)), c
+
+    def __getitem__(self, key):
+        return self._build()[key]
+
+    def __iter__(self):
+        return iter(self._build())
+
+    def __len__(self):
+        return len(self._build())
+
+
+# --- Класс BoardWindow: Копия прямоугольной части доски ---
+class BoardWindow:
+    """
+    Копия окна доски (first_row..last_row, first_col..last_col) с прежней адресацией
+    window[r][c] в координатах всей доски. Клетки вне окна читаются как 0,
+    запись в них игнорируется.
+    resolve_move сохраняет такие копии по шагам каскада вместо копий всего поля,
+    когда экран показывает только часть большой доски.
+    """
+    __slots__ = ('first_row', 'first_col', '_rows')
+
+    def __init__(self, board, first_row, last_row, first_col, last_col):
+        self.first_row = first_row
+        self.first_col = first_col
+        self._rows = [_WindowRow(list(board[r][first_col:last_col + 1]), first_col)
+                      for r in range(first_row, last_row + 1)]
+
+    def __len__(self):
+        return self.first_row + len(self._rows)
+
+    def __getitem__(self, r):
+        index = r - self.first_row
+        if 0 <= index < len(self._rows):
+            return self._rows[index]
+        return _EMPTY_WINDOW_ROW
+
+
+class _WindowRow:
+    """Строка BoardWindow: значения столбцов окна со сдвигом first_col."""
+    __slots__ = ('_values', '_first_col')
+
+    def __init__(self, values, first_col):
+        self._values = values
+        self._first_col = first_col
+
+    def __getitem__(self, c):
+        index = c - self._first_col
+        if 0 <= index < len(self._values):
+            return self._values[index]
+        return 0
+
+    def __setitem__(self, c, value):
+        index = c - self._first_col
+        if 0 <= index < len(self._values):
+            self._values[index] = value
+
+
+_EMPTY_WINDOW_ROW = _WindowRow([], 0)
+
+
+# --- Класс BoardPool: Запас заранее созданных досок ---
+class BoardPool:
+    """
+    Держит несколько готовых досок одного размера, чтобы новая партия начиналась
+    без ожидания генерации. take() отдаёт готовую доску (или создаёт её, если запас пуст),
+    fill() пополняет запас - например, в свободном кадре после начала партии.
+    """
+
+    def __init__(self, board_class, rows, cols, num_types, size=2, **board_kwargs):
+        self.board_class = board_class
+        self.rows = rows
+        self.cols = cols
+        self.num_types = num_types
+        self.size = size
+        self.board_kwargs = board_kwargs # Например, incremental=True, auto_reshuffle=True
+        self._boards = []
+
+    def __len__(self):
+        return len(self._boards)
+
+    def matches(self, board_class, rows, cols, num_types):
+        """True, если пул выдаёт доски с такими параметрами."""
+        return (self.board_class, self.rows, self.cols, self.num_types) == \
+               (board_class, rows, cols, num_types)
+
+    def fill(self, count=None):
+        """Создаёт доски, пока в запасе не станет count (по умолчанию size)."""
+        target = self.size if count is None else count
+        while len(self._boards) < target:
+            self._boards.append(self._new_board())
+
+    def take(self):
+        """Отдаёт готовую доску из запаса или создаёт новую, если запас пуст."""
+        if self._boards:
+            return self._boards.pop()
+        return self._new_board()
+
+    def _new_board(self):
+        return self.board_class(self.rows, self.cols, self.num_types, **self.board_kwargs)
+
+
+# --- Класс GameBoard: Основная логика игры "Три в ряд" ---
+class GameBoard:
+    # Ключ Zobrist значений клеток (без специальных элементов) или None, пока он
+    # не нужен: тогда ходы не тратят время на его обновление (см. zobrist_key)
+    _zobrist = None
+
+    def __init__(self, rows, cols, num_types, incremental=False, verify_incremental=False,
+                 auto_reshuffle=False, special_tiles=True, seed=None):
+        self.rows = rows
+        self.cols = cols
+        self.num_types = num_types
+        # Инкрементальный режим: find_matches проверяет только "грязные" строки и столбцы,
+        # которые изменились после swap_elements/drop_elements с момента прошлого поиска.
+        self.incremental = incremental
+        # Отладочный флаг: сверять каждый инкрементальный результат с полным сканированием
+        self.verify_incremental = verify_incremental
+        # Автоматически перемешивать доску, если после падения не осталось ни одного хода
+        self.auto_reshuffle = auto_reshuffle
+        # Фигуры из 4+ элементов создают специальные элементы (см. specials.py).
+        # Они хранятся отдельно от значений клеток и переезжают вместе со своими
+        # элементами при обмене, падении и перемешивании.
+        self.special_tiles = special_tiles
+        self.specials = {}
+        # Собственный поток случайных чисел: по seed партия воспроизводится целиком
+        # (начальное поле, падения и перемешивания). Без seed он берётся из глобального random.
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        # Очередь значений новых элементов: заполняется пачками, падение берёт из неё сразу все
+        self._spawn_queue = []
+        self.board = self._create_initial_board()
+        self.mark_all_dirty() # Новая доска ещё ни разу не сканировалась
+        if self.auto_reshuffle and not self.has_legal_moves():
+            self.reshuffle()
+
+    def mark_all_dirty(self):
+        """
+        Помечает всю доску как изменённую. Нужно вызывать после прямой записи
+        в self.board в обход swap_elements/drop_elements.
+        """
+        self._dirty_rows = set(range(self.rows))
+        self._dirty_cols = set(range(self.cols))
+        self._dirty_box = (0, self.rows - 1, 0, self.cols - 1)
+        # Столбцы, где могли появиться пустые клетки: drop_elements смотрит только их
+        self._emptied_cols = set(range(self.cols))
+        if self._zobrist is not None:
+            self._zobrist = self._full_zobrist()
+
+    @property
+    def zobrist_key(self):
+        """
+        64-битный ключ позиции (значения клеток и специальные элементы) для таблиц
+        транспозиций. При первом обращении ключ считается целиком, а дальше
+        обновляется на ходу в swap_elements, remove_matches и drop_elements.
+        """
+        if self._zobrist is None:
+            self._zobrist = self._full_zobrist()
+        key = self._zobrist
+        if self.specials:
+            kinds = zobrist_table(self.rows, self.cols, self.num_types)[1]
+            cols = self.cols
+            for (r, c), kind in self.specials.items():
+                key ^= kinds[kind][r * cols + c]
+        return key
+
+    def _full_zobrist(self):
+        """Ключ Zobrist значений всех клеток, посчитанный заново."""
+        values = zobrist_table(self.rows, self.cols, self.num_types)[0]
+        width = self.num_types + 1
+        key = 0
+        cell = 0
+        for row in self.board:
+            for value in row:
+                key ^= values[cell + value]
+                cell += width
+        return key
+
+    def _zobrist_cells(self, cells):
+        """Исключает из ключа текущие значения клеток cells (перед их удалением)."""
+        values = zobrist_table(self.rows, self.cols, self.num_types)[0]
+        width = self.num_types + 1
+        board, cols = self.board, self.cols
+        key = self._zobrist
+        for r, c in cells:
+            key ^= values[(r * cols + c) * width + board[r][c]]
+        self._zobrist = key
+
+    def to_list(self):
+        """Возвращает копию поля в виде списка списков."""
+        return [list(row) for row in self.board]
+
+    def _mark_dirty(self, rows=(), cols=()):
+        """
+        Добавляет строки и столбцы к области, которую нужно перепроверить.
+        Изменённые клетки лежат на пересечении rows и cols, поэтому вместе с линиями
+        запоминается их общий прямоугольник _dirty_box: новая серия в "грязной" строке
+        обязана задевать его столбцы, а в "грязном" столбце - его строки.
+        На больших полях это ограничивает поиск окрестностью изменений, а не целой линией.
+        """
+        if not rows or not cols:
+            return
+        self._dirty_rows.update(rows)
+        self._dirty_cols.update(cols)
+        r_lo, r_hi, c_lo, c_hi = min(rows), max(rows), min(cols), max(cols)
+        if self._dirty_box is not None:
+            box = self._dirty_box
+            r_lo, r_hi = min(r_lo, box[0]), max(r_hi, box[1])
+            c_lo, c_hi = min(c_lo, box[2]), max(c_hi, box[3])
+        self._dirty_box = (r_lo, r_hi, c_lo, c_hi)
+
+    def _create_initial_board(self):
+        """
+        Создаёт начальное игровое поле без готовых совпадений 3-в-ряд
+        и хотя бы с одним ходом (см. generate_board).
+        """
+        return generate_board(self.rows, self.cols, self.num_types, self.rng)
+
+    def swap_elements(self, r1, c1, r2, c2):
+        """
+        Меняет местами два элемента на доске, если они соседние.
+        Возвращает True, если обмен произошёл успешно, False в противном случае.
+        """
+        # Проверяем, что элементы соседние (по горизонтали или вертикали)
+        if not ((abs(r1 - r2) == 1 and c1 == c2) or \
+                (abs(c1 - c2) == 1 and r1 == r2)):
+            return False # Несоседние элементы
+
+        # Проверяем, что координаты находятся в пределах доски
+        if not (0 <= r1 < self.rows and 0 <= c1 < self.cols and \
+                0 <= r2 < self.rows and 0 <= c2 < self.cols):
+            return False # Выход за границы доски
+
+        # Выполняем фактический обмен элементами в логической модели доски
+        self.board[r1][c1], self.board[r2][c2] = self.board[r2][c2], self.board[r1][c1]
+        self._after_swap(r1, c1, r2, c2)
+        self._mark_dirty((r1, r2), (c1, c2)) # Серии могли появиться только через эти линии
+        return True
+
+    def _after_swap(self, r1, c1, r2, c2):
+        """
+        Вызывается бэкендами в swap_elements после обмена значений: переносит
+        специальные свойства и обновляет ключ Zobrist (если он ведётся).
+        """
+        self._swap_specials(r1, c1, r2, c2)
+        if self._zobrist is not None:
+            values = zobrist_table(self.rows, self.cols, self.num_types)[0]
+            width = self.num_types + 1
+            a, b = self.board[r1][c1], self.board[r2][c2]
+            if a != b:
+                first, second = (r1 * self.cols + c1) * width, (r2 * self.cols + c2) * width
+                self._zobrist ^= values[first + a] ^ values[first + b] ^ values[second + a] ^ values[second + b]
+
+    def _swap_specials(self, r1, c1, r2, c2):
+        """Переносит специальные свойства двух клеток вместе с обменом их элементов."""
+        specials = self.specials
+        if (r1, c1) in specials or (r2, c2) in specials:
+            first, second = specials.pop((r1, c1), None), specials.pop((r2, c2), None)
+            if first is not None:
+                specials[(r2, c2)] = first
+            if second is not None:
+                specials[(r1, c1)] = second
+
+    def find_matches(self):
+        """
+        Находит все совпадения (3 или более одинаковых элемента) на доске.
+        Возвращает список уникальных координат [(строка, столбец)] всех найденных совпадений.
+        """
+        if not self.incremental:
+            matches, _, _ = self._scan_matches(range(self.rows), range(self.cols))
+            return list(matches) # Преобразуем set обратно в список для возврата
+
+        matches, rows_with_runs, cols_with_runs = self._scan_matches(
+            sorted(self._dirty_rows), sorted(self._dirty_cols), self._dirty_box)
+        # Линии с найденными сериями остаются "грязными": пока совпадения не удалены,
+        # повторный поиск должен снова их вернуть, как при полном сканировании.
+        # Прямоугольник изменений при этом сохраняется - найденные серии лежат в нём.
+        self._dirty_rows = rows_with_runs
+        self._dirty_cols = cols_with_runs
+        if not matches:
+            self._dirty_box = None
+
+        if self.verify_incremental:
+            full_matches, _, _ = self._scan_matches(range(self.rows), range(self.cols))
+            if matches != full_matches:
+                raise AssertionError(
+                    f"Инкрементальный поиск расходится с полным: "
+                    f"лишние {sorted(matches - full_matches)}, "
+                    f"пропущенные {sorted(full_matches - matches)}")
+        return list(matches)
+
+    def _scan_matches(self, rows, cols, box=None):
+        """
+        Ищет серии из трёх и более одинаковых элементов: горизонтальные в строках rows
+        и вертикальные в столбцах cols. Если задан прямоугольник изменений
+        box = (первая строка, последняя строка, первый столбец, последний столбец),
+        проверяются только серии, задевающие его.
+        Возвращает (множество координат, строки с сериями, столбцы с сериями).
+        """
+        matches = set() # Используем set для автоматического исключения дубликатов координат
+        rows_with_runs = set()
+        cols_with_runs = set()
+        c_start, c_stop = 0, self.cols - 2 # Допустимые начала горизонтальных серий
+        r_start, r_stop = 0, self.rows - 2 # и вертикальных
+        if box is not None:
+            r_lo, r_hi, c_lo, c_hi = box
+            c_start, c_stop = max(0, c_lo - 2), min(c_stop, c_hi + 1)
+            r_start, r_stop = max(0, r_lo - 2), min(r_stop, r_hi + 1)
+
+        # Поиск горизонтальных совпадений
+        for r in rows:
+            for c in range(c_start, c_stop): # Идём до предпоследнего элемента
+                if self.board[r][c] == self.board[r][c+1] == self.board[r][c+2] and self.board[r][c] != 0:
+                    for i in range(3):
+                        matches.add((r, c + i)) # Добавляем координаты всех трёх элементов совпадения
+                    rows_with_runs.add(r)
+
+        # Поиск вертикальных совпадений
+        for c in cols:
+            for r in range(r_start, r_stop): # Идём до предпоследней строки
+                if self.board[r][c] == self.board[r+1][c] == self.board[r+2][c] and self.board[r][c] != 0:
+                    for i in range(3):
+                        matches.add((r + i, c)) # Добавляем координаты всех трёх элементов совпадения
+                    cols_with_runs.add(c)
+        return matches, rows_with_runs, cols_with_runs
+
+    def remove_matches(self, matches):
+        """
+        Удаляет найденные совпадения, заменяя их на 0 (пустое место).
+        Возвращает количество удалённых элементов (очков).
+        """
+        if not matches:
+            return 0 # Если совпадений нет, возвращаем 0 очков
+        if self._zobrist is not None:
+            self._zobrist_cells(matches)
+
+        score = 0
+        for r, c in matches:
+            self.board[r][c] = 0 # Устанавливаем элемент в 0 (пустое)
+            self._emptied_cols.add(c)
+            score += 1 # Увеличиваем счёт за каждый удалённый элемент
+        return score
+
+    def drop_elements(self):
+        """
+        Опускает элементы, чтобы заполнить пустые места (0),
+        и генерирует новые случайные элементы в верхней части столбцов.
+
+        Читаются только столбцы, где remove_matches оставил пустые клетки (_emptied_cols):
+        каждый такой столбец уплотняется целиком (filter), а сверху добавляются новые
+        элементы из очереди появления - все новые элементы шага берутся из неё одним вызовом.
+        Если изменилась большая часть столбцов, доска транспонируется одним zip
+        и строки переписываются срезом; иначе клетки записываются по столбцам.
+        В обоих случаях запись идёт только до самой нижней изменившейся строки,
+        поэтому на больших полях падение стоит пропорционально изменённой области.
+        Возвращает FallMap - карту падения элементов в координатах после падения.
+        """
+        board = self.board
+        rows = self.rows
+        candidates = sorted(self._emptied_cols)
+        self._emptied_cols = set()
+        by_columns = len(candidates) * 2 < self.cols # Мало столбцов - не транспонируем всю доску
+        if by_columns:
+            columns = {c: [row[c] for row in board] for c in candidates}
+        else:
+            columns = list(zip(*board)) # Столбцы доски сверху вниз
+        changed = [(c, list(filter(None, columns[c]))) for c in candidates if 0 in columns[c]]
+        spawns = self._take_spawns(sum(rows - len(kept) for _, kept in changed))
+
+        falls = FallMap()
+        lowest_changed_row = -1 # Самая нижняя строка, изменившаяся хотя бы в одном столбце
+        start = 0
+        for c, kept in changed:
+            column = columns[c]
+            missing = rows - len(kept)
+            falls.add_column(c, column, missing)
+            lowest_changed_row = max(lowest_changed_row, rows - 1 - column[::-1].index(0))
+            columns[c] = spawns[start:start + missing] + kept
+            start += missing
+        # Ниже самой нижней пустой клетки ничего не сдвигается
+        if by_columns:
+            for c, _ in changed:
+                column = columns[c]
+                for r in range(lowest_changed_row + 1):
+                    board[r][c] = column[r]
+        else:
+            for r, row in zip(range(lowest_changed_row + 1), zip(*columns)):
+                board[r][:] = row
+        self._mark_dirty(range(lowest_changed_row + 1), [c for c, _ in changed])
+        self._after_drop(falls)
+        return falls
+
+    def _take_spawns(self, count):
+        """
+        Выдаёт count значений новых элементов из очереди появления,
+        пополняя её пачкой из SPAWN_BATCH (или больше) значений одним вызовом генератора.
+        """
+        queue = self._spawn_queue
+        if len(queue) < count:
+            queue.extend(self.rng.choices(range(1, self.num_types + 1), k=max(count, SPAWN_BATCH)))
+        spawns = queue[:count]
+        del queue[:count]
+        return spawns
+
+    def resolve_move(self, r1, c1, r2, c2, with_boards=False, profiler=NULL_PROFILER):
+        """
+        Выполняет ход целиком за один синхронный вызов, без UI и анимаций:
+        обмен, затем все каскады (поиск, удаление, падение) до стабильного поля.
+        Если обмен не дал совпадений, он откатывается, а глубина каскада равна 0.
+        Возвращает MoveResult или None, если обмен невозможен (клетки не соседние).
+        При with_boards=True каждый шаг хранит копию доски после падения (для анимации),
+        а результат - копию финальной доски; без него копии не делаются (board равен None),
+        и ход на большом поле стоит пропорционально изменённой области, а не всему полю.
+        with_boards может быть и окном (первая строка, последняя строка, первый столбец,
+        последний столбец): тогда копируется только оно (BoardWindow) - экрану большого
+        поля не нужны копии всего поля на каждом из сотен шагов каскада.
+        profiler (profiler.Profiler) получает время find_matches/remove_matches/drop_elements
+        (и specials - разбор фигур и эффекты специальных элементов) по шагам каскада;
+        поиск после падения относится к шагу, который его вызвал.
+
+        Со special_tiles обмен цветной бомбы результативен и без совпадения, а очки шага -
+        это удалённые клетки плюс бонусы за фигуры (см. _apply_specials).
+        """
+        if not self.swap_elements(r1, c1, r2, c2):
+            return None
+
+        if isinstance(with_boards, tuple):
+            window = with_boards
+            first_row, last_row, first_col, last_col = window
+            copy_board = lambda: BoardWindow(self.board, *window)
+            copy_specials = lambda: {(r, c): kind for (r, c), kind in self.specials.items()
+                                     if first_row <= r <= last_row and first_col <= c <= last_col}
+        elif with_boards:
+            copy_board = self.to_list
+            copy_specials = lambda: dict(self.specials)
+        else:
+            copy_board = copy_specials = lambda: None
+
+        find_matches, remove_matches, drop_elements, apply_specials = \
+            self.find_matches, self.remove_matches, self.drop_elements, self._apply_specials
+        # Без профилирования цикл не платит ни за какие замеры и не трогает профайлер:
+        # общий выключенный NULL_PROFILER одновременно используют несколько потоков
+        profiling = profiler.enabled
+        if profiling:
+            profiler.begin_move()
+            find_matches = profiler.timed('find_matches', find_matches)
+            remove_matches = profiler.timed('remove_matches', remove_matches)
+            drop_elements = profiler.timed('drop_elements', drop_elements)
+            apply_specials = profiler.timed('specials', apply_specials)
+            profiler.step = 0
+
+        matches = find_matches()
+        triggers = self._swap_triggers(r1, c1, r2, c2)
+        if not matches and not triggers:
+            self.swap_elements(r1, c1, r2, c2) # Откатываем бесполезный обмен
+            return MoveResult([], 0, copy_board(), 0)
+
+        steps = []
+        total_score = 0
+        moved = {(r1, c1), (r2, c2)} # Клетки, куда игрок поставил элементы
+        while matches or triggers: # Разрешаем цепные реакции до тех пор, пока появляются совпадения
+            if profiling:
+                profiler.step = len(steps)
+            bonus = 0
+            if self.special_tiles:
+                matches, bonus = apply_specials(matches, moved, triggers)
+            score = remove_matches(matches) + bonus
+            falls = drop_elements()
+            steps.append(CascadeStep(matches, score, copy_board(), falls, copy_specials()))
+            total_score += score
+            moved, triggers = (), None
+            matches = find_matches()
+        return MoveResult(steps, total_score, copy_board(), len(steps))
+
+    def _swap_triggers(self, r1, c1, r2, c2):
+        """
+        Цветные бомбы, активированные обменом (r1, c1)-(r2, c2), уже выполненным:
+        {клетка бомбы: цвет элемента, с которым её поменяли}.
+        """
+        triggers = {}
+        if self.specials:
+            for (r, c), (pr, pc) in (((r1, c1), (r2, c2)), ((r2, c2), (r1, c1))):
+                if self.specials.get((r, c)) == COLOR_BOMB:
+                    triggers[(r, c)] = self.board[pr][pc]
+        return triggers
+
+    def _apply_specials(self, matches, moved, triggers):
+        """
+        Разбирает совпадения шага на фигуры и применяет специальные элементы.
+
+        Серии восстанавливаются одним проходом по matches (find_runs) и объединяются
+        в фигуры (group_runs). На шаге хода игрока (moved - переставленные им клетки)
+        фигура из 4+ клеток оставляет на одной из своих клеток новый специальный элемент
+        (вид - special_for, клетка - creation_cell), а остальные её клетки удаляются;
+        в цепной реакции (moved пусто) фигуры приносят только бонус.
+        Затем все сработавшие элементы (удаляемые клетки и цветные бомбы из triggers)
+        одной пачкой добавляют свои области к удаляемым клеткам (expand_effects).
+        Возвращает (множество удаляемых клеток, бонус очков за фигуры).
+        """
+        created = {}
+        bonus = 0
+        for group in group_runs(find_runs(self.board, matches)):
+            bonus += group_bonus(group)
+            kind = special_for(group) if moved else None
+            cell = creation_cell(group, moved, self.specials) if kind else None
+            if cell is not None:
+                created[cell] = kind
+
+        removed = set(matches).difference(created)
+        expand_effects(self.board, self.rows, self.cols, self.specials, removed, triggers, created)
+        for cell in [cell for cell in self.specials if cell in removed]:
+            del self.specials[cell] # Сработавшие элементы исчезают вместе с клетками
+        self.specials.update(created)
+        return removed, bonus
+
+    def _after_drop(self, falls):
+        """
+        Вызывается бэкендами в конце drop_elements с картой падения falls.
+        Переносит специальные элементы на их места после падения, затем проверяет тупик:
+        если поле стабильно (нет совпадений) и на нём нет ни одного хода, доска перемешивается.
+        """
+        if self._zobrist is not None:
+            self._zobrist_drop(falls)
+        if self.specials:
+            self.specials = dict(zip(falls.destinations(self.specials), self.specials.values()))
+        # Сначала дешёвая проверка ходов (обычно находит ход почти сразу),
+        # полный поиск совпадений нужен только в редком случае тупика.
+        if self.auto_reshuffle and not self.has_legal_moves() and not self.find_matches():
+            self.reshuffle()
+
+    def _zobrist_drop(self, falls):
+        """
+        Обновляет ключ Zobrist по изменившимся столбцам: значения до падения против текущих
+        (только до самой нижней пустой клетки).
+        """
+        values = zobrist_table(self.rows, self.cols, self.num_types)[0]
+        width = self.num_types + 1
+        board, cols = self.board, self.cols
+        key = self._zobrist
+        for c, before in falls.columns():
+            # Ниже самой нижней пустой клетки столбец не изменился
+            changed_rows = len(before) - before[::-1].index(0)
+            for r in range(changed_rows):
+                old, new = before[r], board[r][c]
+                if old != new:
+                    cell = (r * cols + c) * width
+                    key ^= values[cell + old] ^ values[cell + new]
+        self._zobrist = key
+
+    def _special_moves(self):
+        """Обмены цветных бомб с любыми соседями: такие обмены результативны всегда."""
+        for (r, c), kind in self.specials.items():
+            if kind != COLOR_BOMB:
+                continue
+            if r > 0:
+                yield (r - 1, c, r, c)
+            if r + 1 < self.rows:
+                yield (r, c, r + 1, c)
+            if c > 0:
+                yield (r, c - 1, r, c)
+            if c + 1 < self.cols:
+                yield (r, c, r, c + 1)
+
+    def _iter_legal_moves(self):
+        """
+        Генератор результативных обменов (r1, c1, r2, c2) без изменения доски
+        (один и тот же обмен может встретиться несколько раз).
+
+        Любая новая серия из трёх содержит клетку-"слот", куда пришёл элемент,
+        и два одинаковых элемента рядом с ней: пару (XX_ / _XX) или пару с разрывом (X_X).
+        Поэтому достаточно найти все такие шаблоны и проверить соседей слота.
+        """
+        board = self.board
+        rows, cols = self.rows, self.cols
+
+        def slot_moves(value, sr, sc, sources):
+            # Ход результативен, если элемент value может прийти в слот из соседней клетки
+            if not (0 <= sr < rows and 0 <= sc < cols) or board[sr][sc] == value:
+                return
+            for dr, dc in sources:
+                nr, nc = sr + dr, sc + dc
+                if 0 <= nr < rows and 0 <= nc < cols and board[nr][nc] == value:
+                    yield (sr, sc, nr, nc) if (sr, sc) < (nr, nc) else (nr, nc, sr, sc)
+
+        for r in range(rows):
+            row = board[r]
+            for c in range(cols):
+                value = row[c]
+                if value == 0:
+                    continue
+                # Горизонтальные шаблоны: пара (r, c)-(r, c+1) и разрыв (r, c)_(r, c+2)
+                if c + 1 < cols and row[c + 1] == value:
+                    yield from slot_moves(value, r, c - 1, ((-1, 0), (1, 0), (0, -1)))
+                    yield from slot_moves(value, r, c + 2, ((-1, 0), (1, 0), (0, 1)))
+                if c + 2 < cols and row[c + 2] == value:
+                    yield from slot_moves(value, r, c + 1, ((-1, 0), (1, 0)))
+                # Вертикальные шаблоны: пара (r, c)-(r+1, c) и разрыв (r, c)_(r+2, c)
+                if r + 1 < rows and board[r + 1][c] == value:
+                    yield from slot_moves(value, r - 1, c, ((0, -1), (0, 1), (-1, 0)))
+                    yield from slot_moves(value, r + 2, c, ((0, -1), (0, 1), (1, 0)))
+                if r + 2 < rows and board[r + 2][c] == value:
+                    yield from slot_moves(value, r + 1, c, ((0, -1), (0, 1)))
+
+    def iter_legal_moves(self):
+        """
+        Генератор результативных обменов (r1, c1, r2, c2), включая обмены цветных бомб,
+        без изменения доски и в произвольном порядке; один обмен может встретиться
+        несколько раз. Нужен тем, кому не нужен весь список сразу (has_legal_moves,
+        перебор с ограничением по времени в MoveAdvisor).
+        """
+        return chain(self._special_moves(), self._iter_legal_moves())
+
+    def legal_moves(self):
+        """
+        Возвращает список всех обменов (r1, c1, r2, c2), после которых появится совпадение
+        (и обменов цветных бомб). Каждый обмен проверяется локально по соседям клеток, без swap/find_matches/откат.
+        """
+        return sorted(set(self.iter_legal_moves()))
+
+    def has_legal_moves(self):
+        """Возвращает True, если на доске есть хотя бы один результативный обмен."""
+        return next(self.iter_legal_moves(), None) is not None
+
+    def reshuffle(self, max_attempts=100):
+        """
+        Перемешивает элементы доски так, чтобы не было готовых совпадений
+        и оставался хотя бы один ход. Если за max_attempts попыток это не удалось,
+        доска создаётся заново (на крошечных досках хода может не быть вовсе).
+        """
+        values = [value for row in self.to_list() for value in row]
+        specials = {r * self.cols + c: kind for (r, c), kind in self.specials.items()}
+        order = list(range(len(values))) # Перемешиваем номера клеток, чтобы элементы
+        for _ in range(max_attempts):    # сохранили свои специальные свойства
+            self.rng.shuffle(order)
+            self.board = [[values[i] for i in order[r * self.cols:(r + 1) * self.cols]]
+                          for r in range(self.rows)]
+            self.specials = {divmod(j, self.cols): specials[i]
+                             for j, i in enumerate(order) if i in specials}
+            self.mark_all_dirty()
+            if self.has_legal_moves() and not self.find_matches():
+                return
+        self.specials = {}
+        for _ in range(max_attempts):
+            self.board = self._create_initial_board()
+            self.mark_all_dirty()
+            if self.has_legal_moves():
+                return
@@ -0,0 +1,735 @@
+"""
+Игровой экран "Три в ряд": доска, анимации ходов, подсказки и профилирование.
+
+Модуль импортируется при первом переходе на экран 'game' (см. LazyScreenManager
+в main.py), вместе с логикой доски: главное меню запускается без него.
+Правила разметки экрана - в game_screen.kv, они загружаются тогда же.
+"""
+import os
+import time
+from functools import partial
+
+from kivy.app import App
+from kivy.uix.button import Button
+from kivy.properties import BooleanProperty, ListProperty, NumericProperty, OptionProperty, StringProperty
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+from animation_scheduler import AnimationScheduler
+from game_board import BoardPool, BoardWindow, GameBoard, difficulty_for
+from persistence import remove_file, write_atomic
+from profiler import NULL_PROFILER, Profiler, write_csv, write_json
+from replay import MoveLog
+from specials import BOMB, COLOR_BOMB, LINE_COL, LINE_ROW
+
+# --- Класс GameScreen: Экран игровой доски и логика UI ---
+class GameScreen(Screen):
+    # Kivy Properties для динамического обновления UI
+    rows = NumericProperty(0)
+    cols = NumericProperty(0)
+    num_types = NumericProperty(5) # Количество типов элементов для игры
+    
+    score = NumericProperty(0)
+    moves_left = NumericProperty(0)
+    target_score = NumericProperty(0)
+
+    selected_coords = ListProperty([]) # Хранит координаты (r, c) выбранной клетки
+    game_board = None # Ссылка на экземпляр GameBoard
+    move_log = None # MoveLog текущей партии (seed доски и результативные обмены)
+    board_pool = None # BoardPool: заранее созданные доски для мгновенного старта партии
+    # Для полей больше этого числа клеток запас не создаётся: генерация огромной доски
+    # в свободном кадре заметно подвесила бы интерфейс, а доска занимает много памяти
+    BOARD_POOL_MAX_CELLS = 10000
+    board_class = GameBoard # Бэкенд логики доски (например, ArrayGameBoard из array_board)
+    
+    animation_in_progress = BooleanProperty(False) # Флаг, блокирующий ввод во время анимаций
+    # Доска, которая сейчас показана на экране. Пока проигрывается результат хода,
+    # логика (game_board) уже находится в финальном состоянии, а экран - в промежуточном.
+    _display_board = None
+    _display_specials = None # Специальные элементы показанной доски (None - как в game_board)
+    _pending_steps = [] # Ещё не показанные шаги каскада текущего хода
+    _resume = None # (доска, MoveLog) восстановленной партии для следующего on_enter
+    _current_step = None # Шаг каскада, который сейчас анимируется
+    _ready_since = 0.0 # Когда доска в последний раз стала доступна для хода (time.monotonic)
+
+    # Постоянный пул кнопок rows×cols: кнопки создаются один раз и обновляются на месте.
+    # False - прежний режим с полным пересозданием сетки (оставлен для сравнения в бенчмарке).
+    use_widget_pool = True
+    # Индекс (r, c) -> кнопка: _cell_widgets[r][c]. Поддерживается отрисовкой,
+    # анимацией обмена и удалением после исчезновения; в режиме пула это и есть пул.
+    _cell_widgets = None
+
+    # Способ отрисовки доски: 'widgets' - кнопка на каждую клетку, 'canvas' - окно просмотра
+    # CanvasBoardWidget (только видимые клетки, прокрутка и масштаб), 'auto' - canvas для больших полей
+    board_renderer = OptionProperty('auto', options=['auto', 'widgets', 'canvas'])
+    CANVAS_RENDERER_MIN_CELLS = 400 # С какого числа клеток 'auto' выбирает canvas (20x20)
+    _canvas_view = None
+
+    # Все анимации доски идут через один планировщик (один колбэк Clock на кадр).
+    # animation_speed ускоряет их (2 - вдвое быстрее), instant_animations отключает совсем.
+    animation_speed = NumericProperty(1.0)
+    instant_animations = BooleanProperty(False)
+    animator = None
+    SWAP_DURATION = 0.3 # Длительность анимации обмена
+    FADE_DURATION = 0.4 # Длительность анимации исчезновения
+    FALL_DURATION = 0.25 # Длительность падения элементов
+    STEP_PAUSE = 0.1 # Пауза между исчезновением и падением
+
+    # Подсказки: MoveAdvisor считает ход в фоновом потоке, экран только подсвечивает его
+    advisor = None
+    HINT_TIME_BUDGET = 0.25 # Сколько секунд советник может думать над подсказкой
+    HINT_COLOR = (1, 1, 1, 1) # Цвет, к которому "пульсируют" клетки подсказанного хода
+    HINT_DURATION = 0.3
+    SELECTED_COLOR = (0.2, 0.8, 0.8, 1) # Подсветка первой выбранной клетки
+    _hint_serial = 0 # Растёт с каждым ходом: ответ на устаревший запрос не показывается
+
+    # Профилирование: время фаз хода по шагам каскада, счётчики и время кадров.
+    # Выключено по умолчанию (NULL_PROFILER ничего не записывает); show_profiler
+    # включает сбор и полупрозрачный оверлей с текстом profiler_text.
+    show_profiler = BooleanProperty(False)
+    profiler_text = StringProperty("")
+    profiler = NULL_PROFILER
+    PROFILER_OVERLAY_INTERVAL = 0.5 # Как часто обновлять текст оверлея, с
+    _profiler_events = ()
+    _step_index = 0 # Номер анимируемого шага каскада в текущем ходе
+
+    # Значки специальных элементов рядом с номером цвета на клетке
+    SPECIAL_MARKS = {LINE_ROW: '-', LINE_COL: '|', BOMB: '*', COLOR_BOMB: '@'}
+
+    def on_enter(self, *args):
+        """
+        Вызывается каждый раз, когда этот экран становится активным.
+        Инициализирует игровую сессию: новую или восстановленную через resume().
+        """
+        resume, self._resume = self._resume, None
+        # Устанавливаем параметры игры (ходы, целевой счёт) в зависимости от выбранного размера поля
+        self.moves_left, self.target_score = difficulty_for(self.rows, self.cols)
+
+        self.score = 0
+        self.selected_coords = []
+        self._display_board = None
+        self._display_specials = None
+        self._pending_steps = []
+        self._hint_serial += 1 # Новая партия: старые подсказки не показываем
+        if self.animator is None:
+            self.animator = AnimationScheduler()
+            self.animator.profiler = self.profiler
+        self.animator.cancel_all()
+        self.on_animation_speed(self, self.animation_speed)
+        if resume is not None:
+            # Партия из автосохранения: счёт и ходы продолжаются с сохранённого места
+            self.game_board, self.move_log = resume
+            self.score = self.move_log.score
+            self.moves_left -= len(self.move_log)
+        else:
+            # Берём новую игровую доску из запаса; запас пополняется в свободном кадре
+            if self.board_pool is None or \
+               not self.board_pool.matches(self.board_class, self.rows, self.cols, self.num_types):
+                pool_size = 2 if self.rows * self.cols <= self.BOARD_POOL_MAX_CELLS else 0
+                self.board_pool = BoardPool(self.board_class, self.rows, self.cols, self.num_types,
+                                            size=pool_size, incremental=True, auto_reshuffle=True)
+            self.game_board = self.board_pool.take()
+            Clock.schedule_once(lambda dt: self.board_pool.fill(), 0.5)
+            # Журнал ходов партии: по нему replay.replay() воспроизводит и проверяет игру,
+            # он же служит автосохранением (см. _autosave)
+            self.move_log = MoveLog.for_board(self.game_board)
+            self._record_event('start', m=self.moves_left, t=self.target_score)
+        
+        self._update_hud() # Обновляем информацию о счете и ходах в UI
+
+        # Обязательная очистка GridLayout перед новой отрисовкой.
+        # Это предотвращает наслоение виджетов при повторном входе на экран.
+        if self.ids.board_layout.children:
+             self.ids.board_layout.clear_widgets()
+        self._cell_widgets = None
+        self._canvas_view = None
+        
+        # Планируем отрисовку доски на следующий кадр.
+        # Это даёт Kivy время на обновление свойств GridLayout (rows/cols) из KV-файла.
+        Clock.schedule_once(self._draw_board, 0)
+        self.animation_in_progress = False # Сбрасываем флаг, чтобы можно было начинать игру
+        self._ready_since = time.monotonic()
+
+    def resume(self, board, move_log):
+        """Готовит продолжение партии (доска и журнал из persistence.restore_game) при следующем входе на экран."""
+        self.rows = board.rows
+        self.cols = board.cols
+        self.num_types = board.num_types
+        self._resume = (board, move_log)
+
+    def _autosave(self):
+        """
+        Передаёт журнал ходов в фоновый поток сохранения. Задачи с ключом 'autosave'
+        схлопываются, так что при быстрых ходах записывается только последнее состояние.
+        """
+        app = App.get_running_app()
+        app.persistence.submit(partial(write_atomic, app.autosave_path(), self.move_log.to_bytes()),
+                               key='autosave')
+
+    def _record_event(self, kind, **fields):
+        """Передаёт событие телеметрии партии (см. telemetry.py) в фоновый поток сохранения."""
+        App.get_running_app().record_event(dict(e=kind, k=f"{self.rows}x{self.cols}", **fields))
+
+    def on_leave(self, *args):
+        """
+        Вызывается каждый раз, когда этот экран покидает видимость.
+        Проводит принудительную очистку GridLayout.
+        """
+        self._hint_serial += 1 # Ответ советника после ухода с экрана не показываем
+        if self.profiler.enabled:
+            self.dump_profile()
+        if self.animator is not None:
+            self.animator.cancel_all() # Не даём колбэкам анимаций сработать на другом экране
+
+        # Принудительно очищаем виджеты при выходе с экрана.
+        # Это критично для избежания "слишком много детей" ошибки при возвращении
+        # на экран с другой сложностью/размером.
+        if self.ids.board_layout.children:
+            self.ids.board_layout.clear_widgets()
+        self._cell_widgets = None
+        self._canvas_view = None
+
+    def on_animation_speed(self, instance, value):
+        """Передаёт скорость и режим мгновенных анимаций планировщику."""
+        if self.animator is not None:
+            self.animator.speed = value
+            self.animator.instant = self.instant_animations or value <= 0
+
+    def on_instant_animations(self, instance, value):
+        self.on_animation_speed(self, self.animation_speed)
+
+    def on_animation_in_progress(self, instance, value):
+        """Пока проигрывается ход, окно просмотра доски не прокручивается и не масштабируется."""
+        if self._canvas_view is not None:
+            self._canvas_view.locked = value
+        if not value:
+            self._ready_since = time.monotonic() # Время на ход считается с момента, когда ход возможен
+
+    def _grid_pos(self, r, c):
+        """Позиция клетки (r, c) на экране (строка 0 - сверху)."""
+        if self._canvas_view is not None:
+            return self._canvas_view.cell_pos(r, c) # С учётом прокрутки окна просмотра
+        button_width, button_height, spacing_x, spacing_y = self._cell_geometry()
+        return (self.ids.board_layout.x + c * (button_width + spacing_x),
+                self.ids.board_layout.y + (self.rows - 1 - r) * (button_height + spacing_y))
+
+    def _update_hud(self):
+        """Обновляет текст в метке, отображающей текущий счёт и оставшиеся ходы."""
+        self.ids.score_label.text = (
+            f"Счет: {self.score} / {self.target_score}\n"
+            f"Ходов: {self.moves_left}"
+        )
+
+    def _draw_board(self, *args):
+        """
+        Отрисовывает игровое поле на основе текущего состояния self.game_board.board
+        (или промежуточной доски, если сейчас проигрывается ход).
+        """
+        step = self._step_index if self._current_step is not None else None
+        with self.profiler.phase('draw_board', step):
+            if self._uses_canvas_renderer():
+                self._update_canvas_board()
+            elif self.use_widget_pool:
+                self._update_board()
+            else:
+                self._rebuild_board()
+
+    def _uses_canvas_renderer(self):
+        """Определяет, рисовать ли доску инструкциями canvas вместо кнопок."""
+        if self.board_renderer == 'auto':
+            return self.rows * self.cols >= self.CANVAS_RENDERER_MIN_CELLS
+        return self.board_renderer == 'canvas'
+
+    def _update_canvas_board(self):
+        """
+        Отрисовывает доску одним CanvasBoardWidget, растянутым на всю сетку.
+        Виджет показывает только клетки в окне просмотра; клетку (r, c) возвращает
+        _widget_at через CanvasBoardWidget.cell, а не индекс _cell_widgets.
+        """
+        # Сетка содержит единственный виджет - всю доску
+        self.ids.board_layout.cols = 1
+        self.ids.board_layout.rows = 1
+
+        if not self.game_board:
+            return
+
+        view = self._canvas_view
+        if view is None or view.rows != self.rows or view.cols != self.cols or \
+           view.parent is not self.ids.board_layout:
+            if self.ids.board_layout.children:
+                self.ids.board_layout.clear_widgets()
+            from canvas_board import CanvasBoardWidget # Нужен только большим полям
+            view = CanvasBoardWidget(self.rows, self.cols, self.on_element_press,
+                                     on_viewport_change=self._on_viewport_change)
+            view.locked = self.animation_in_progress
+            self.profiler.count('widgets_created', 1) # Один виджет на всю доску
+            self.ids.board_layout.add_widget(view)
+            self._canvas_view = view
+            self._cell_widgets = None
+
+        board = self._display_board if self._display_board is not None else self.game_board.board
+        created = view.update(board, self._layout_spacing(), self._get_element_color,
+                              self._element_text, self._shown_specials())
+        self.profiler.count('canvas_cells_created', created)
+
+    def _on_viewport_change(self):
+        """Окно просмотра прокручено или масштабировано: перерисовываем видимые клетки."""
+        self._draw_board()
+        if self.selected_coords:
+            # Выбранная клетка могла уйти из окна и вернуться: восстанавливаем подсветку
+            widget = self._widget_at(*self.selected_coords)
+            if widget is not None:
+                widget.background_color = self.SELECTED_COLOR
+
+    def _layout_spacing(self):
+        """Возвращает (spacing_x, spacing_y) сетки доски."""
+        spacing_x = self.ids.board_layout.spacing[0] if len(self.ids.board_layout.spacing) > 0 else 0
+        spacing_y = self.ids.board_layout.spacing[1] if len(self.ids.board_layout.spacing) > 1 else 0
+        return spacing_x, spacing_y
+
+    def _cell_geometry(self):
+        """Возвращает (ширина, высота, spacing_x, spacing_y) кнопки клетки."""
+        if self._canvas_view is not None:
+            return (*self._canvas_view.cell_size, *self._canvas_view.spacing)
+        spacing_x, spacing_y = self._layout_spacing()
+
+        button_width = (self.ids.board_layout.width - (self.cols - 1) * spacing_x) / self.cols
+        button_height = (self.ids.board_layout.height - (self.rows - 1) * spacing_y) / self.rows
+        return max(0, button_width), max(0, button_height), spacing_x, spacing_y
+
+    def _build_widget_pool(self):
+        """Создаёт пул кнопок rows×cols. Вызывается при первом показе или смене размера поля."""
+        if self.ids.board_layout.children:
+            self.ids.board_layout.clear_widgets()
+        self._canvas_view = None
+
+        self._cell_widgets = []
+        self.profiler.count('widgets_created', self.rows * self.cols)
+        for r in range(self.rows):
+            row_widgets = []
+            for c in range(self.cols):
+                button = Button(font_size='32sp', size_hint=(None, None))
+                button.coords = (r, c)
+                button.element_value = None # Значение ещё не показано - обновится при отрисовке
+                button.special = None
+                button.bind(on_release=self.on_element_press)
+                self.ids.board_layout.add_widget(button)
+                row_widgets.append(button)
+            self._cell_widgets.append(row_widgets)
+
+    def _update_board(self):
+        """
+        Обновляет пул кнопок на месте: текст и цвет меняются только у клеток,
+        чьё значение изменилось, а позиция, размер и прозрачность просто
+        возвращаются к значениям сетки (после анимаций обмена и исчезновения).
+        """
+        self.ids.board_layout.cols = self.cols
+        self.ids.board_layout.rows = self.rows
+
+        if not self.game_board:
+            return
+
+        if self._cell_widgets is None or self._canvas_view is not None or \
+           len(self._cell_widgets) != self.rows or \
+           any(len(row_widgets) != self.cols or None in row_widgets for row_widgets in self._cell_widgets):
+            self._build_widget_pool()
+
+        board = self._display_board if self._display_board is not None else self.game_board.board
+        specials = self._shown_specials()
+        button_width, button_height, spacing_x, spacing_y = self._cell_geometry()
+        size = (button_width, button_height)
+
+        for r in range(self.rows):
+            row_widgets = self._cell_widgets[r]
+            board_row = board[r]
+            y = self.ids.board_layout.y + (self.rows - 1 - r) * (button_height + spacing_y)
+            for c in range(self.cols):
+                button = row_widgets[c]
+                element_value = board_row[c]
+                special = specials.get((r, c))
+                if button.element_value != element_value or button.special != special:
+                    button.element_value = element_value
+                    button.special = special
+                    button.text = self._element_text(element_value, special)
+                    button.background_color = self._get_element_color(element_value)
+                # Свойства Kivy не рассылают событий, если значение не изменилось
+                button.opacity = 1
+                button.size = size
+                button.pos = (self.ids.board_layout.x + c * (button_width + spacing_x), y)
+
+    def _rebuild_board(self):
+        """
+        Прежний способ отрисовки: очищает сетку и создаёт кнопку для каждого элемента заново.
+        """
+        self._cell_widgets = [[None] * self.cols for _ in range(self.rows)]
+        self._canvas_view = None
+        # Перед отрисовкой убеждаемся, что сетка абсолютно пуста.
+        if self.ids.board_layout.children:
+            self.ids.board_layout.clear_widgets()
+
+        self.ids.board_layout.cols = self.cols
+        self.ids.board_layout.rows = self.rows
+
+        if self.game_board:
+            board = self._display_board if self._display_board is not None else self.game_board.board
+            specials = self._shown_specials()
+            button_width, button_height, spacing_x, spacing_y = self._cell_geometry()
+            self.profiler.count('widgets_created', self.rows * self.cols)
+
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    element_value = board[r][c]
+                    special = specials.get((r, c))
+                    button = Button(
+                        text=self._element_text(element_value, special),
+                        font_size='32sp',
+                        background_color=self._get_element_color(element_value),
+                        size_hint=(None, None),
+                        size=(button_width, button_height),
+                        pos=(self.ids.board_layout.x + c * (button_width + spacing_x),
+                             self.ids.board_layout.y + (self.rows - 1 - r) * (button_height + spacing_y))
+                    )
+                    button.coords = (r, c)
+                    button.element_value = element_value
+                    button.special = special
+                    button.bind(on_release=self.on_element_press)
+                    self.ids.board_layout.add_widget(button)
+                    self._cell_widgets[r][c] = button
+
+    def _widget_at(self, r, c):
+        """Возвращает кнопку клетки (r, c) за O(1) или None, если её нет на экране."""
+        if self._canvas_view is not None:
+            return self._canvas_view.cell(r, c) # None, если клетка вне окна просмотра
+        if self._cell_widgets is None or not (0 <= r < len(self._cell_widgets)):
+            return None
+        row_widgets = self._cell_widgets[r]
+        return row_widgets[c] if 0 <= c < len(row_widgets) else None
+
+    def _shown_specials(self):
+        """Специальные элементы показанной доски: {(строка, столбец): вид}."""
+        if self._display_specials is not None:
+            return self._display_specials
+        return self.game_board.specials
+
+    def _element_text(self, element_value, special):
+        """Надпись клетки: номер цвета и значок специального элемента, если он есть."""
+        return str(element_value) + self.SPECIAL_MARKS.get(special, '')
+
+    def _get_element_color(self, element_value):
+        """Возвращает RGB-цвет для заданного значения элемента."""
+        colors = {
+            1: (1, 0, 0, 1),    # Красный
+            2: (0, 1, 0, 1),    # Зеленый
+            3: (0, 0, 1, 1),    # Синий
+            4: (1, 1, 0, 1),    # Желтый
+            5: (1, 0, 1, 1),    # Пурпурный
+            0: (0.5, 0.5, 0.5, 1) # Серый для пустых/удаленных элементов
+        }
+        return colors.get(element_value, (0.7, 0.7, 0.7, 1)) # Цвет по умолчанию
+
+    def on_element_press(self, instance):
+        """
+        Обработчик нажатия на кнопку элемента.
+        Управляет выбором элементов и инициирует их обмен.
+        """
+        # Блокируем ввод, если ходы закончились или анимация в процессе
+        if self.moves_left <= 0 or self.animation_in_progress:
+            return
+
+        r, c = instance.coords # Получаем координаты нажатой кнопки
+
+        if not self.selected_coords:
+            # Если это первый выбранный элемент
+            self.selected_coords = [r, c] # Сохраняем его координаты
+            instance.background_color = self.SELECTED_COLOR # Подсвечиваем
+        elif self._widget_at(*self.selected_coords) is None:
+            # Первая выбранная клетка ушла из окна просмотра: выбор начинается заново
+            self.selected_coords = [r, c]
+            instance.background_color = self.SELECTED_COLOR
+        else:
+            # Если это второй выбранный элемент, пытаемся произвести обмен
+            r1, c1 = self.selected_coords[0], self.selected_coords[1]
+            r2, c2 = r, c
+
+            # Находим объекты виджетов для обмена
+            widget1 = self._widget_at(r1, c1)
+            widget2 = self._widget_at(r2, c2)
+            
+            # Сбрасываем подсветку первого элемента, если он был найден
+            if widget1:
+                original_value = self.game_board.board[r1][c1]
+                widget1.background_color = self._get_element_color(original_value)
+
+            # Окно просмотра большого поля не меняется во время хода, поэтому
+            # для анимации достаточно копий только видимой части доски
+            window = self._canvas_view.visible_window() if self._canvas_view is not None else None
+            # Доска, которую экран показывает во время анимации обмена
+            if window is not None:
+                swapped_board = BoardWindow(self.game_board.board, *window)
+            else:
+                swapped_board = self.game_board.to_list()
+            # Специальные элементы переезжают вместе со своими клетками
+            swapped_specials = dict(self.game_board.specials)
+            first, second = swapped_specials.pop((r1, c1), None), swapped_specials.pop((r2, c2), None)
+            if first is not None:
+                swapped_specials[(r2, c2)] = first
+            if second is not None:
+                swapped_specials[(r1, c1)] = second
+
+            # Разрешаем ход целиком в логической модели: обмен и все каскады.
+            # Экран дальше только проигрывает полученный результат.
+            result = self.game_board.resolve_move(r1, c1, r2, c2, with_boards=window or True,
+                                                  profiler=self.profiler)
+            if result is not None and result.depth:
+                self.move_log.record(r1, c1, r2, c2) # В журнал попадают только результативные ходы
+                self.move_log.score += result.score
+                self._autosave()
+                self._record_event('move', s=[r1, c1, r2, c2], d=result.depth,
+                                   x=sum(len(step.removed) for step in result.steps), p=result.score,
+                                   ms=int((time.monotonic() - self._ready_since) * 1000))
+                self._hint_serial += 1 # Подсказка для прежней доски больше не актуальна
+            if result is not None:
+                self.animation_in_progress = True # Устанавливаем флаг, блокирующий ввод
+                swapped_board[r1][c1], swapped_board[r2][c2] = swapped_board[r2][c2], swapped_board[r1][c1]
+                self._display_board = swapped_board
+                self._display_specials = swapped_specials
+
+                # Вычисляем целевые позиции для анимации обмена
+                target_pos1 = self._grid_pos(r2, c2)
+                target_pos2 = self._grid_pos(r1, c1)
+
+                swap_started = time.perf_counter()
+
+                # Колбэк, который будет вызван после завершения анимации обмена
+                def on_swap_complete():
+                    self.profiler.add('swap_animation', time.perf_counter() - swap_started, 0)
+                    if result.depth:
+                        # Виджеты поменялись местами на экране - обновляем их координаты
+                        widget1.coords, widget2.coords = (r2, c2), (r1, c1)
+                        if self._canvas_view is not None:
+                            self._canvas_view.swap_cells(r1, c1, r2, c2)
+                        elif self._cell_widgets is not None:
+                            self._cell_widgets[r1][c1], self._cell_widgets[r2][c2] = widget2, widget1
+                        self.moves_left -= 1 # Уменьшаем ходы только при успешном совпадении
+                        self._update_hud() # Обновляем UI
+                        self._pending_steps = list(result.steps)
+                        self._step_index = -1
+                        self._play_next_step() # Запускаем проигрывание каскада
+                    else:
+                        # Совпадений нет: resolve_move уже откатил обмен в логике,
+                        # возвращаем элементы обратно на экране
+                        self._display_board = None
+                        self._display_specials = None
+
+                        # Колбэк после завершения обратной анимации
+                        def on_back_complete():
+                            self._draw_board() # Перерисовываем доску, чтобы всё было на своих местах
+                            self.animation_in_progress = False # Сбрасываем флаг, игра готова к новому ходу
+                            self._check_game_over() # Проверяем условия окончания игры
+
+                        self.animator.animate(
+                            [(widget1, {'pos': target_pos2}), (widget2, {'pos': target_pos1})],
+                            self.SWAP_DURATION, on_back_complete, transition='in_out_quad')
+
+                # Оба виджета двигаются одной группой: колбэк срабатывает один раз, когда готовы оба
+                self.animator.animate(
+                    [(widget1, {'pos': target_pos1}), (widget2, {'pos': target_pos2})],
+                    self.SWAP_DURATION, on_swap_complete, transition='in_out_quad')
+                
+            else:
+                # Если обмен невозможен (не соседние элементы), просто сбрасываем флаг
+                self.animation_in_progress = False 
+                self._check_game_over() # Проверяем условия игры (на всякий случай)
+            
+            self.selected_coords = [] # Сбрасываем выбранные координаты
+
+    def show_hint(self):
+        """
+        Запрашивает подсказку у MoveAdvisor. Советник работает в фоновом потоке
+        на копии доски, а ответ возвращается в главный поток через Clock.
+        """
+        if self.game_board is None or self.animation_in_progress or self.moves_left <= 0:
+            return
+        if self.advisor is None:
+            from advisor import MoveAdvisor # Пул потоков советника - только после первой подсказки
+            self.advisor = MoveAdvisor(time_budget=self.HINT_TIME_BUDGET)
+
+        serial = self._hint_serial
+        future = self.advisor.advise_async(self.game_board)
+        future.add_done_callback(
+            lambda done: Clock.schedule_once(lambda dt: self._on_hint_ready(done, serial)))
+
+    def _on_hint_ready(self, future, serial):
+        """Подсвечивает подсказанный ход, если с момента запроса не было ходов."""
+        if serial != self._hint_serial or self.animation_in_progress or future.exception():
+            return
+        hint = future.result()
+        if hint is None:
+            return
+
+        r1, c1, r2, c2 = hint.move
+        if self._canvas_view is not None:
+            self._canvas_view.ensure_visible(r1, c1) # На большом поле ход может быть вне окна
+        highlight, restore = [], []
+        for r, c in ((r1, c1), (r2, c2)):
+            widget = self._widget_at(r, c)
+            if widget is None:
+                continue
+            highlight.append((widget, {'background_color': self.HINT_COLOR}))
+            restore.append((widget, {'background_color': self._get_element_color(self.game_board.board[r][c])}))
+        self.animator.animate(highlight, self.HINT_DURATION,
+                              lambda: self.animator.animate(restore, self.HINT_DURATION),
+                              transition='out_quad')
+
+    def _play_next_step(self, *args):
+        """
+        Проигрывает следующий шаг каскада из результата resolve_move.
+        Когда шаги закончились, возвращает экран к состоянию game_board.
+        """
+        if not self._pending_steps:
+            self._current_step = None
+            self._display_board = None
+            self._display_specials = None
+            self.animation_in_progress = False
+            self._check_game_over()
+            return
+
+        self._current_step = self._pending_steps.pop(0)
+        self._step_index += 1
+        self.process_matches(self._current_step)
+
+    def process_matches(self, step):
+        """
+        Проигрывает удаление совпадений одного шага каскада: начисляет очки,
+        затем инициирует визуальное исчезновение и последующее заполнение.
+        Сама логика доски уже обновлена в GameBoard.resolve_move.
+        """
+        self.score += step.score # Добавляем очки
+        self._update_hud() # Обновляем UI
+
+        widgets_to_animate = []
+        # Собираем список виджетов (кнопок), соответствующих найденным совпадениям
+        for r, c in step.removed:
+            widget = self._widget_at(r, c)
+            if widget is not None:
+                widgets_to_animate.append(widget)
+
+        fade_started = time.perf_counter()
+
+        def on_fade_complete():
+            self.profiler.add('fade_animation', time.perf_counter() - fade_started, self._step_index)
+            # Кнопки из пула не удаляются: _draw_board вернёт им прозрачность и размер
+            if not self.use_widget_pool and self._canvas_view is None:
+                for widget in widgets_to_animate:
+                    if widget.parent:
+                        widget.parent.remove_widget(widget)
+                    r, c = widget.coords
+                    if self._widget_at(r, c) is widget:
+                        self._cell_widgets[r][c] = None
+            self.animator.delay(self.STEP_PAUSE, self._drop_and_refill)
+
+        # Все исчезающие клетки анимируются одной группой
+        self.animator.animate(
+            [(widget, {'opacity': 0, 'size': (1, 1)}) for widget in widgets_to_animate],
+            self.FADE_DURATION, on_fade_complete)
+
+    def _drop_and_refill(self, *args):
+        """
+        Вызывается после исчезновения элементов: показывает доску после падения
+        и заполнения (уже рассчитанную в resolve_move), анимирует падение
+        и переходит к цепной реакции.
+        """
+        self._display_board = self._current_step.board
+        self._display_specials = self._current_step.specials
+        self._draw_board() # Перерисовываем доску, чтобы отобразить новые/перемещенные элементы
+
+        # Клетки уже стоят на своих местах; поднимаем упавшие элементы на высоту падения
+        # и анимируем их возвращение вниз
+        _, cell_height, _, spacing_y = self._cell_geometry()
+        targets = []
+        # Карта падения из drop_elements: упавшие и новые элементы с расстоянием в клетках
+        # (на большом поле - только в окне просмотра)
+        falls = self._current_step.falls
+        if self._canvas_view is not None:
+            falls = falls.items_in(*self._canvas_view.visible_window())
+        else:
+            falls = falls.items()
+        for (r, c), distance in falls:
+            widget = self._widget_at(r, c)
+            if widget is None:
+                continue
+            x, y = self._grid_pos(r, c)
+            widget.pos = (x, y + distance * (cell_height + spacing_y))
+            targets.append((widget, {'pos': (x, y)}))
+        fall_started = time.perf_counter()
+
+        def on_fall_complete():
+            self.profiler.add('fall_animation', time.perf_counter() - fall_started, self._step_index)
+            self._play_next_step()
+
+        self.animator.animate(targets, self.FALL_DURATION, on_fall_complete, transition='out_quad')
+
+    def on_show_profiler(self, instance, value):
+        """Включает или выключает сбор данных профилирования и оверлей."""
+        for event in self._profiler_events:
+            event.cancel()
+        self._profiler_events = ()
+        if value:
+            if self.profiler is NULL_PROFILER:
+                self.profiler = Profiler()
+            self.profiler.enabled = True
+            self._profiler_events = (
+                Clock.schedule_interval(self.profiler.frame, 0), # Время каждого кадра
+                Clock.schedule_interval(self._update_profiler_overlay, self.PROFILER_OVERLAY_INTERVAL),
+            )
+        else:
+            self.profiler.enabled = False
+            self.profiler_text = ""
+        if self.animator is not None:
+            self.animator.profiler = self.profiler
+
+    def _update_profiler_overlay(self, *args):
+        """Обновляет текст оверлея: кадры, фазы последнего хода по шагам и счётчики."""
+        summary = self.profiler.summary()
+        frames = summary['frames']
+        lines = [f"FPS {frames['fps']:.0f}  кадр p95 {frames['p95_ms']:.1f} мс  max {frames['max_ms']:.1f} мс"]
+        for step, phases in self.profiler.last_move().items():
+            lines.append(f"шаг {step}: " + "  ".join(f"{name} {ms:.2f}" for name, ms in phases.items()))
+        lines.append("  ".join(f"{name} {count}" for name, count in sorted(summary['counters'].items())))
+        self.profiler_text = "\n".join(lines)
+
+    def dump_profile(self, directory=None):
+        """
+        Сохраняет собранные данные профилирования в JSON (сводка и шаги)
+        и CSV (шаги) с отметкой времени в имени. Данные копируются здесь, а файлы
+        пишет фоновый поток сохранения. Возвращает пути к файлам.
+        """
+        app = App.get_running_app()
+        directory = directory or app.user_data_dir
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        json_path = os.path.join(directory, f"profile-{stamp}.json")
+        csv_path = os.path.join(directory, f"profile-{stamp}.csv")
+        app.persistence.submit(partial(write_json, json_path, self.profiler.report()))
+        app.persistence.submit(partial(write_csv, csv_path, list(self.profiler.step_rows)))
+        return json_path, csv_path
+
+    def _check_game_over(self):
+        """Проверяет условия окончания игры (победа или поражение)."""
+        if self.score >= self.target_score or self.moves_left <= 0:
+            # Законченную партию продолжать нельзя: удаление заменит ещё не записанное автосохранение
+            app = App.get_running_app()
+            app.persistence.submit(partial(remove_file, app.autosave_path()), key='autosave')
+            self._record_event('end', win=self.score >= self.target_score, p=self.score,
+                               t=self.target_score, l=self.moves_left)
+
+        if self.score >= self.target_score:
+            name_input_screen = self.manager.get_screen('name_input')
+            name_input_screen.last_score = self.score # Передаём финальный счёт
+            name_input_screen.last_difficulty = f"{self.rows}x{self.cols}" # Рекорды ведутся по сложности
+            self.manager.current = 'name_input' # Переходим на экран ввода имени
+        elif self.moves_left <= 0:
+            # Экран строится лениво, поэтому запрашивается только при поражении
+            game_over_screen = self.manager.get_screen('game_over')
+            game_over_screen.win_status = "Поражение"
+            game_over_screen.message = f"Ходы закончились. Ваш счет: {self.score}"
+            self.manager.current = 'game_over' # Переходим на экран окончания игры
@@ -0,0 +1,376 @@
+"""
+Безголовый игровой сервис: сервер сам ведёт партии и проверяет результаты для таблицы рекордов.
+
+Правила берутся из GameBoard.resolve_move (обмен и все каскады за один вызов), так что
+сервису не нужны ни Kivy, ни GameScreen. Клиент получает от сервера seed партии,
+строит у себя ту же доску и присылает ходы пачками; сервер разрешает их на своей
+копии и сам считает очки. Законченные партии целиком (журналы replay.MoveLog)
+можно проверять и пачками - в пуле процессов.
+
+Состояние партии хранится компактно: это её MoveLog (seed и 2 байта на ход) и счёт.
+Живые доски держатся только в ограниченном LRU-кэше; доска, вытесненная из кэша,
+восстанавливается повторным разрешением ходов журнала. Поэтому тысячи одновременных
+партий занимают килобайты, а не тысячи досок.
+
+HTTP API (JSON):
+    POST /sessions                {"rows", "cols", "name"}  -> параметры партии и seed
+    POST /sessions/<id>/moves     {"moves": [[r1, c1, r2, c2], ...]} -> принятые ходы и счёт
+    GET  /sessions/<id>           -> состояние партии
+    POST /validate                {"games": [журнал MoveLog в base64, ...]} -> результаты проверки
+    GET  /leaderboard?difficulty=8x8&n=10
+    GET  /stats                   -> число партий и состояние кэша досок
+
+Запуск на localhost:
+    python game_service.py --port 8765 --workers 4
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from array_board import ArrayGameBoard
+from game_board import difficulty_for
+from highscores import HighscoreStore
+from replay import MoveLog, ReplayResult, replay
+
+NUM_TYPES = 5 # Как у GameScreen
+MIN_BOARD_SIZE = 3
+MAX_BOARD_SIZE = 100 # Сервер не разрешает огромные поля: один ход на них стоит секунды
+
+
+class ServiceError(Exception):
+    """Ошибка запроса к сервису; status - HTTP-код ответа."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _check_log(log):
+    """
+    Причина отказа или None. Журнал приходит от клиента, поэтому до построения доски
+    он проверяется на те же ограничения, что и партии create_session: иначе клиент
+    мог бы заставить пул строить и разрешать поля любого размера.
+    """
+    if not (MIN_BOARD_SIZE <= log.rows <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= log.cols <= MAX_BOARD_SIZE):
+        return f"размер поля должен быть от {MIN_BOARD_SIZE} до {MAX_BOARD_SIZE}"
+    if log.num_types != NUM_TYPES:
+        return f"число типов элементов должно быть {NUM_TYPES}"
+    moves_limit, _ = difficulty_for(log.rows, log.cols)
+    if len(log) > moves_limit:
+        return f"ходов больше лимита ({moves_limit})"
+    return None
+
+
+def _validate_log(data):
+    """
+    Выполняется в процессе пула: проверяет один журнал (MoveLog.to_bytes)
+    по ограничениям сервиса (_check_log) и правилам replay() и возвращает ReplayResult.
+    """
+    try:
+        log = MoveLog.from_bytes(data)
+    except ValueError as error:
+        return ReplayResult(False, 0, 0, str(error))
+    error = _check_log(log)
+    if error is not None:
+        return ReplayResult(False, 0, len(log), error)
+    return replay(log)
+
+
+# --- Класс _Session: Компактное состояние одной партии ---
+class _Session:
+    __slots__ = ('log', 'name', 'moves_limit', 'target_score', 'finished', 'touched', 'lock')
+
+    def __init__(self, log, name, moves_limit, target_score):
+        self.log = log # MoveLog: seed, принятые ходы и пересчитанный сервером счёт
+        self.name = name
+        self.moves_limit = moves_limit
+        self.target_score = target_score
+        self.finished = False
+        self.touched = time.monotonic() # Время последнего запроса (для истечения)
+        self.lock = threading.Lock() # Ходы одной партии разрешаются строго по очереди
+
+
+# --- Класс GameService: Партии, проверка журналов и таблица рекордов без HTTP ---
+class GameService:
+    """
+    Ядро сервиса, которое можно вызывать напрямую (тесты, нагрузочный стенд)
+    или через HTTP (ServiceHandler). Потокобезопасно: партии блокируются по отдельности.
+    """
+
+    def __init__(self, scores_path, board_class=ArrayGameBoard, workers=None,
+                 board_cache_size=1024, session_ttl=3600, batch_chunk=16):
+        self.board_class = board_class
+        self.workers = workers or os.cpu_count() or 1
+        self.board_cache_size = board_cache_size # Сколько живых досок держать в памяти
+        self.session_ttl = session_ttl # Через сколько секунд без запросов партия забывается
+        self.batch_chunk = batch_chunk # Журналов на одну задачу пула при пакетной проверке
+        self.scores = HighscoreStore(scores_path)
+        self._scores_lock = threading.Lock() # HighscoreStore не потокобезопасен
+        self._sessions = {}
+        self._boards = OrderedDict() # id партии -> доска (LRU)
+        self._lock = threading.Lock() # Словарь партий и кэш досок
+        self._rng = random.SystemRandom() # Seed и id партий клиент угадать не должен
+        self._executor = None
+        self.board_rebuilds = 0 # Сколько раз доска восстанавливалась по журналу (промахи кэша)
+
+    def create_session(self, rows, cols, name=''):
+        """Начинает партию: сервер выбирает seed. Возвращает описание партии для клиента."""
+        if not (MIN_BOARD_SIZE <= rows <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= cols <= MAX_BOARD_SIZE):
+            raise ServiceError(f"размер поля должен быть от {MIN_BOARD_SIZE} до {MAX_BOARD_SIZE}")
+        moves_limit, target_score = difficulty_for(rows, cols)
+        log = MoveLog(rows, cols, NUM_TYPES, self._rng.getrandbits(64))
+        session = _Session(log, str(name)[:64], moves_limit, target_score)
+        session_id = f'{self._rng.getrandbits(64):016x}'
+        with self._lock:
+            self._expire_sessions()
+            self._sessions[session_id] = session
+        return dict(self._describe(session), id=session_id)
+
+    def submit_moves(self, session_id, moves):
+        """
+        Разрешает пачку ходов партии по порядку. Первый недопустимый ход останавливает
+        пачку: его и следующие ходы сервер не принимает. Закончившаяся партия
+        (цель достигнута или ходы кончились) попадает в таблицу рекордов.
+        Возвращает состояние партии и число принятых ходов.
+        """
+        session = self._session(session_id)
+        accepted = 0
+        error = None
+        with session.lock:
+            board = self._board(session_id, session)
+            log = session.log
+            for move in moves:
+                if session.finished:
+                    error = "партия уже закончена"
+                    break
+                try:
+                    r1, c1, r2, c2 = (int(value) for value in move)
+                except (TypeError, ValueError):
+                    error = f"ход {move!r} должен быть четырьмя числами"
+                    break
+                result = board.resolve_move(r1, c1, r2, c2)
+                if result is None or not result.depth:
+                    error = f"ход {[r1, c1, r2, c2]} не даёт совпадений"
+                    break
+                log.record(r1, c1, r2, c2)
+                log.score += result.score
+                accepted += 1
+                if log.score >= session.target_score or len(log) >= session.moves_limit:
+                    self._finish(session_id, session)
+            session.touched = time.monotonic()
+            return dict(self._describe(session), accepted=accepted, error=error)
+
+    def session_status(self, session_id):
+        """Текущее состояние партии."""
+        session = self._session(session_id)
+        with session.lock:
+            return self._describe(session)
+
+    def _session(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            raise ServiceError("партия не найдена", status=404)
+        return session
+
+    def _describe(self, session):
+        log = session.log
+        return {'rows': log.rows, 'cols': log.cols, 'num_types': log.num_types, 'seed': log.seed,
+                'moves_limit': session.moves_limit, 'target_score': session.target_score,
+                'moves_left': session.moves_limit - len(log), 'score': log.score,
+                'finished': session.finished}
+
+    def _board(self, session_id, session):
+        """
+        Доска партии из LRU-кэша. Если её вытеснили, она восстанавливается
+        по журналу: новая доска с тем же seed и все принятые ходы заново.
+        """
+        with self._lock:
+            board = self._boards.get(session_id)
+            if board is not None:
+                self._boards.move_to_end(session_id)
+                return board
+        log = session.log
+        board = self.board_class(log.rows, log.cols, log.num_types, incremental=True,
+                                 auto_reshuffle=log.auto_reshuffle,
+                                 special_tiles=log.special_tiles, seed=log.seed)
+        for move in log.moves():
+            board.resolve_move(*move)
+        with self._lock:
+            self.board_rebuilds += 1
+            self._boards[session_id] = board
+            while len(self._boards) > self.board_cache_size:
+                self._boards.popitem(last=False)
+        return board
+
+    def _finish(self, session_id, session):
+        """Закрывает партию и записывает результат в таблицу рекордов."""
+        session.finished = True
+        with self._lock:
+            self._boards.pop(session_id, None) # Доска закончившейся партии больше не нужна
+        log = session.log
+        with self._scores_lock:
+            self.scores.add({'name': session.name, 'score': log.score,
+                             'difficulty': f'{log.rows}x{log.cols}'})
+
+    def _expire_sessions(self):
+        """Забывает партии без запросов дольше session_ttl (вызывается под self._lock)."""
+        deadline = time.monotonic() - self.session_ttl
+        for session_id in [key for key, session in self._sessions.items() if session.touched < deadline]:
+            del self._sessions[session_id]
+            self._boards.pop(session_id, None)
+
+    def validate_batch(self, logs):
+        """
+        Проверяет пачку журналов (MoveLog.to_bytes) в пуле процессов: журналы
+        раздаются работникам кусками по batch_chunk, результаты (ReplayResult)
+        возвращаются в исходном порядке.
+        """
+        if self.workers <= 1:
+            return [_validate_log(data) for data in logs]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._executor.map(_validate_log, logs, chunksize=self.batch_chunk))
+
+    def stats(self):
+        """Число партий, живых досок в кэше и восстановлений досок по журналу."""
+        with self._lock:
+            return {'sessions': len(self._sessions), 'cached_boards': len(self._boards),
+                    'board_rebuilds': self.board_rebuilds}
+
+    def leaderboard(self, n=10, difficulty=None):
+        with self._scores_lock:
+            self.scores.refresh()
+            return self.scores.top(n, difficulty)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# --- Класс ServiceHandler: JSON поверх HTTP для GameService ---
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Постоянные соединения: клиент шлёт много запросов подряд
+    # Заголовки и тело ответа уходят разными записями: без TCP_NODELAY алгоритм Нейгла
+    # вместе с отложенным ACK клиента задерживает каждый ответ на ~40 мс
+    disable_nagle_algorithm = True
+    service = None # GameService, задаётся в make_server
+    MAX_BODY = 16 * 1024 * 1024
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts == ['leaderboard']:
+            query = parse_qs(url.query)
+            self._respond(lambda: {'scores': self.service.leaderboard(
+                int(query.get('n', ['10'])[0]), query.get('difficulty', [None])[0])})
+        elif parts == ['stats']:
+            self._respond(self.service.stats)
+        elif len(parts) == 2 and parts[0] == 'sessions':
+            self._respond(lambda: self.service.session_status(parts[1]))
+        else:
+            self._send(404, {'error': "неизвестный путь"})
+
+    def do_POST(self):
+        parts = urlsplit(self.path).path.strip('/').split('/')
+        if parts == ['sessions']:
+            self._respond(lambda body: self.service.create_session(
+                int(body.get('rows', 8)), int(body.get('cols', body.get('rows', 8))),
+                body.get('name', '')), with_body=True, status=201)
+        elif len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'moves':
+            self._respond(lambda body: self.service.submit_moves(parts[1], body.get('moves', [])),
+                          with_body=True)
+        elif parts == ['validate']:
+            def validate(body):
+                logs = [base64.b64decode(game) for game in body.get('games', [])]
+                return {'results': [result._asdict() for result in self.service.validate_batch(logs)]}
+            self._respond(validate, with_body=True)
+        else:
+            self._send(404, {'error': "неизвестный путь"})
+
+    def _respond(self, handler, with_body=False, status=200):
+        """Вызывает handler (с телом запроса, если with_body) и отправляет его результат как JSON."""
+        try:
+            if with_body:
+                length = self._content_length()
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(body, dict):
+                    raise ServiceError("тело запроса должно быть JSON-объектом")
+                payload = handler(body)
+            else:
+                payload = handler()
+        except ServiceError as error:
+            self._send(error.status, {'error': str(error)})
+        except (ValueError, TypeError) as error:
+            self._send(400, {'error': str(error)})
+        else:
+            self._send(status, payload)
+
+    def _content_length(self):
+        """
+        Длина тела из Content-Length. Без проверки rfile.read(-1) ждал бы закрытия
+        соединения; тело отклонённого запроса не читается, поэтому соединение закрывается.
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ServiceError("неверный Content-Length")
+        if length > self.MAX_BODY:
+            self.close_connection = True
+            raise ServiceError("слишком большой запрос", status=413)
+        return length
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # Журнал каждого запроса под нагрузкой стоит дороже самого запроса
+
+
+def make_server(service, host='127.0.0.1', port=0):
+    """Создаёт ThreadingHTTPServer для service (port=0 - любой свободный порт)."""
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервис проверки партий 'Три в ряд'")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="процессов для пакетной проверки")
+    parser.add_argument('--scores', default='service_highscores.jsonl', help="журнал рекордов")
+    args = parser.parse_args()
+
+    service = GameService(args.scores, workers=args.workers)
+    server = make_server(service, args.host, args.port)
+    print(f"Сервис слушает http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import heapq
+import json
+import os
+from itertools import chain
+
+
+# --- Класс HighscoreStore: Журнал рекордов с дозаписью и топом в памяти ---
+class HighscoreStore:
+    """
+    Хранилище рекордов в формате JSON Lines: одна запись {"name", "score", "difficulty"}
+    на строку. Новые рекорды только дописываются в конец файла (с fsync), поэтому
+    сохранение стоит O(1) вместо перезаписи всего списка.
+
+    В памяти держится ограниченная куча top_k лучших результатов для каждой сложности.
+    Файл перечитывается только если он изменился (inode, время, размер), и только
+    с места, где закончилось прошлое чтение. Когда в журнале набирается больше compact_after
+    строк сверх текущего топа, он атомарно сжимается до топа (временный файл + os.replace).
+    """
+
+    def __init__(self, path, top_k=10, compact_after=500, legacy_path=None):
+        self.path = path
+        self.top_k = top_k
+        # Сколько лишних строк (сверх тех, что останутся после сжатия) допускается в журнале
+        self.compact_after = compact_after
+        self.legacy_path = legacy_path # Старый highscores.json (весь список одним JSON)
+        self._reset()
+
+    def _reset(self):
+        self._heaps = {} # сложность -> мин-куча (очки, -порядковый номер, имя)
+        self._seq = 0 # Порядок добавления: при равных очках выше более ранний рекорд
+        self._offset = 0 # До какого байта файл уже прочитан
+        self._signature = None # (inode, mtime, размер) файла при последнем чтении
+        self._lines = 0 # Сколько записей в журнале (для решения о сжатии)
+        self._retained = 0 # Сколько записей в кучах - столько строк останется после сжатия
+        self._torn_tail = False # Файл оканчивается недописанной строкой (сбой при записи)
+
+    def refresh(self):
+        """Подгружает изменения файла. Если файл не менялся, стоит один os.stat."""
+        self._migrate_legacy()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._signature is not None:
+                self._reset()
+            return
+
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        if self._signature is None or stat.st_ino != self._signature[0] or stat.st_size < self._offset:
+            self._reset() # Файл заменён (например, сжат) - читаем с начала
+        self._read_tail()
+        self._signature = signature
+
+    def _read_tail(self):
+        """Читает только новые полные строки после self._offset."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1 # Недописанный хвост без перевода строки пропускаем
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # Повреждённая строка (сбой посреди записи) - пропускаем
+            if isinstance(entry, dict) and 'score' in entry:
+                self._push(entry)
+                self._lines += 1
+        self._offset += end
+        self._torn_tail = end < len(data)
+
+    def _push(self, entry):
+        """Добавляет запись в кучу своей сложности, вытесняя худший результат при переполнении."""
+        self._seq += 1
+        item = (entry['score'], -self._seq, entry.get('name', ''))
+        heap = self._heaps.setdefault(entry.get('difficulty', ''), [])
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, item)
+            self._retained += 1
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def add(self, entry):
+        """Дописывает рекорд в журнал (с fsync) и обновляет топ в памяти."""
+        self.refresh()
+        data = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        if self._torn_tail:
+            data = b'\n' + data # Отделяем новую запись от недописанной строки
+
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno()) # Запись считается сохранённой только после fsync
+
+        self._push(entry)
+        self._lines += 1
+        self._offset += len(data)
+        self._torn_tail = False
+        stat = os.stat(self.path)
+        self._signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        # Сжатый журнал сам занимает _retained строк (top_k на каждую сложность, а сложностей
+        # с произвольными размерами поля много), поэтому считаются только лишние строки -
+        # иначе после сжатия каждая запись снова переписывала бы весь файл
+        if self._lines - self._retained > self.compact_after:
+            self.compact()
+
+    def top(self, n=10, difficulty=None):
+        """
+        Возвращает n лучших записей (по убыванию очков) в виде словарей.
+        difficulty=None - общий топ по всем сложностям.
+        """
+        if difficulty is None:
+            items = heapq.nlargest(n, chain.from_iterable(self._heaps.values()))
+            difficulties = {item: key for key, heap in self._heaps.items() for item in heap}
+        else:
+            items = heapq.nlargest(n, self._heaps.get(difficulty, []))
+            difficulties = dict.fromkeys(items, difficulty)
+        return [{'name': name, 'score': score, 'difficulty': difficulties[(score, neg_seq, name)]}
+                for score, neg_seq, name in items]
+
+    def compact(self):
+        """Атомарно переписывает журнал, оставляя только текущий топ каждой сложности."""
+        items = sorted(((-neg_seq, score, name, difficulty)
+                        for difficulty, heap in self._heaps.items()
+                        for score, neg_seq, name in heap))
+        self._write_atomic([{'name': name, 'score': score, 'difficulty': difficulty}
+                            for _, score, name, difficulty in items])
+        self._reset()
+        self.refresh()
+
+    def _write_atomic(self, entries):
+        """Записывает журнал во временный файл и подменяет им основной (os.replace атомарен)."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _migrate_legacy(self):
+        """Однократно переносит записи из старого highscores.json, если журнала ещё нет."""
+        if not self.legacy_path or os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+        self._write_atomic([entry for entry in entries if isinstance(entry, dict) and 'score' in entry])
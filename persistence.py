@@ -0,0 +1,153 @@
+"""
+Фоновое сохранение: рекорды и автосохранение партии без файлового ввода-вывода в потоке UI.
+
+PersistenceWorker - один фоновый поток с очередью, который владеет всеми файлами:
+задачи выполняются строго по порядку, а результат возвращается через post
+(в игре - Clock.schedule_once, то есть в главный поток Kivy). Задачи с одинаковым
+ключом схлопываются: пока запись не началась, новая задача заменяет прежнюю,
+поэтому частые автосохранения после каждого хода стоят одну запись на файл.
+
+Автосохранение - это журнал ходов (replay.MoveLog): партия определяется seed и
+результативными обменами, поэтому файл занимает байты, а restore_game восстанавливает
+доску повторным разрешением ходов (в фоновом потоке).
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+
+
+# --- Класс PersistenceWorker: Фоновый поток для файловых операций ---
+class PersistenceWorker:
+    """
+    Очередь задач с одним рабочим потоком (создаётся при первой задаче).
+    post(функция) вызывает функцию в нужном потоке; по умолчанию - прямо в рабочем.
+    """
+
+    def __init__(self, post=None, name='persistence'):
+        self.post = post or (lambda callback: callback())
+        self.name = name
+        self._tasks = deque() # (ключ, функция, Future, колбэк) в порядке постановки
+        self._pending = {} # Ключ -> ещё не начатая задача с этим ключом
+        self._condition = threading.Condition()
+        self._busy = False # Рабочий поток выполняет задачу
+        self._closed = False
+        self._thread = None
+
+    def submit(self, func, callback=None, key=None):
+        """
+        Ставит func() в очередь и возвращает concurrent.futures.Future с её результатом.
+        callback(future) вызывается через post после завершения задачи.
+        Если задан key, ещё не начатая задача с тем же ключом отменяется
+        (её Future получает cancel), а новая встаёт в конец очереди.
+        """
+        future = Future()
+        task = (key, func, future, callback)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("PersistenceWorker закрыт")
+            if key is not None:
+                previous = self._pending.pop(key, None)
+                if previous is not None:
+                    self._tasks.remove(previous)
+                    previous[2].cancel()
+                self._pending[key] = task
+            self._tasks.append(task)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._tasks and not self._closed:
+                    self._condition.wait()
+                if not self._tasks:
+                    return # Очередь пуста и поток закрыт
+                key, func, future, callback = task = self._tasks.popleft()
+                if key is not None and self._pending.get(key) is task:
+                    del self._pending[key]
+                self._busy = True
+                future.set_running_or_notify_cancel()
+
+            try:
+                future.set_result(func())
+            except BaseException as error:
+                future.set_exception(error)
+            if callback is not None:
+                # post может отложить вызов (в игре - до следующего кадра Clock), а переменные
+                # цикла к тому времени уже относятся к другой задаче: связываем значения сейчас
+                self.post(partial(callback, future))
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Ждёт, пока очередь опустеет. Возвращает True, если все задачи выполнены."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._tasks and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        """Выполняет оставшиеся задачи и останавливает поток (новые задачи не принимаются)."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+def write_atomic(path, data):
+    """Записывает байты во временный файл с fsync и подменяет им path (os.replace атомарен)."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def remove_file(path):
+    """Удаляет файл, если он есть."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def restore_game(path, board_class, **board_kwargs):
+    """
+    Восстанавливает партию из автосохранения: (доска, MoveLog) или None,
+    если файла нет или он не воспроизводится (повреждён, другая версия правил),
+    или партия в нём уже закончена (ходы исчерпаны или цель достигнута) - такое
+    автосохранение остаётся, если приложение закрыли во время анимации последнего хода.
+    Доска создаётся с seed журнала, и все его ходы заново разрешаются на ней.
+    """
+    # Не нужны для запуска приложения: только при восстановлении
+    from game_board import difficulty_for
+    from replay import MoveLog
+
+    try:
+        with open(path, 'rb') as f:
+            log = MoveLog.from_bytes(f.read())
+    except (OSError, ValueError):
+        return None
+    moves_limit, target_score = difficulty_for(log.rows, log.cols)
+    if len(log) >= moves_limit or log.score >= target_score:
+        return None
+
+    board = board_class(log.rows, log.cols, log.num_types, auto_reshuffle=log.auto_reshuffle,
+                        special_tiles=log.special_tiles, seed=log.seed, **board_kwargs)
+    score = 0
+    for move in log.moves():
+        result = board.resolve_move(*move)
+        if result is None or not result.depth:
+            return None
+        score += result.score
+    if score != log.score:
+        return None
+    return board, log
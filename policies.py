@@ -0,0 +1,40 @@
+"""
+Стратегии выбора хода для безголовой игры (симулятор, подсказки, тесты).
+
+Стратегия - это функция policy(board, rng), которая получает GameBoard
+и генератор случайных чисел random.Random, а возвращает обмен (r1, c1, r2, c2)
+или None, если ходов нет. Новые стратегии регистрируются в POLICIES.
+"""
+
+
+def immediate_score(board, move):
+    """
+    Очки первого шага каскада для обмена move, без падения и случайных заполнений.
+    Доска возвращается в исходное состояние.
+    """
+    board.swap_elements(*move)
+    score = len(board.find_matches())
+    board.swap_elements(*move)
+    return score
+
+
+def random_policy(board, rng):
+    """Случайный результативный ход."""
+    moves = board.legal_moves()
+    return rng.choice(moves) if moves else None
+
+
+def greedy_policy(board, rng):
+    """Ход с наибольшим числом клеток, удаляемых сразу; ничьи решаются случайно."""
+    moves = board.legal_moves()
+    if not moves:
+        return None
+    scored = [(immediate_score(board, move), move) for move in moves]
+    best = max(score for score, _ in scored)
+    return rng.choice([move for score, move in scored if score == best])
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+}
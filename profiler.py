@@ -0,0 +1,174 @@
+"""
+Профилирование хода: время фаз по шагам каскада, счётчики и время кадров.
+
+Фазы движка (find_matches, remove_matches, drop_elements, specials) замеряет
+GameBoard.resolve_move, если ему передан включённый профайлер; фазы UI (анимации,
+_draw_board), созданные виджеты, запущенные анимации и время кадров Clock - GameScreen.
+Выключенный профайлер (enabled=False) ничего не записывает, а phase() возвращает
+общий пустой контекст, поэтому в выключенном состоянии замеры почти ничего не стоят.
+"""
+import csv
+import json
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+
+_NULL_PHASE = nullcontext() # Общий пустой контекст для выключенного профайлера
+
+
+def _percentile(values, fraction):
+    """Перцентиль по списку значений (ближайший ранг)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _Phase:
+    """Контекст замера одной фазы: при выходе добавляет длительность в профайлер."""
+    __slots__ = ('profiler', 'name', 'step', 'started')
+
+    def __init__(self, profiler, name, step):
+        self.profiler = profiler
+        self.name = name
+        self.step = step
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, time.perf_counter() - self.started, self.step)
+        return False
+
+
+# --- Класс Profiler: Сбор времени фаз, счётчиков и кадров ---
+class Profiler:
+    def __init__(self, enabled=False, max_samples=1000, max_frames=3600, max_step_rows=100000):
+        self.enabled = enabled
+        self.max_samples = max_samples # Сколько последних замеров фазы хранить для перцентилей
+        self.max_frames = max_frames
+        self.max_step_rows = max_step_rows
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает все собранные данные."""
+        self.phases = {} # фаза -> [число замеров, сумма, максимум, последние замеры]
+        self.counters = Counter()
+        self.frame_times = deque(maxlen=self.max_frames)
+        # Строки (ход, шаг каскада, фаза, мс) - для сравнения шагов и выгрузки в CSV
+        self.step_rows = deque(maxlen=self.max_step_rows)
+        self.move = 0 # Номер текущего хода (begin_move)
+        self.step = 0 # Номер текущего шага каскада для обёрток timed
+
+    def begin_move(self):
+        """Отмечает начало нового хода: шаги следующих замеров относятся к нему."""
+        if self.enabled:
+            self.move += 1
+
+    def phase(self, name, step=None):
+        """Контекст замера фазы name (step - номер шага каскада или None)."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name, step)
+
+    def timed(self, name, func):
+        """Обёртка func: каждый вызов замеряется как фаза name текущего шага (self.step)."""
+        def wrapper(*args):
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.add(name, time.perf_counter() - started, self.step)
+        return wrapper
+
+    def add(self, name, seconds, step=None):
+        """Добавляет уже измеренную длительность фазы (например, анимации от старта до колбэка)."""
+        if not self.enabled:
+            return
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = [0, 0.0, 0.0, deque(maxlen=self.max_samples)]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        stats[3].append(seconds)
+        if step is not None:
+            self.step_rows.append((self.move, step, name, seconds * 1000))
+
+    def count(self, name, amount=1):
+        """Увеличивает счётчик name (созданные виджеты, запущенные анимации и т.п.)."""
+        if self.enabled:
+            self.counters[name] += amount
+
+    def frame(self, dt):
+        """Добавляет время кадра (dt из колбэка Clock)."""
+        if self.enabled:
+            self.frame_times.append(dt)
+
+    def summary(self):
+        """Сводка в виде словаря (времена в миллисекундах)."""
+        phases = {}
+        for name, (count, total, longest, samples) in sorted(self.phases.items()):
+            phases[name] = {
+                'count': count,
+                'total_ms': total * 1000,
+                'mean_ms': total / count * 1000,
+                'p95_ms': _percentile(samples, 0.95) * 1000,
+                'max_ms': longest * 1000,
+            }
+        frames = list(self.frame_times)
+        mean_frame = sum(frames) / len(frames) if frames else 0.0
+        return {
+            'phases': phases,
+            'counters': dict(self.counters),
+            'frames': {
+                'count': len(frames),
+                'mean_ms': mean_frame * 1000,
+                'p95_ms': _percentile(frames, 0.95) * 1000,
+                'max_ms': max(frames, default=0.0) * 1000,
+                'fps': 1 / mean_frame if mean_frame else 0.0,
+            },
+        }
+
+    def last_move(self):
+        """Время фаз последнего хода по шагам каскада: {шаг: {фаза: мс}}."""
+        steps = {}
+        for move, step, name, ms in reversed(self.step_rows):
+            if move != self.move:
+                break
+            phases = steps.setdefault(step, {})
+            phases[name] = phases.get(name, 0.0) + ms
+        return dict(sorted(steps.items()))
+
+    def report(self):
+        """Сводка и построчные замеры шагов - независимая копия для записи в другом потоке."""
+        report = self.summary()
+        report['steps'] = [{'move': move, 'step': step, 'phase': name, 'ms': ms}
+                           for move, step, name, ms in self.step_rows]
+        return report
+
+    def dump_json(self, path):
+        """Сохраняет сводку и построчные замеры шагов в JSON."""
+        write_json(path, self.report())
+
+    def dump_csv(self, path):
+        """Сохраняет построчные замеры шагов (ход, шаг, фаза, мс) в CSV."""
+        write_csv(path, list(self.step_rows))
+
+
+def write_json(path, report):
+    """Записывает отчёт Profiler.report() в JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+def write_csv(path, step_rows):
+    """Записывает строки замеров шагов (ход, шаг, фаза, мс) в CSV."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['move', 'step', 'phase', 'ms'])
+        writer.writerows(step_rows)
+
+
+NULL_PROFILER = Profiler() # Выключенный профайлер по умолчанию
@@ -0,0 +1,156 @@
+"""
+Журнал ходов партии и безголовое воспроизведение для проверки результата.
+
+Партия полностью определяется параметрами доски, seed её генератора случайных чисел
+и списком результативных обменов, поэтому журнал хранит только их (и заявленный счёт)
+в компактном двоичном виде. replay() заново играет партию на GameBoard без UI
+и сверяет итоговый счёт.
+
+Пример запуска (проверка сохранённых журналов):
+    python replay.py game1.m3l game2.m3l
+"""
+import argparse
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from array_board import ArrayGameBoard
+from game_board import difficulty_for
+
+_MAGIC = b'M3L'
+_VERSION = 4 # Меняется вместе с правилами (генерация поля, очки): старые журналы не воспроизводятся
+# Заголовок: магия, версия, флаги, строки, столбцы, типы, seed, заявленный счёт, число ходов
+_HEADER = struct.Struct('<3sBBHHBQII')
+FLAG_AUTO_RESHUFFLE = 1
+FLAG_SPECIAL_TILES = 2
+
+# Итог проверки: корректна ли партия, пересчитанный счёт, число ходов и причина отказа
+ReplayResult = namedtuple('ReplayResult', ['valid', 'score', 'moves', 'error'])
+
+
+# --- Класс MoveLog: Компактный журнал ходов партии ---
+class MoveLog:
+    """
+    Seed доски и список обменов. Обмен соседних клеток кодируется одним числом:
+    (номер верхней/левой клетки) * 2 + (1 - вертикальный обмен, 0 - горизонтальный),
+    то есть 2 байта на ход для полей до 32768 клеток и 4 байта для больших.
+    """
+
+    def __init__(self, rows, cols, num_types, seed, auto_reshuffle=True, score=0,
+                 special_tiles=True):
+        self.rows = rows
+        self.cols = cols
+        self.num_types = num_types
+        self.seed = seed
+        self.auto_reshuffle = auto_reshuffle
+        self.special_tiles = special_tiles
+        self.score = score # Заявленный итоговый счёт
+        self.codes = array('H' if rows * cols * 2 <= 0xFFFF else 'I')
+
+    @classmethod
+    def for_board(cls, board):
+        """Создаёт пустой журнал для партии на доске board (берёт её размеры и seed)."""
+        return cls(board.rows, board.cols, board.num_types, board.seed, board.auto_reshuffle,
+                   special_tiles=board.special_tiles)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def record(self, r1, c1, r2, c2):
+        """Добавляет в журнал обмен соседних клеток (в любом порядке)."""
+        r, c = min((r1, c1), (r2, c2))
+        self.codes.append((r * self.cols + c) * 2 + (r1 != r2))
+
+    def moves(self):
+        """Генератор записанных обменов (r1, c1, r2, c2)."""
+        for code in self.codes:
+            cell, vertical = divmod(code, 2)
+            r, c = divmod(cell, self.cols)
+            yield (r, c, r + 1, c) if vertical else (r, c, r, c + 1)
+
+    def to_bytes(self):
+        """Сериализует журнал: заголовок и коды ходов в порядке байтов little-endian."""
+        flags = (FLAG_AUTO_RESHUFFLE if self.auto_reshuffle else 0) | \
+                (FLAG_SPECIAL_TILES if self.special_tiles else 0)
+        header = _HEADER.pack(_MAGIC, _VERSION, flags, self.rows, self.cols, self.num_types,
+                              self.seed, self.score, len(self.codes))
+        codes = array(self.codes.typecode, self.codes)
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        return header + codes.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Восстанавливает журнал из to_bytes(). Бросает ValueError на повреждённых данных."""
+        if len(data) < _HEADER.size:
+            raise ValueError("Журнал ходов короче заголовка")
+        magic, version, flags, rows, cols, num_types, seed, score, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Неизвестный формат журнала ходов")
+
+        log = cls(rows, cols, num_types, seed, bool(flags & FLAG_AUTO_RESHUFFLE), score,
+                  bool(flags & FLAG_SPECIAL_TILES))
+        body = data[_HEADER.size:]
+        if len(body) != count * log.codes.itemsize:
+            raise ValueError("Число ходов не совпадает с длиной журнала")
+        log.codes.frombytes(body)
+        if sys.byteorder == 'big':
+            log.codes.byteswap()
+        return log
+
+
+def replay(log, board_class=ArrayGameBoard, moves_limit=None, target_score=None):
+    """
+    Заново играет партию из журнала без UI и проверяет её по правилам GameScreen:
+    каждый ход даёт совпадение, ходов не больше лимита, после достижения цели
+    ходов нет, а пересчитанный счёт равен заявленному.
+    Лимит ходов и цель по умолчанию берутся из difficulty_for.
+    """
+    default_moves, default_target = difficulty_for(log.rows, log.cols)
+    moves_limit = moves_limit or default_moves
+    target_score = target_score or default_target
+    if len(log) > moves_limit:
+        return ReplayResult(False, 0, len(log), f"ходов больше лимита ({moves_limit})")
+
+    board = board_class(log.rows, log.cols, log.num_types,
+                        auto_reshuffle=log.auto_reshuffle, special_tiles=log.special_tiles,
+                        seed=log.seed)
+    score = 0
+    for index, move in enumerate(log.moves()):
+        if score >= target_score:
+            return ReplayResult(False, score, index, f"ход #{index + 1} после достижения цели")
+        result = board.resolve_move(*move)
+        if result is None or not result.depth:
+            return ReplayResult(False, score, index, f"ход #{index + 1} {move} не даёт совпадений")
+        score += result.score
+
+    if score != log.score:
+        return ReplayResult(False, score, len(log), f"заявлен счёт {log.score}, пересчитан {score}")
+    return ReplayResult(True, score, len(log), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка журналов ходов 'Три в ряд' без UI")
+    parser.add_argument('logs', nargs='+', help="файлы журналов (MoveLog.to_bytes)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    invalid = 0
+    for path in args.logs:
+        with open(path, 'rb') as f:
+            try:
+                result = replay(MoveLog.from_bytes(f.read()))
+            except ValueError as error:
+                result = ReplayResult(False, 0, 0, str(error))
+        if not result.valid:
+            invalid += 1
+            print(f"{path}: отклонён - {result.error}")
+    elapsed = time.perf_counter() - started
+    print(f"Проверено {len(args.logs)} партий за {elapsed:.2f} с, отклонено: {invalid}")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
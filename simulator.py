@@ -0,0 +1,169 @@
+"""
+Безголовый симулятор Монте-Карло для балансировки уровней.
+
+Играет N партий для каждого размера поля и стратегии на GameBoard (без Kivy),
+распределяя партии по процессам, и сохраняет процент побед и распределение очков.
+
+Пример запуска:
+    python simulator.py --games 100000 --sizes 6 8 10 --policies random greedy --output balance.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from array_board import ArrayGameBoard
+from bitboard_board import BitboardGameBoard
+from game_board import DIFFICULTY_SETTINGS, GameBoard, difficulty_for
+from policies import POLICIES
+
+BACKENDS = {
+    'list': GameBoard,
+    'array': ArrayGameBoard,
+    'bitboard': BitboardGameBoard,
+}
+
+
+def play_game(board_class, rows, cols, num_types, moves, target_score, policy, rng):
+    """
+    Играет одну партию по правилам GameScreen.
+    Возвращает (победа, счёт, оставшиеся ходы).
+    """
+    board = board_class(rows, cols, num_types, incremental=True, auto_reshuffle=True,
+                        seed=rng.getrandbits(64))
+    score = 0
+    moves_left = moves
+    while moves_left > 0 and score < target_score:
+        move = policy(board, rng)
+        if move is None: # Тупик, который не удалось перемешать (крошечные доски)
+            break
+        result = board.resolve_move(*move)
+        moves_left -= 1
+        score += result.score
+    return score >= target_score, score, moves_left
+
+
+def _run_chunk(task):
+    """
+    Выполняется в процессе-работнике: играет пачку партий с собственным seed.
+    Возвращает компактную сводку, а не список партий, чтобы память не росла с N.
+    """
+    backend, rows, cols, num_types, moves, target_score, policy_name, seed, games = task
+    # rng выбирает ходы стратегии и seed для доски каждой партии
+    rng = random.Random(seed)
+    board_class = BACKENDS[backend]
+    policy = POLICIES[policy_name]
+
+    wins = 0
+    scores = Counter()
+    moves_left_at_win = Counter()
+    for _ in range(games):
+        won, score, moves_left = play_game(board_class, rows, cols, num_types,
+                                           moves, target_score, policy, rng)
+        scores[score] += 1
+        if won:
+            wins += 1
+            moves_left_at_win[moves_left] += 1
+    return wins, scores, moves_left_at_win
+
+
+def _percentile(histogram, total, fraction):
+    """Перцентиль по гистограмме {значение: количество}."""
+    threshold = fraction * total
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= threshold:
+            return value
+    return 0
+
+
+def summarize(games, wins, scores, moves_left_at_win):
+    """Собирает итоговую статистику конфигурации из объединённых гистограмм."""
+    total = sum(scores.values())
+    mean = sum(value * count for value, count in scores.items()) / total if total else 0
+    return {
+        'games': games,
+        'win_rate': wins / games if games else 0,
+        'score_mean': mean,
+        'score_p10': _percentile(scores, total, 0.1),
+        'score_p50': _percentile(scores, total, 0.5),
+        'score_p90': _percentile(scores, total, 0.9),
+        'score_histogram': {str(value): scores[value] for value in sorted(scores)},
+        'moves_left_at_win': {str(value): moves_left_at_win[value] for value in sorted(moves_left_at_win)},
+    }
+
+
+def simulate(sizes, policies, games, num_types=5, backend='array', workers=None,
+             chunk_size=500, seed=0, moves=None, target_score=None):
+    """
+    Играет games партий для каждого размера поля и стратегии в пуле процессов.
+    moves/target_score по умолчанию берутся из DIFFICULTY_SETTINGS.
+    Возвращает словарь {"<строки>x<столбцы>": {стратегия: статистика}}.
+    """
+    tasks = []
+    for size in sizes:
+        size_moves, size_target = difficulty_for(size)
+        for policy_name in policies:
+            for chunk_index, start in enumerate(range(0, games, chunk_size)):
+                # Каждая пачка получает собственный воспроизводимый seed
+                chunk_seed = f"{seed}-{size}-{policy_name}-{chunk_index}"
+                tasks.append((backend, size, size, num_types,
+                              moves or size_moves, target_score or size_target,
+                              policy_name, chunk_seed, min(chunk_size, games - start)))
+
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for task, (wins, scores, moves_left_at_win) in zip(tasks, executor.map(_run_chunk, tasks)):
+            key = (task[1], task[6])
+            total = totals.setdefault(key, [0, 0, Counter(), Counter()])
+            total[0] += task[8]
+            total[1] += wins
+            total[2].update(scores)
+            total[3].update(moves_left_at_win)
+
+    report = {}
+    for (size, policy_name), (played, wins, scores, moves_left_at_win) in sorted(totals.items()):
+        report.setdefault(f"{size}x{size}", {})[policy_name] = summarize(
+            played, wins, scores, moves_left_at_win)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло симуляция уровней 'Три в ряд' без UI")
+    parser.add_argument('--games', type=int, default=1000, help="партий на конфигурацию")
+    parser.add_argument('--sizes', type=int, nargs='+', default=sorted(DIFFICULTY_SETTINGS))
+    parser.add_argument('--policies', nargs='+', default=sorted(POLICIES), choices=sorted(POLICIES))
+    parser.add_argument('--num-types', type=int, default=5)
+    parser.add_argument('--backend', default='array', choices=sorted(BACKENDS))
+    parser.add_argument('--workers', type=int, default=None, help="по умолчанию - все ядра")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--moves', type=int, default=None, help="переопределить число ходов")
+    parser.add_argument('--target-score', type=int, default=None, help="переопределить целевой счёт")
+    parser.add_argument('--output', default='balance.json')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = simulate(args.sizes, args.policies, args.games, num_types=args.num_types,
+                      backend=args.backend, workers=args.workers, chunk_size=args.chunk_size,
+                      seed=args.seed, moves=args.moves, target_score=args.target_score)
+    elapsed = time.perf_counter() - started
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    print(f"{'size':>7} {'policy':>8} {'win rate':>9} {'mean':>7} {'p10':>5} {'p50':>5} {'p90':>5}")
+    for size, by_policy in report.items():
+        for policy_name, stats in by_policy.items():
+            print(f"{size:>7} {policy_name:>8} {stats['win_rate']:>9.1%} {stats['score_mean']:>7.1f} "
+                  f"{stats['score_p10']:>5} {stats['score_p50']:>5} {stats['score_p90']:>5}")
+    total_games = args.games * len(args.sizes) * len(args.policies)
+    print(f"{total_games} партий за {elapsed:.1f} с ({total_games / elapsed:.0f} партий/с), отчёт: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
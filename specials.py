@@ -0,0 +1,222 @@
+"""
+Серии совпадений и специальные элементы.
+
+find_runs восстанавливает по найденным совпадениям максимальные серии (начало, длина,
+направление) за один линейный проход, group_runs объединяет пересекающиеся серии
+в фигуры L/T/крест. По фигуре special_for выбирает специальный элемент, который
+остаётся на поле вместо одной из клеток совпадения:
+    4 в линию          - "линия" (LINE_ROW/LINE_COL): очищает свою строку или столбец;
+    L, T или крест     - бомба (BOMB): очищает квадрат 3x3 вокруг себя;
+    5 и больше в линию - цветная бомба (COLOR_BOMB): очищает все элементы одного цвета.
+Специальные элементы создают только фигуры, собранные ходом игрока: в цепной
+реакции после падения фигуры приносят лишь бонус очков. Иначе на больших полях
+каждое заполнение порождало бы новые бомбы, и каскад не затухал бы.
+Специальный элемент срабатывает, когда его клетка удаляется (в совпадении или
+действием другого специального элемента); цветную бомбу можно также просто
+поменять с соседом - тогда она очищает цвет соседа. expand_effects применяет
+все сработавшие элементы шага одной пачкой, без повторного поиска совпадений.
+"""
+from collections import namedtuple
+
+LINE_ROW = 'row'
+LINE_COL = 'col'
+BOMB = 'bomb'
+COLOR_BOMB = 'color'
+KINDS = (LINE_ROW, LINE_COL, BOMB, COLOR_BOMB)
+
+# Максимальная серия: клетка начала (верхняя/левая), длина и направление
+Run = namedtuple('Run', ['row', 'col', 'length', 'horizontal'])
+# Фигура из пересекающихся серий одного цвета: серии, все клетки и форма
+# ('line' - одна серия, 'L', 'T' или 'cross')
+MatchGroup = namedtuple('MatchGroup', ['runs', 'cells', 'shape'])
+
+
+def run_cells(run):
+    """Клетки серии по порядку."""
+    if run.horizontal:
+        return [(run.row, run.col + i) for i in range(run.length)]
+    return [(run.row + i, run.col) for i in range(run.length)]
+
+
+def find_runs(board, matches):
+    """
+    Возвращает отсортированный список максимальных серий (Run) среди клеток matches.
+
+    Три одинаковые клетки подряд - это всегда серия, а все клетки серий есть
+    в matches, поэтому серии - это цепочки соседних одинаковых клеток из matches
+    длиной от трёх. Цепочка проходится только от своего начала (слева/сверху
+    нет такой же клетки), так что каждая клетка просматривается не больше двух раз.
+    """
+    matched = set(matches)
+    runs = []
+    for r, c in matched:
+        value = board[r][c]
+        if (r, c - 1) not in matched or board[r][c - 1] != value:
+            length = 1
+            while (r, c + length) in matched and board[r][c + length] == value:
+                length += 1
+            if length >= 3:
+                runs.append(Run(r, c, length, True))
+        if (r - 1, c) not in matched or board[r - 1][c] != value:
+            length = 1
+            while (r + length, c) in matched and board[r + length][c] == value:
+                length += 1
+            if length >= 3:
+                runs.append(Run(r, c, length, False))
+    runs.sort()
+    return runs
+
+
+def _run_ends(run):
+    """Первая и последняя клетки серии."""
+    last = run.length - 1
+    if run.horizontal:
+        return (run.row, run.col), (run.row, run.col + last)
+    return (run.row, run.col), (run.row + last, run.col)
+
+
+def _shape(runs, crossings):
+    """Форма фигуры из нескольких серий по клеткам их пересечения {клетка: номера серий}."""
+    shape = 'L'
+    for cell, indices in crossings.items():
+        ends = [cell in _run_ends(runs[i]) for i in indices]
+        if not any(ends):
+            return 'cross' # Пересечение в середине обеих серий
+        if not all(ends):
+            shape = 'T'
+    return shape
+
+
+def group_runs(runs):
+    """
+    Объединяет серии с общими клетками в фигуры (MatchGroup).
+    Общую клетку могут иметь только горизонтальная и вертикальная серии одного цвета,
+    поэтому пересечения ищутся только между горизонтальными и вертикальными сериями.
+    """
+    parent = list(range(len(runs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cells = [run_cells(run) for run in runs]
+    horizontal = {} # Клетка горизонтальной серии -> номер серии
+    for i, run in enumerate(runs):
+        if run.horizontal:
+            horizontal.update(dict.fromkeys(cells[i], i))
+    crossings = {} # Клетка пересечения -> (горизонтальная серия, вертикальная серия)
+    for i, run in enumerate(runs):
+        if not run.horizontal:
+            for cell in cells[i]:
+                j = horizontal.get(cell)
+                if j is not None:
+                    crossings[cell] = (j, i)
+                    parent[find(i)] = find(j)
+
+    if not crossings: # Обычный случай: все серии - отдельные линии
+        return [MatchGroup([run], set(cells[i]), 'line') for i, run in enumerate(runs)]
+    members = {}
+    for i in range(len(runs)):
+        members.setdefault(find(i), []).append(i)
+    groups = []
+    for indices in members.values():
+        group_cells = set()
+        for i in indices:
+            group_cells.update(cells[i])
+        group_crossings = {cell: pair for cell, pair in crossings.items() if pair[0] in indices}
+        group_runs_ = [runs[i] for i in indices]
+        shape = _shape(runs, group_crossings) if len(indices) > 1 else 'line'
+        groups.append(MatchGroup(group_runs_, group_cells, shape))
+    return groups
+
+
+def special_for(group):
+    """Вид специального элемента, который создаёт фигура, или None."""
+    longest = max(group.runs, key=lambda run: run.length)
+    if longest.length >= 5:
+        return COLOR_BOMB
+    if group.shape != 'line':
+        return BOMB
+    if longest.length == 4:
+        return LINE_ROW if longest.horizontal else LINE_COL
+    return None
+
+
+def creation_cell(group, moved, specials):
+    """
+    Клетка фигуры, где появится специальный элемент: переставленная игроком клетка,
+    иначе пересечение серий, иначе середина самой длинной серии. Клетки, где уже
+    лежит специальный элемент (он сработает), не подходят; если таких нет - None.
+    """
+    candidates = [cell for cell in sorted(moved) if cell in group.cells]
+    if group.shape != 'line':
+        seen = set()
+        for run in group.runs:
+            for cell in run_cells(run):
+                if cell in seen:
+                    candidates.append(cell)
+                seen.add(cell)
+    longest = max(group.runs, key=lambda run: run.length)
+    cells = run_cells(longest)
+    candidates.append(cells[len(cells) // 2])
+    candidates.extend(sorted(group.cells))
+    for cell in candidates:
+        if cell not in specials:
+            return cell
+    return None
+
+
+def group_bonus(group):
+    """Бонус к очкам за фигуру: 0 за тройку, дальше растёт быстрее числа клеток."""
+    size = len(group.cells)
+    return size * (size - 3)
+
+
+def expand_effects(board, rows, cols, specials, removed, triggers=None, keep=()):
+    """
+    Добавляет в множество removed клетки, которые очищают сработавшие специальные
+    элементы, и возвращает число клеток, добавленных эффектами.
+
+    Срабатывают элементы из specials, чьи клетки есть в removed, и цветные бомбы
+    из triggers ({клетка: цвет}, активированные обменом). Эффекты, задевшие другие
+    специальные элементы, запускают и их; все клетки собираются одной пачкой.
+    Клетки keep (только что созданные элементы) не удаляются.
+    """
+    queue = [(cell, None) for cell in removed if cell in specials]
+    for cell, color in (triggers or {}).items():
+        removed.add(cell)
+        queue.append((cell, color))
+    fired = set()
+    by_color = None # Клетки по цветам: строится один раз, если сработала цветная бомба
+    added = 0
+    while queue:
+        (r, c), color = queue.pop()
+        if (r, c) in fired:
+            continue
+        fired.add((r, c))
+        kind = specials[(r, c)]
+        if kind == LINE_ROW:
+            area = [(r, j) for j in range(cols)]
+        elif kind == LINE_COL:
+            area = [(i, c) for i in range(rows)]
+        elif kind == BOMB:
+            area = [(i, j) for i in range(max(0, r - 1), min(rows, r + 2))
+                    for j in range(max(0, c - 1), min(cols, c + 2))]
+        else:
+            if by_color is None:
+                by_color = {}
+                for i in range(rows):
+                    row = board[i]
+                    for j in range(cols):
+                        by_color.setdefault(row[j], []).append((i, j))
+            area = by_color.get(board[r][c] if color is None else color, [])
+        for cell in area:
+            if cell in removed or cell in keep:
+                continue
+            removed.add(cell)
+            added += 1
+            if cell in specials:
+                queue.append((cell, None))
+    return added
@@ -0,0 +1,246 @@
+"""
+Телеметрия партий: компактные события в ротируемом журнале JSON Lines и потоковый
+офлайн-агрегатор, по которому подбираются ходы и цель сложностей (difficulty_for).
+
+Игра пишет три вида событий, одну строку JSON на событие, с короткими ключами:
+    {"e":"start","k":"8x8","m":20,"t":600}
+        новая партия: сложность, ходов на партию, целевой счёт
+    {"e":"move","k":"8x8","s":[r1,c1,r2,c2],"d":2,"x":9,"p":11,"ms":1830}
+        результативный ход: обмен, глубина каскада, убрано клеток, очки, время на ход в мс
+    {"e":"end","k":"8x8","win":true,"p":640,"t":600,"l":3}
+        конец партии: итоговый счёт, цель и оставшиеся ходы
+Сложность есть в каждом событии, поэтому агрегатору не нужно помнить партии:
+его память не зависит от числа событий (только от числа сложностей).
+
+Пример запуска (отчёт по журналу вместе с ротированными частями):
+    python telemetry.py telemetry.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+TIME_BUCKET_MS = 250 # Шаг гистограммы времени на ход
+MAX_TIME_MS = 60000 # Более долгие раздумья попадают в последний интервал
+
+
+# --- Класс TelemetryLog: Ротируемый журнал событий JSON Lines ---
+class TelemetryLog:
+    """
+    Дописывает события в path. Когда файл превышает max_bytes, он переименовывается
+    в path.1, прежние части сдвигаются до path.<backups>, а самая старая удаляется.
+    Запись без fsync: потеря последних событий при аварии допустима. Не потокобезопасен -
+    в игре все записи идут через один поток PersistenceWorker.
+    """
+
+    def __init__(self, path, max_bytes=1 << 20, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, *events):
+        """Дописывает события (словари) по одному на строку и ротирует файл при необходимости."""
+        data = ''.join(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for event in events)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+            size = f.tell()
+        if size > self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """Сдвигает части журнала: path -> path.1 -> ... -> path.<backups> (удаляется)."""
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if not self.backups:
+            os.remove(self.path)
+
+    def files(self):
+        """Существующие части журнала от самой старой к текущей."""
+        return log_files(self.path, self.backups)
+
+
+def log_files(path, backups=None):
+    """
+    Части журнала path, от самой старой к текущей. Если backups не задано,
+    берутся все подряд идущие path.1, path.2, ...
+    """
+    older = []
+    index = 1
+    while (backups is None or index <= backups) and os.path.exists(f"{path}.{index}"):
+        older.append(f"{path}.{index}")
+        index += 1
+    older.reverse()
+    return older + ([path] if os.path.exists(path) else [])
+
+
+def read_events(paths):
+    """
+    Генератор событий из файлов журнала по порядку. Строки, которые не разбираются
+    (например, недописанная последняя строка после аварийного завершения), пропускаются.
+    """
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    yield event
+
+
+# --- Класс DifficultyStats: Накопленная статистика одной сложности ---
+class DifficultyStats:
+    """Счётчики и гистограммы одной сложности; размер не зависит от числа событий."""
+    __slots__ = ('games', 'finished', 'wins', 'moves_limit', 'target', 'moves', 'depth_total',
+                 'cleared_total', 'score_total', 'depths', 'move_times', 'moves_left_at_win',
+                 'loss_score_ratio_total')
+
+    def __init__(self):
+        self.games = 0 # Начатых партий
+        self.finished = 0
+        self.wins = 0
+        self.moves_limit = None # Последние увиденные ходы и цель сложности
+        self.target = None
+        self.moves = 0 # Результативных ходов
+        self.depth_total = 0
+        self.cleared_total = 0
+        self.score_total = 0
+        self.depths = Counter() # Глубина каскада -> число ходов
+        self.move_times = Counter() # Интервал TIME_BUCKET_MS -> число ходов
+        self.moves_left_at_win = Counter() # Оставшиеся ходы -> число побед
+        self.loss_score_ratio_total = 0.0 # Сумма счёт/цель по проигранным партиям
+
+    def add(self, event):
+        """Учитывает одно событие этой сложности."""
+        kind = event.get('e')
+        if kind == 'move':
+            self.moves += 1
+            depth = event.get('d', 0)
+            self.depth_total += depth
+            self.depths[depth] += 1
+            self.cleared_total += event.get('x', 0)
+            self.score_total += event.get('p', 0)
+            if 'ms' in event:
+                self.move_times[min(event['ms'], MAX_TIME_MS) // TIME_BUCKET_MS] += 1
+        elif kind == 'start':
+            self.games += 1
+            self.moves_limit = event.get('m', self.moves_limit)
+            self.target = event.get('t', self.target)
+        elif kind == 'end':
+            self.finished += 1
+            if event.get('win'):
+                self.wins += 1
+                self.moves_left_at_win[event.get('l', 0)] += 1
+            elif event.get('t'):
+                self.loss_score_ratio_total += event.get('p', 0) / event['t']
+
+    def move_time_percentile(self, fraction):
+        """Время на ход (мс, верхняя граница интервала гистограммы) для доли fraction ходов."""
+        total = sum(self.move_times.values())
+        if not total:
+            return None
+        seen = 0
+        for bucket in sorted(self.move_times):
+            seen += self.move_times[bucket]
+            if seen >= total * fraction:
+                return (bucket + 1) * TIME_BUCKET_MS
+        return None
+
+    def summary(self):
+        """Итоговые показатели сложности (словарь, удобный для JSON)."""
+        wins = self.wins
+        losses = self.finished - wins
+        return {
+            'games': self.games,
+            'finished': self.finished,
+            'win_rate': wins / self.finished if self.finished else None,
+            'moves_limit': self.moves_limit,
+            'target_score': self.target,
+            'moves': self.moves,
+            'avg_cascade_depth': self.depth_total / self.moves if self.moves else None,
+            'max_cascade_depth': max(self.depths) if self.depths else None,
+            'avg_cleared': self.cleared_total / self.moves if self.moves else None,
+            'avg_move_score': self.score_total / self.moves if self.moves else None,
+            'move_time_p50_ms': self.move_time_percentile(0.5),
+            'move_time_p90_ms': self.move_time_percentile(0.9),
+            'avg_moves_left_at_win': (sum(left * count for left, count in self.moves_left_at_win.items())
+                                      / wins if wins else None),
+            'moves_left_at_win': dict(sorted(self.moves_left_at_win.items())),
+            'avg_loss_score_ratio': self.loss_score_ratio_total / losses if losses else None,
+        }
+
+
+def aggregate(events):
+    """
+    Один проход по событиям (любой итерируемый объект, например read_events).
+    Возвращает {сложность: DifficultyStats}.
+    """
+    stats = {}
+    for event in events:
+        key = event.get('k')
+        if key is None:
+            continue
+        difficulty = stats.get(key)
+        if difficulty is None:
+            difficulty = stats[key] = DifficultyStats()
+        difficulty.add(event)
+    return stats
+
+
+def _difficulty_order(key):
+    """Сортировка "8x8" < "10x10" < "100x100" по числу клеток."""
+    try:
+        rows, cols = key.split('x')
+        return (int(rows) * int(cols), key)
+    except ValueError:
+        return (float('inf'), key)
+
+
+def format_report(stats):
+    """Текстовый отчёт по результату aggregate."""
+    def value(number, spec):
+        return '-' if number is None else format(number, spec)
+
+    lines = []
+    for key in sorted(stats, key=_difficulty_order):
+        s = stats[key].summary()
+        lines.append(f"{key}: партий {s['games']} (завершено {s['finished']}, "
+                     f"побед {value(s['win_rate'], '.0%')}), ходов на партию {value(s['moves_limit'], 'd')}, "
+                     f"цель {value(s['target_score'], 'd')}")
+        lines.append(f"  ходов {s['moves']}: каскад {value(s['avg_cascade_depth'], '.2f')} "
+                     f"(макс. {value(s['max_cascade_depth'], 'd')}), клеток {value(s['avg_cleared'], '.1f')}, "
+                     f"очков {value(s['avg_move_score'], '.1f')}, время на ход p50/p90 "
+                     f"{value(s['move_time_p50_ms'], 'd')}/{value(s['move_time_p90_ms'], 'd')} мс")
+        left = ' '.join(f"{moves_left}:{count}" for moves_left, count in s['moves_left_at_win'].items())
+        lines.append(f"  ходов осталось при победе: в среднем {value(s['avg_moves_left_at_win'], '.1f')}"
+                     f" [{left}], счёт проигравших от цели {value(s['avg_loss_score_ratio'], '.0%')}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Статистика сложностей 'Три в ряд' по журналам телеметрии")
+    parser.add_argument('logs', nargs='+', help="журналы телеметрии (ротированные части path.N "
+                                                "подхватываются автоматически)")
+    parser.add_argument('--json', action='store_true', help="вывести статистику в JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = [part for path in args.logs for part in log_files(path)]
+    stats = aggregate(read_events(paths))
+    if args.json:
+        print(json.dumps({key: difficulty.summary() for key, difficulty in stats.items()},
+                         ensure_ascii=False, indent=2))
+    else:
+        print(format_report(stats))
+        print(f"Файлов: {len(paths)}, обработано за {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
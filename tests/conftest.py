@@ -0,0 +1,8 @@
+"""
+Общие настройки тестов: модули игры лежат в корне репозитория,
+поэтому он добавляется в sys.path (тесты можно запускать и просто командой pytest).
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+"""
+Тесты MoveAdvisor: бюджет времени соблюдается и на больших полях,
+а таблица транспозиций не меняет ответ.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from advisor import MoveAdvisor
+from simulator import BACKENDS
+
+BUDGET = 0.05
+SLACK = 0.25 # Запас на копию доски и один resolve_move сверх бюджета
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_budget_on_large_board(name):
+    board = BACKENDS[name](300, 300, 5, seed=1)
+    advisor = MoveAdvisor(time_budget=BUDGET, seed=0)
+    start = time.perf_counter()
+    hint = advisor.advise(board)
+    elapsed = time.perf_counter() - start
+    assert elapsed < BUDGET + SLACK
+    assert hint is not None and not hint.complete
+    r1, c1, r2, c2 = hint.move
+    assert board.resolve_move(r1, c1, r2, c2).depth > 0
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_cache_keeps_hint(name):
+    board = BACKENDS[name](8, 8, 5, auto_reshuffle=True, seed=3)
+    cached = MoveAdvisor(time_budget=10.0, seed=0)
+    plain = MoveAdvisor(time_budget=10.0, seed=0, cache_size=0)
+    hint = cached.advise(board)
+    assert hint.complete
+    assert hint == plain.advise(board) == cached.advise(board)
+    assert cached.cache.hits > 0
+
+
+def test_cached_advisor_rejects_process_pool():
+    board = BACKENDS['list'](6, 6, 5, seed=1)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError):
+            MoveAdvisor(seed=0).advise_async(board, executor)
+        hint = MoveAdvisor(seed=0, cache_size=0, time_budget=1.0).advise_async(board, executor).result()
+    assert hint is not None
+
+
+def test_async_hint_warms_cache():
+    board = BACKENDS['list'](6, 6, 5, seed=1)
+    advisor = MoveAdvisor(seed=0, time_budget=1.0)
+    first = advisor.advise_async(board).result()
+    assert advisor.advise_async(board).result() == first
+    assert advisor.cache.hits > 0
@@ -0,0 +1,42 @@
+"""
+Тесты AnimationScheduler в режиме instant (нужен Kivy: без него тесты пропускаются).
+"""
+import sys
+
+import pytest
+
+pytest.importorskip('kivy')
+
+from animation_scheduler import AnimationScheduler # noqa: E402
+
+
+class Target:
+    x = 0
+
+
+def test_long_instant_chain_does_not_recurse():
+    """Цепочка колбэков длиннее предела рекурсии (каскад из сотен шагов на большом поле)."""
+    animator = AnimationScheduler(instant=True)
+    target = Target()
+    steps = sys.getrecursionlimit() * 3
+
+    def step(n=0):
+        if n < steps:
+            animator.animate([(target, {'x': n})], 0.2, lambda: animator.delay(0.1, lambda: step(n + 1)))
+
+    step()
+    assert target.x == steps - 1
+    assert not animator.busy
+
+
+def test_cancel_inside_instant_callback_stops_chain():
+    animator = AnimationScheduler(instant=True)
+    calls = []
+
+    def first():
+        calls.append('first')
+        animator.delay(0.1, lambda: calls.append('second'))
+        animator.cancel_all()
+
+    animator.delay(0.1, first)
+    assert calls == ['first']
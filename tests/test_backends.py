@@ -0,0 +1,166 @@
+"""
+Дифференциальные тесты бэкендов доски: ArrayGameBoard и BitboardGameBoard против
+эталонного GameBoard (список списков).
+
+Доски создаются с одним seed и получают одинаковые случайные последовательности
+ходов (в том числе несоседние, за краем и нерезультативные обмены); после каждого шага
+сравниваются поле, специальные элементы и возвращаемые значения. Размеры полей,
+числа типов и ходы выбираются генератором с seed из параметров теста, поэтому
+упавший случай воспроизводится по его id.
+"""
+import pickle
+import random
+
+import pytest
+
+from game_board import GameBoard, zobrist_table
+from simulator import BACKENDS
+
+ALTERNATIVES = {name: board_class for name, board_class in BACKENDS.items() if board_class is not GameBoard}
+SEEDS = range(25)
+EDGE_SIZES = [(1, 1), (1, 7), (2, 2), (3, 3), (2, 9), (9, 2)]
+
+
+def random_shape(rng):
+    """Случайные (строки, столбцы, типы) небольшого поля."""
+    return rng.randint(1, 12), rng.randint(1, 12), rng.randint(3, 6)
+
+
+def random_swap(rng, board):
+    """
+    Обмен для проверки: чаще результативный ход, иногда произвольная пара соседей,
+    несоседние клетки или клетки за краем поля.
+    """
+    kind = rng.random()
+    moves = board.legal_moves() if kind < 0.6 else None
+    if moves:
+        return rng.choice(moves)
+    r, c = rng.randrange(board.rows), rng.randrange(board.cols)
+    if kind < 0.9:
+        return (r, c, r + 1, c) if rng.random() < 0.5 else (r, c, r, c + 1)
+    return (r, c, rng.randrange(-1, board.rows + 1), rng.randrange(-1, board.cols + 1))
+
+
+def full_zobrist(board):
+    """Ключ Zobrist, посчитанный заново по полю и специальным элементам."""
+    values, specials = zobrist_table(board.rows, board.cols, board.num_types)
+    width = board.num_types + 1
+    key = 0
+    for r, row in enumerate(board.to_list()):
+        for c, value in enumerate(row):
+            key ^= values[(r * board.cols + c) * width + value]
+    for (r, c), kind in board.specials.items():
+        key ^= specials[kind][r * board.cols + c]
+    return key
+
+
+def assert_same(board, reference):
+    assert board.to_list() == reference.to_list()
+    assert board.specials == reference.specials
+
+
+@pytest.mark.parametrize('name', ALTERNATIVES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_initial_board(name, seed):
+    rows, cols, num_types = random_shape(random.Random(seed))
+    reference = GameBoard(rows, cols, num_types, seed=seed)
+    board = ALTERNATIVES[name](rows, cols, num_types, seed=seed)
+    assert_same(board, reference)
+    assert not board.find_matches()
+    assert board.legal_moves() == reference.legal_moves()
+    assert board.has_legal_moves() == reference.has_legal_moves()
+
+
+@pytest.mark.parametrize('name', ALTERNATIVES)
+@pytest.mark.parametrize('rows, cols', EDGE_SIZES)
+def test_initial_board_edge_sizes(name, rows, cols):
+    reference = GameBoard(rows, cols, 3, seed=rows * 100 + cols)
+    board = ALTERNATIVES[name](rows, cols, 3, seed=rows * 100 + cols)
+    assert_same(board, reference)
+    assert board.legal_moves() == reference.legal_moves()
+
+
+@pytest.mark.parametrize('incremental', [False, True], ids=['full', 'incremental'])
+@pytest.mark.parametrize('name', ALTERNATIVES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_cascade_steps(name, seed, incremental):
+    """swap_elements, find_matches, remove_matches и drop_elements по одному шагу."""
+    rng = random.Random(seed)
+    rows, cols, num_types = random_shape(rng)
+    reference = GameBoard(rows, cols, num_types, seed=seed)
+    board = ALTERNATIVES[name](rows, cols, num_types, incremental=incremental, seed=seed)
+    for _ in range(30):
+        swap = random_swap(rng, reference)
+        assert board.swap_elements(*swap) == reference.swap_elements(*swap)
+        assert_same(board, reference)
+        while True:
+            matches = reference.find_matches()
+            assert set(board.find_matches()) == set(matches)
+            if not matches:
+                break
+            assert board.remove_matches(matches) == reference.remove_matches(matches)
+            assert_same(board, reference)
+            assert dict(board.drop_elements()) == dict(reference.drop_elements())
+            assert_same(board, reference)
+        assert board.legal_moves() == reference.legal_moves()
+
+
+@pytest.mark.parametrize('name', ALTERNATIVES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_resolve_move(name, seed):
+    """Ходы целиком: каскады, специальные элементы и перемешивание тупиков."""
+    rng = random.Random(seed)
+    size = rng.choice([4, 6, 8, 10])
+    reference = GameBoard(size, size, 5, auto_reshuffle=True, seed=seed)
+    boards = [ALTERNATIVES[name](size, size, 5, incremental=incremental, auto_reshuffle=True, seed=seed)
+              for incremental in (False, True)]
+    for _ in range(40):
+        swap = random_swap(rng, reference)
+        expected = reference.resolve_move(*swap, with_boards=True)
+        for board in boards:
+            result = board.resolve_move(*swap, with_boards=True)
+            if expected is None:
+                assert result is None
+            else:
+                assert (result.score, result.depth) == (expected.score, expected.depth)
+                assert result.board == expected.board
+                for step, expected_step in zip(result.steps, expected.steps, strict=True):
+                    assert set(step.removed) == set(expected_step.removed)
+                    assert step.score == expected_step.score
+                    assert step.board == expected_step.board
+                    assert dict(step.falls) == dict(expected_step.falls)
+                    assert step.specials == expected_step.specials
+            assert_same(board, reference)
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_zobrist_key(name, seed):
+    """Ключ, обновляемый на ходу, совпадает с посчитанным заново и одинаков у всех бэкендов."""
+    rng = random.Random(seed)
+    size = rng.choice([5, 8, 12])
+    reference = GameBoard(size, size, 5, auto_reshuffle=True, seed=seed)
+    board = BACKENDS[name](size, size, 5, incremental=True, auto_reshuffle=True, seed=seed)
+    assert board.zobrist_key == full_zobrist(board)
+    for _ in range(30):
+        swap = random_swap(rng, reference)
+        reference.resolve_move(*swap)
+        board.resolve_move(*swap)
+        assert board.zobrist_key == full_zobrist(board) == full_zobrist(reference)
+    board.reshuffle()
+    assert board.zobrist_key == full_zobrist(board)
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_pickle_round_trip(name):
+    """Копия через pickle (так доски копируют советник и сохранение) продолжает игру так же."""
+    rng = random.Random(0)
+    board = BACKENDS[name](8, 8, 5, incremental=True, auto_reshuffle=True, seed=7)
+    for _ in range(5):
+        board.resolve_move(*rng.choice(board.legal_moves()))
+    copy = pickle.loads(pickle.dumps(board))
+    assert_same(copy, board)
+    for _ in range(10):
+        move = rng.choice(board.legal_moves())
+        assert copy.resolve_move(*move).score == board.resolve_move(*move).score
+        assert_same(copy, board)
@@ -0,0 +1,98 @@
+"""
+Дифференциальные тесты BatchGameBoard: каждая доска пакета должна вести себя как
+GameBoard(special_tiles=False) с тем же seed - то же поле, те же ходы, очки и глубины.
+"""
+import random
+
+import pytest
+
+from batch_board import BatchGameBoard
+from game_board import GameBoard
+
+# (досок, строки, столбцы, типы, auto_reshuffle, ходов)
+CASES = [
+    (30, 8, 8, 5, True, 25),
+    (20, 6, 6, 5, False, 25),
+    (20, 10, 7, 4, True, 20),
+    (15, 3, 3, 3, True, 15),
+    (15, 5, 9, 6, True, 20),
+    (3, 30, 30, 5, True, 8),
+]
+
+
+def make_pair(count, rows, cols, num_types, auto_reshuffle, seed):
+    """Пакет и эталонные доски с одинаковыми seed."""
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(count)]
+    batch = BatchGameBoard(count, rows, cols, num_types, auto_reshuffle=auto_reshuffle, seeds=seeds)
+    references = [GameBoard(rows, cols, num_types, auto_reshuffle=auto_reshuffle, special_tiles=False,
+                            seed=board_seed) for board_seed in seeds]
+    return batch, references
+
+
+def random_swaps(rng, references):
+    """Обмены для каждой доски: ходы, произвольные соседи, несоседние клетки и пропуски (None)."""
+    swaps = []
+    for reference in references:
+        moves = reference.legal_moves()
+        kind = rng.random()
+        if kind < 0.1 or not moves:
+            swaps.append(None)
+        elif kind < 0.25:
+            r, c = rng.randrange(reference.rows), rng.randrange(max(reference.cols - 1, 1))
+            swaps.append((r, c, r, c + 1))
+        elif kind < 0.3:
+            swaps.append((0, 0, 2, 2))
+        else:
+            swaps.append(rng.choice(moves))
+    return swaps
+
+
+@pytest.mark.parametrize('count, rows, cols, num_types, auto_reshuffle, moves', CASES)
+def test_resolve_moves(count, rows, cols, num_types, auto_reshuffle, moves):
+    rng = random.Random(rows * cols)
+    batch, references = make_pair(count, rows, cols, num_types, auto_reshuffle, rows * cols)
+    for b, reference in enumerate(references):
+        assert batch.board(b) == reference.to_list()
+    assert batch.has_legal_moves() == [reference.has_legal_moves() for reference in references]
+
+    for move in range(moves):
+        swaps = random_swaps(rng, references)
+        result = batch.resolve_moves(swaps)
+        for b, (swap, reference) in enumerate(zip(swaps, references)):
+            if swap is None:
+                continue
+            expected = reference.resolve_move(*swap)
+            score, depth = (0, 0) if expected is None else (expected.score, expected.depth)
+            assert (result.scores[b], result.depths[b]) == (score, depth)
+            assert batch.board(b) == reference.to_list()
+        if move % 5 == 0:
+            assert batch.legal_moves() == [reference.legal_moves() for reference in references]
+
+
+def test_to_board_continues_game():
+    """Доска, извлечённая из пакета, продолжает партию так же, как эталон."""
+    rng = random.Random(1)
+    batch, references = make_pair(4, 8, 8, 5, True, 1)
+    for _ in range(5):
+        swaps = [rng.choice(reference.legal_moves()) for reference in references]
+        batch.resolve_moves(swaps)
+        for swap, reference in zip(swaps, references):
+            reference.resolve_move(*swap)
+    board, reference = batch.to_board(2), references[2]
+    assert board.to_list() == reference.to_list()
+    for _ in range(10):
+        move = rng.choice(reference.legal_moves())
+        assert board.resolve_move(*move).score == reference.resolve_move(*move).score
+        assert board.to_list() == reference.to_list()
+
+
+@pytest.mark.parametrize('length', [3, 5])
+def test_swaps_length_must_match(length):
+    batch, _ = make_pair(4, 6, 6, 5, True, 0)
+    before = [batch.board(b) for b in range(4)]
+    with pytest.raises(ValueError):
+        batch.resolve_moves([(0, 0, 0, 1)] * length)
+    with pytest.raises(ValueError):
+        batch.swap_elements([None] * length)
+    assert [batch.board(b) for b in range(4)] == before
@@ -0,0 +1,84 @@
+"""
+Тесты проверки журналов GameService: журналы от клиента, выходящие за ограничения
+сервиса, отклоняются до построения доски; неверные HTTP-запросы получают ответ 400,
+а не занимают поток сервера.
+"""
+import random
+import socket
+import threading
+
+import pytest
+
+from array_board import ArrayGameBoard
+from game_service import MAX_BOARD_SIZE, NUM_TYPES, GameService, make_server
+from replay import MoveLog
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = GameService(str(tmp_path / 'scores.jsonl'), workers=1)
+    yield service
+    service.close()
+
+
+def played_log(rows=8, cols=8, moves=5, seed=1):
+    """Журнал честной партии из moves случайных результативных ходов."""
+    rng = random.Random(seed)
+    board = ArrayGameBoard(rows, cols, NUM_TYPES, auto_reshuffle=True, seed=seed)
+    log = MoveLog.for_board(board)
+    for _ in range(moves):
+        move = rng.choice(board.legal_moves())
+        log.score += board.resolve_move(*move).score
+        log.record(*move)
+    return log
+
+
+def test_valid_log(service):
+    [result] = service.validate_batch([played_log().to_bytes()])
+    assert result.valid and result.moves == 5
+
+
+@pytest.mark.parametrize('rows, cols', [(65535, 65535), (MAX_BOARD_SIZE + 1, 8), (8, 2)])
+def test_rejects_board_size(service, rows, cols):
+    log = MoveLog(rows, cols, NUM_TYPES, seed=1)
+    log.record(0, 0, 0, 1)
+    [result] = service.validate_batch([log.to_bytes()])
+    assert not result.valid and 'размер поля' in result.error
+
+
+def test_rejects_num_types(service):
+    log = MoveLog(8, 8, 255, seed=1)
+    [result] = service.validate_batch([log.to_bytes()])
+    assert not result.valid and 'типов' in result.error
+
+
+def test_rejects_too_many_moves(service):
+    log = MoveLog(8, 8, NUM_TYPES, seed=1)
+    for _ in range(10000):
+        log.record(0, 0, 0, 1)
+    [result] = service.validate_batch([log.to_bytes()])
+    assert not result.valid and 'лимита' in result.error
+
+
+def test_rejects_malformed_log(service):
+    [result] = service.validate_batch([b'\x00' * 4])
+    assert not result.valid and result.error
+
+
+@pytest.fixture
+def server(service):
+    server = make_server(service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('length', ['-1', 'abc', '1.5'])
+def test_rejects_bad_content_length(server, length):
+    with socket.create_connection(server.server_address, timeout=5) as conn:
+        conn.sendall(f"POST /validate HTTP/1.1\r\nHost: test\r\nContent-Length: {length}\r\n\r\n{{}}"
+                     .encode())
+        status_line = conn.makefile('rb').readline()
+    assert status_line.split()[1] == b'400'
@@ -0,0 +1,48 @@
+"""
+Тесты HighscoreStore: топ по сложностям и сжатие журнала.
+"""
+import pytest
+
+from highscores import HighscoreStore
+
+
+def count_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'highscores.jsonl')
+
+
+def test_top_per_difficulty(path):
+    store = HighscoreStore(path, top_k=3)
+    for score in (5, 9, 1, 7, 3):
+        store.add({'name': f'p{score}', 'score': score, 'difficulty': '8x8'})
+    store.add({'name': 'other', 'score': 100, 'difficulty': '6x6'})
+    assert [entry['score'] for entry in store.top(10, '8x8')] == [9, 7, 5]
+    assert store.top(1)[0] == {'name': 'other', 'score': 100, 'difficulty': '6x6'}
+    reopened = HighscoreStore(path, top_k=3)
+    reopened.refresh()
+    assert reopened.top(10, '8x8') == store.top(10, '8x8')
+
+
+def test_compacts_extra_lines(path):
+    store = HighscoreStore(path, top_k=2, compact_after=10)
+    for score in range(12):
+        store.add({'name': 'p', 'score': score, 'difficulty': '8x8'})
+    assert count_lines(path) <= 2 + 10
+    assert [entry['score'] for entry in store.top(10, '8x8')] == [11, 10]
+
+
+def test_many_difficulties_do_not_compact_every_add(path, monkeypatch):
+    """Сжатый журнал длиннее compact_after (много сложностей) - это не повод сжимать снова."""
+    store = HighscoreStore(path, top_k=2, compact_after=10)
+    compactions = []
+    compact = store.compact
+    monkeypatch.setattr(store, 'compact', lambda: (compactions.append(1), compact()))
+    for size in range(3, 103):
+        store.add({'name': 'p', 'score': size, 'difficulty': f'{size}x{size}'})
+    assert not compactions
+    assert count_lines(path) == 100
@@ -0,0 +1,40 @@
+"""
+Проверка производительности горячих путей против benchmarks/baselines.json
+(см. benchmarks/bench_regression). Набор базовых значений сверяется с набором
+случаев всегда; замеры зависят от нагрузки машины, поэтому по умолчанию идут только
+быстрые случаи SMOKE_CASES с широким допуском, а все случаи с обычным допуском -
+при MATCH3_PERF_TESTS=1.
+"""
+import os
+
+import pytest
+
+from benchmarks import bench_regression
+
+FULL = os.environ.get('MATCH3_PERF_TESTS') == '1'
+SMOKE_CASES = ['find_matches/array/30x30', 'resolve_move/list/8x8']
+SMOKE_TOLERANCE = 0.6 # Ловит только грубые замедления: прогон идёт и на загруженной машине
+
+BASELINES = bench_regression.load_baselines()
+
+
+def test_baselines_match_cases():
+    unknown, missing = bench_regression.mismatched_baselines(BASELINES)
+    assert not unknown and not missing, (
+        f"лишние: {unknown}, без значения: {missing} (python -m benchmarks.bench_regression --save)")
+
+
+@pytest.mark.parametrize('name', SMOKE_CASES)
+def test_smoke_no_regression(name):
+    baseline = BASELINES[name]
+    score, regressed = bench_regression.check(name, baseline, SMOKE_TOLERANCE)
+    assert not regressed, f"{name}: {score:.4f} против базового {baseline:.4f}"
+
+
+@pytest.mark.skipif(not FULL, reason="все замеры производительности включаются MATCH3_PERF_TESTS=1")
+@pytest.mark.parametrize('name', bench_regression.cases())
+def test_no_regression(name):
+    baseline = BASELINES.get(name)
+    assert baseline is not None, f"{name}: нет базового значения (python -m benchmarks.bench_regression --save)"
+    score, regressed = bench_regression.check(name, baseline)
+    assert not regressed, f"{name}: {score:.4f} против базового {baseline:.4f}"
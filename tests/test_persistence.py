@@ -0,0 +1,66 @@
+"""
+Тесты фонового сохранения: очередь PersistenceWorker и восстановление партии
+из автосохранения (persistence.restore_game).
+"""
+import queue
+import random
+
+from array_board import ArrayGameBoard
+from game_board import difficulty_for
+from persistence import PersistenceWorker, restore_game, write_atomic
+from replay import MoveLog
+
+
+def save_game(path, moves, size=6, seed=1):
+    """Играет до moves случайных ходов (или до цели) и пишет журнал как автосохранение."""
+    rng = random.Random(seed)
+    board = ArrayGameBoard(size, size, 5, auto_reshuffle=True, seed=seed)
+    log = MoveLog.for_board(board)
+    _, target_score = difficulty_for(size)
+    while len(log) < moves and log.score < target_score:
+        move = rng.choice(board.legal_moves())
+        log.score += board.resolve_move(*move).score
+        log.record(*move)
+    write_atomic(path, log.to_bytes())
+    return board, log
+
+
+def test_restores_game_in_progress(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    board, log = save_game(path, moves=3)
+    restored = restore_game(path, ArrayGameBoard)
+    assert restored is not None
+    restored_board, restored_log = restored
+    assert restored_board.to_list() == board.to_list()
+    assert restored_log.score == log.score and len(restored_log) == 3
+
+
+def test_rejects_finished_game(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    moves_limit, target_score = difficulty_for(6)
+    _, log = save_game(path, moves=moves_limit)
+    assert len(log) >= moves_limit or log.score >= target_score
+    assert restore_game(path, ArrayGameBoard) is None
+
+
+def test_rejects_damaged_file(tmp_path):
+    path = tmp_path / 'autosave.bin'
+    path.write_bytes(b'garbage')
+    assert restore_game(str(path), ArrayGameBoard) is None
+    assert restore_game(str(tmp_path / 'missing.bin'), ArrayGameBoard) is None
+
+
+def test_deferred_callbacks_get_their_own_future():
+    """post откладывает колбэки (как Clock.schedule_once), а рабочий поток идёт дальше."""
+    posted = queue.Queue()
+    worker = PersistenceWorker(post=posted.put)
+    received = []
+    first = worker.submit(lambda: 'first', callback=lambda future: received.append(('a', future.result())))
+    worker.submit(lambda: 'second') # Без колбэка
+    third = worker.submit(lambda: 'third', callback=lambda future: received.append(('b', future.result())))
+    assert worker.flush(timeout=5)
+    while not posted.empty():
+        posted.get()()
+    worker.close()
+    assert received == [('a', 'first'), ('b', 'third')]
+    assert first.result() == 'first' and third.result() == 'third'
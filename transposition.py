@@ -0,0 +1,116 @@
+"""
+Таблица транспозиций для поиска ходов: позиции, к которым поиск приходит разными
+последовательностями обменов, оцениваются один раз.
+
+Позиция определяется ключом Zobrist доски (GameBoard.zobrist_key, обновляется на ходу),
+размерами поля и числом типов. Для позиции хранятся список результативных обменов,
+мгновенные очки обменов (policies.immediate_score) и оценки ходов, посчитанные поиском
+на заданной глубине. Записей не больше max_entries, при переполнении вытесняется
+давно не использованная (LRU), а на одну запись - не больше max_scores оценок,
+поэтому память ограничена заранее известной величиной.
+"""
+from collections import OrderedDict
+
+from policies import immediate_score
+
+
+# --- Класс TranspositionCache: Ограниченный LRU-кэш оценок позиций ---
+class TranspositionCache:
+    """
+    LRU-кэш {позиция: запись}. Не потокобезопасен: им пользуется один поток
+    (у MoveAdvisor - фоновый поток подсказок).
+    """
+
+    def __init__(self, max_entries=1024, max_scores=256):
+        self.max_entries = max_entries
+        self.max_scores = max_scores # Оценок (ход, глубина) на одну позицию
+        self._entries = OrderedDict() # Ключ позиции -> [обмены или None, {(ход, глубина): очки}]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(board):
+        """Ключ позиции доски в кэше."""
+        return (board.rows, board.cols, board.num_types, board.zobrist_key)
+
+    def _entry(self, key):
+        """Запись позиции key (новая пустая, если её не было; лишние вытесняются)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._entries[key] = [None, {}]
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def legal_moves(self, board, key=None):
+        """board.legal_moves() через кэш (возвращается общий список - его нельзя менять)."""
+        key = self.key(board) if key is None else key
+        moves = self.moves(key)
+        if moves is None:
+            moves = board.legal_moves()
+            self.store_moves(key, moves)
+        return moves
+
+    def moves(self, key):
+        """Сохранённый список обменов позиции key или None."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def store_moves(self, key, moves):
+        """Сохраняет полный список результативных обменов позиции key."""
+        self._entry(key)[0] = moves
+
+    def score(self, key, move, depth):
+        """Сохранённая оценка хода move на глубине depth в позиции key или None."""
+        entry = self._entries.get(key)
+        value = entry[1].get((move, depth)) if entry is not None else None
+        if value is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def store_score(self, key, move, depth, value):
+        """Сохраняет оценку хода (если у позиции ещё есть место для оценок)."""
+        scores = self._entry(key)[1]
+        if len(scores) < self.max_scores or (move, depth) in scores:
+            scores[(move, depth)] = value
+
+    def immediate_score(self, board, move, key=None):
+        """policies.immediate_score через кэш (глубина 0 - без падений и заполнений)."""
+        key = self.key(board) if key is None else key
+        value = self.score(key, move, 0)
+        if value is None:
+            value = immediate_score(board, move)
+            self.store_score(key, move, 0, value)
+        return value
+
+    def stats(self):
+        """Счётчики кэша: записи, попадания, промахи, вытеснения и доля попаданий."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Очищает кэш и счётчики."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0